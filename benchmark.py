@@ -0,0 +1,104 @@
+import argparse
+from buildings import benchmarks_v2
+from buildings import profiling_v2
+
+
+def main():
+    parser = argparse.ArgumentParser(
+        description="Benchmark the build and export pipeline")
+    subparsers = parser.add_subparsers(dest="command", required=True)
+
+    run_parser = subparsers.add_parser("run", help="Run the benchmarks")
+    run_parser.add_argument(
+        "names",
+        nargs="*",
+        help="Models to benchmark (default: all)")
+    run_parser.add_argument("--repeat", type=int, default=3)
+    run_parser.add_argument(
+        "--output",
+        help="Results JSON path (default: ./output/benchmarks/<commit>.json)")
+
+    compare_parser = subparsers.add_parser(
+        "compare", help="Compare two benchmark results files")
+    compare_parser.add_argument("baseline")
+    compare_parser.add_argument("current")
+    compare_parser.add_argument("--threshold", type=float, default=0.1)
+
+    profile_parser = subparsers.add_parser(
+        "profile", help="Profile the PanelGroup construction of one model")
+    profile_parser.add_argument("name")
+    profile_parser.add_argument(
+        "--trace",
+        help="Write a Chrome trace / Perfetto JSON file to this path")
+    profile_parser.add_argument("--top", type=int, default=20)
+
+    scale_parser = subparsers.add_parser(
+        "scale", help="Measure scaling with synthetic towns of N buildings")
+    scale_parser.add_argument(
+        "--counts", type=int, nargs="+", default=[1, 5, 25, 100, 500])
+    scale_parser.add_argument("--seed", type=int, default=0)
+    scale_parser.add_argument(
+        "--streaming",
+        action="store_true",
+        help="Build and export one building at a time with export_streaming")
+    scale_parser.add_argument(
+        "--outline-jobs",
+        type=int,
+        default=1,
+        help="Number of processes that extract the outlines of the panels")
+    scale_parser.add_argument(
+        "--output",
+        help="Results JSON path (default: ./output/benchmarks/<commit>-scaling.json)")
+
+    args = parser.parse_args()
+
+    if args.command == "run":
+        for name in args.names:
+            if name not in benchmarks_v2.BENCHMARK_BUILDERS:
+                parser.error(f"Unknown benchmark model: {name}")
+
+        results = benchmarks_v2.run_benchmarks(
+            names=args.names or None,
+            repeat=args.repeat)
+        output_filepath = args.output or benchmarks_v2.get_default_results_filepath()
+        benchmarks_v2.write_results(results=results, filepath=output_filepath)
+        print(f"Wrote {output_filepath}")
+
+    if args.command == "profile":
+        if args.name not in benchmarks_v2.BENCHMARK_BUILDERS:
+            parser.error(f"Unknown benchmark model: {args.name}")
+
+        with profiling_v2.profile() as profiler:
+            benchmarks_v2.BENCHMARK_BUILDERS[args.name]()
+
+        for line in profiler.get_top_table(count=args.top):
+            print(line)
+
+        if args.trace:
+            profiler.write_chrome_trace(filepath=args.trace)
+            print(f"Wrote {args.trace}")
+
+    if args.command == "scale":
+        results = benchmarks_v2.run_scaling(
+            building_counts=args.counts,
+            seed=args.seed,
+            streaming=args.streaming,
+            outline_jobs=args.outline_jobs)
+        for line in benchmarks_v2.format_scaling_results(results=results):
+            print(line)
+        output_filepath = args.output or benchmarks_v2.get_default_results_filepath(
+            suffix="-scaling")
+        benchmarks_v2.write_results(results=results, filepath=output_filepath)
+        print(f"Wrote {output_filepath}")
+
+    if args.command == "compare":
+        lines = benchmarks_v2.compare_results(
+            baseline=benchmarks_v2.read_results(filepath=args.baseline),
+            current=benchmarks_v2.read_results(filepath=args.current),
+            threshold=args.threshold)
+        for line in lines:
+            print(line)
+
+
+if __name__ == "__main__":
+    main()
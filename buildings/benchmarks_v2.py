@@ -0,0 +1,394 @@
+import contextlib
+import io
+import json
+import os
+import platform
+import resource
+import statistics
+import subprocess
+import tempfile
+import time
+from concurrent.futures import ProcessPoolExecutor
+from datetime import datetime, timezone
+from typing import Callable, Iterator, Optional
+from buildings import export_v2
+from buildings import media_v2
+from buildings import nets_v2
+from buildings import panels_v2
+from buildings import transforms_v2
+from buildings import vertices_v2
+from buildings.panels_v2 import PanelGroup
+from buildings.panels_v2 import pi_camera_stand, town
+from buildings.panels_v2.stokesley_station import back_house
+from buildings.panels_v2.stokesley_station import main_house
+from buildings.panels_v2.stokesley_station import platform_shelter
+from buildings.panels_v2.stokesley_station import porch_house
+from buildings.panels_v2.stokesley_station import side_house
+from buildings.panels_v2.stokesley_station import signal_box
+from buildings.panels_v2.stokesley_station import waiting_room
+
+
+def _build_waiting_room() -> PanelGroup:
+    return waiting_room.waiting_room(
+        wall_base_media=media_v2.CARD_2x169mm,
+        wall_front_media=media_v2.CARD_2x056mm,
+        wall_back_media=media_v2.CARD_056mm,
+        roof_media=media_v2.CARD_056mm,
+        window_media=media_v2.CARD_056mm,
+        transform=[]
+    )
+
+
+BENCHMARK_BUILDERS: dict[str, Callable[[], PanelGroup]] = {
+    "waiting_room": _build_waiting_room,
+    "main_house": lambda: main_house.main_house(transform=[]),
+    "side_house": lambda: side_house.side_house(transform=[]),
+    "back_house": lambda: back_house.back_house(transform=[]),
+    "porch_house": lambda: porch_house.porch_house(transform=[]),
+    "platform_shelter": lambda: platform_shelter.platform_shelter(transform=[]),
+    "signal_box": lambda: signal_box.signal_box(transform=[]),
+    "pi_camera_stand": lambda: pi_camera_stand.pi_camera_stand(
+        media=media_v2.CARD_169mm)
+}
+
+# Functions that are timed individually while building and exporting. The
+# stage times are inclusive, so e.g. "transforms" time spent inside
+# "cutouts" is counted in both.
+TIMED_STAGES = [
+    (panels_v2, "_add_tabs", "add_tabs"),
+    (panels_v2, "apply_cutouts_from_children", "cutouts"),
+    (transforms_v2, "apply_transform", "transforms"),
+    (transforms_v2, "apply_reverse_transform", "transforms"),
+    (vertices_v2, "get_panel_vertex_loops", "vertex_loops"),
+    (nets_v2, "compute_layout", "compute_layout"),
+    (export_v2, "_compute_svg_for_page", "svg_pages")
+]
+
+
+def get_default_results_filepath(suffix: str = "") -> str:
+    commit = _get_git_commit() or "unknown"
+    return f"./output/benchmarks/{commit}{suffix}.json"
+
+
+def run_benchmarks(
+    names: Optional[list[str]] = None,
+    repeat: int = 3
+) -> dict:
+    """
+    Builds and exports each benchmark model `repeat` times and returns the
+    min and median times of the whole build, of each export step and of each
+    timed stage.
+    """
+    if names is None:
+        names = list(BENCHMARK_BUILDERS.keys())
+
+    results = {}
+    for name in names:
+        print(f"Benchmarking {name}")
+        runs = [_run_once(build_fn=BENCHMARK_BUILDERS[name]) for _ in range(repeat)]
+
+        timing_keys = runs[0]["times"].keys()
+        results[name] = {
+            "times": {
+                key: _summarize([run["times"][key] for run in runs])
+                for key in timing_keys
+            },
+            "panel_count": runs[0]["panel_count"],
+            "page_count": runs[0]["page_count"]
+        }
+
+    return {
+        "commit": _get_git_commit(),
+        "created": datetime.now(timezone.utc).isoformat(),
+        "python": platform.python_version(),
+        "machine": platform.machine(),
+        "repeat": repeat,
+        "results": results
+    }
+
+
+def run_scaling(
+    building_counts: list[int],
+    seed: int = 0,
+    streaming: bool = False,
+    outline_jobs: int = 1
+) -> dict:
+    """
+    Builds and exports synthetic towns of increasing size and returns the
+    time of each step and the peak memory for each building count. Each
+    town is built in a fresh process so that the peak memory of one run
+    does not hide the next. With streaming, the town is exported with
+    export_streaming, which builds and exports one building at a time.
+    The outlines of the panels are extracted in up to outline_jobs
+    processes at once.
+    """
+    results = {}
+    for building_count in building_counts:
+        print(f"Scaling {building_count} buildings")
+        with ProcessPoolExecutor(max_workers=1) as executor:
+            future = executor.submit(
+                _run_streaming_scaling_once if streaming else _run_scaling_once,
+                building_count=building_count,
+                seed=seed,
+                outline_jobs=outline_jobs)
+            results[str(building_count)] = future.result()
+
+    return {
+        "commit": _get_git_commit(),
+        "created": datetime.now(timezone.utc).isoformat(),
+        "python": platform.python_version(),
+        "machine": platform.machine(),
+        "seed": seed,
+        "streaming": streaming,
+        "outline_jobs": outline_jobs,
+        "results": results
+    }
+
+
+def format_scaling_results(results: dict) -> list[str]:
+    keys = list(next(iter(results["results"].values()))["times"].keys())
+    lines = [
+        f"{'buildings':>9} {'panels':>7} {'pages':>6} " +
+        " ".join([f"{key:>12}" for key in keys]) +
+        f" {'peak MB':>8}"
+    ]
+    for building_count, result in results["results"].items():
+        lines.append(
+            f"{building_count:>9} {result['panel_count']:>7} "
+            f"{result['page_count']:>6} " +
+            " ".join([f"{result['times'][key]:>12.3f}" for key in keys]) +
+            f" {result['peak_memory_mb']:>8.1f}")
+
+    return lines
+
+
+def write_results(results: dict, filepath: str) -> None:
+    os.makedirs(os.path.dirname(filepath), exist_ok=True)
+    with open(filepath, "w") as f:
+        f.write(json.dumps(results, indent=4, sort_keys=True))
+
+
+def read_results(filepath: str) -> dict:
+    with open(filepath, "r") as f:
+        return json.loads(f.read())
+
+
+def compare_results(
+    baseline: dict,
+    current: dict,
+    threshold: float = 0.1
+) -> list[str]:
+    """
+    Compares the median times of two benchmark results and returns a table
+    with one line per timing. Lines slower than the baseline by more than
+    the threshold fraction are marked as regressions.
+    """
+    lines = [
+        f"{'model':<18} {'timing':<16} {'baseline':>10} {'current':>10} {'change':>8}"
+    ]
+    for name, current_result in current["results"].items():
+        baseline_result = baseline["results"].get(name)
+        if baseline_result is None:
+            lines.append(f"{name:<18} (not in baseline)")
+            continue
+
+        for key, current_times in current_result["times"].items():
+            if key not in baseline_result["times"]:
+                continue
+            t0 = baseline_result["times"][key]["median"]
+            t1 = current_times["median"]
+            change = (t1 - t0) / t0 if t0 > 0 else 0
+            flag = "  REGRESSION" if change > threshold else ""
+            lines.append(
+                f"{name:<18} {key:<16} {t0:>10.3f} {t1:>10.3f} "
+                f"{100 * change:>+7.1f}%{flag}")
+
+    return lines
+
+
+def _run_once(build_fn: Callable[[], PanelGroup]) -> dict:
+    stage_times: dict[str, float] = {
+        stage: 0 for _, _, stage in TIMED_STAGES
+    }
+    times = {}
+
+    with _timed_stages(stage_times=stage_times):
+        t0 = time.perf_counter()
+        panel_group = build_fn()
+        times["build"] = time.perf_counter() - t0
+
+        with tempfile.TemporaryDirectory() as output_dirpath:
+            t0 = time.perf_counter()
+            export_v2.export_mesh(
+                output_dirpath=output_dirpath,
+                model_name="benchmark",
+                panel_group=panel_group)
+            times["export_gltf"] = time.perf_counter() - t0
+
+            # export_svgs prints every panel, which would swamp the timings
+            t0 = time.perf_counter()
+            with contextlib.redirect_stdout(io.StringIO()):
+                export_v2.export_svgs(
+                    panel_group=panel_group,
+                    output_dirpath=output_dirpath)
+            times["export_svgs"] = time.perf_counter() - t0
+
+            page_count = _count_pages(output_dirpath=output_dirpath)
+
+    times.update(stage_times)
+
+    return {
+        "times": times,
+        "panel_count": len(panels_v2.get_all_panels(panel_group=panel_group)),
+        "page_count": page_count
+    }
+
+
+def _run_scaling_once(building_count: int, seed: int, outline_jobs: int) -> dict:
+    times = {}
+
+    t0 = time.perf_counter()
+    panel_group = town.town(
+        name="town",
+        building_count=building_count,
+        transform=[],
+        seed=seed)
+    times["build"] = time.perf_counter() - t0
+
+    panels = panels_v2.get_all_panels(panel_group=panel_group)
+    media_by_name = nets_v2.get_single_layer_media_by_name(panels=panels)
+
+    t0 = time.perf_counter()
+    layout_panels_by_media = nets_v2.get_layout_panels_by_media(
+        panels=panels,
+        jobs=outline_jobs)
+    times["vertex_loops"] = time.perf_counter() - t0
+
+    t0 = time.perf_counter()
+    for media_name, layout_panels in layout_panels_by_media.items():
+        nets_v2.compute_layout(
+            layout_panels=layout_panels,
+            media=media_by_name[media_name])
+    times["packing"] = time.perf_counter() - t0
+
+    with tempfile.TemporaryDirectory() as output_dirpath:
+        t0 = time.perf_counter()
+        export_v2.export_mesh(
+            output_dirpath=output_dirpath,
+            model_name="town",
+            panel_group=panel_group)
+        times["export_gltf"] = time.perf_counter() - t0
+
+        t0 = time.perf_counter()
+        with contextlib.redirect_stdout(io.StringIO()):
+            export_v2.export_svgs(
+                panel_group=panel_group,
+                output_dirpath=output_dirpath)
+        times["export_svgs"] = time.perf_counter() - t0
+
+        page_count = _count_pages(output_dirpath=output_dirpath)
+
+    return {
+        "times": times,
+        "panel_count": len(panels),
+        "page_count": page_count,
+        "peak_memory_mb": _get_peak_memory_mb()
+    }
+
+
+def _run_streaming_scaling_once(
+    building_count: int,
+    seed: int,
+    outline_jobs: int
+) -> dict:
+    builders = town.get_building_builders(
+        building_count=building_count,
+        seed=seed)
+
+    with tempfile.TemporaryDirectory() as output_dirpath:
+        t0 = time.perf_counter()
+        with contextlib.redirect_stdout(io.StringIO()):
+            panel_count = export_v2.export_streaming(
+                output_dirpath=output_dirpath,
+                model_name="town",
+                name="town",
+                builders=builders,
+                outline_jobs=outline_jobs)
+        export_time = time.perf_counter() - t0
+
+        page_count = _count_pages(output_dirpath=output_dirpath)
+
+    return {
+        "times": {"export_streaming": export_time},
+        "panel_count": panel_count,
+        "page_count": page_count,
+        "peak_memory_mb": _get_peak_memory_mb()
+    }
+
+
+def _count_pages(output_dirpath: str) -> int:
+    return len([
+        filename
+        for _, _, filenames in os.walk(output_dirpath)
+        for filename in filenames
+        if filename.endswith("-cut.svg")
+    ])
+
+
+def _get_peak_memory_mb() -> float:
+    # ru_maxrss is in bytes on macOS and in kilobytes on Linux
+    max_rss = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    if platform.system() == "Darwin":
+        return max_rss / (1024 * 1024)
+    return max_rss / 1024
+
+
+@contextlib.contextmanager
+def _timed_stages(stage_times: dict[str, float]) -> Iterator[None]:
+    """
+    Temporarily wraps the TIMED_STAGES functions so that their run time is
+    added to stage_times. The functions are always called through their
+    module, so replacing the module attribute is enough.
+    """
+    originals = []
+    for module, attr_name, stage in TIMED_STAGES:
+        fn = getattr(module, attr_name)
+        originals.append((module, attr_name, fn))
+        setattr(module, attr_name, _timed(fn=fn, stage=stage, stage_times=stage_times))
+
+    try:
+        yield
+    finally:
+        for module, attr_name, fn in originals:
+            setattr(module, attr_name, fn)
+
+
+def _timed(fn: Callable, stage: str, stage_times: dict[str, float]) -> Callable:
+    def timed_fn(*args, **kwargs):
+        t0 = time.perf_counter()
+        try:
+            return fn(*args, **kwargs)
+        finally:
+            stage_times[stage] += time.perf_counter() - t0
+
+    return timed_fn
+
+
+def _summarize(values: list[float]) -> dict[str, float]:
+    return {
+        "min": min(values),
+        "median": statistics.median(values)
+    }
+
+
+def _get_git_commit() -> Optional[str]:
+    try:
+        result = subprocess.run(
+            ["git", "rev-parse", "--short", "HEAD"],
+            capture_output=True,
+            text=True,
+            check=True)
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+    return result.stdout.strip()
@@ -0,0 +1,28 @@
+import io
+import os
+import tempfile
+from cadquery import Shape
+from OCP.BinTools import BinTools
+from OCP.TopoDS import TopoDS_Shape
+
+
+def to_brep(shape: Shape) -> bytes:
+    """
+    Gets the shape in the binary BREP format, which keeps its coordinates
+    exactly, e.g. to store it or to send it to another process
+    """
+    stream = io.BytesIO()
+    BinTools.Write_s(shape.wrapped, stream)
+    return stream.getvalue()
+
+
+def from_brep(data: bytes) -> Shape:
+    # BinTools misreads some shapes (e.g. solids with holes cut in them)
+    # from Python streams, but not from files
+    with tempfile.TemporaryDirectory() as dirpath:
+        filepath = os.path.join(dirpath, "shape.bin")
+        with open(filepath, "wb") as f:
+            f.write(data)
+        shape = TopoDS_Shape()
+        BinTools.Read_s(shape, filepath)
+    return Shape.cast(shape)
@@ -0,0 +1,276 @@
+import collections
+import contextlib
+import dataclasses
+import functools
+import hashlib
+import importlib
+import inspect
+import io
+import json
+import os
+import pickle
+import pkgutil
+import tempfile
+from typing import Any, Callable, Iterator, Optional
+import cadquery
+from cadquery import Plane, Shape, Vector, Workplane
+from buildings import brep_v2
+from buildings import dependencies_v2
+from buildings import panels_v2
+from buildings.panels_v2 import PanelGroup
+
+
+DEFAULT_CACHE_DIRPATH = "./output/.build-cache"
+
+# Changing this invalidates every cached PanelGroup, e.g. when the way
+# that they are stored changes
+CACHE_FORMAT_VERSION = 2
+
+# Most bytes of stored PanelGroups kept in memory, so that e.g. the build
+# daemon does not read the same ones from disk for every build
+MAX_MEMORY_CACHE_BYTES = 256 * 1024 * 1024
+
+
+class _UncacheableError(Exception):
+    pass
+
+
+class _PickleCache:
+    """
+    The stored PanelGroups most recently used, by key, up to a total size.
+    """
+
+    def __init__(self, max_bytes: int) -> None:
+        self.max_bytes = max_bytes
+        self.byte_count = 0
+        self._pickles_by_key: collections.OrderedDict[str, bytes] = (
+            collections.OrderedDict())
+
+    def get(self, key: str) -> Optional[bytes]:
+        data = self._pickles_by_key.get(key)
+        if data is not None:
+            self._pickles_by_key.move_to_end(key)
+        return data
+
+    def put(self, key: str, data: bytes) -> None:
+        if key in self._pickles_by_key:
+            self.byte_count -= len(self._pickles_by_key.pop(key))
+        if len(data) > self.max_bytes:
+            return
+        self._pickles_by_key[key] = data
+        self.byte_count += len(data)
+        while self.byte_count > self.max_bytes:
+            _, evicted_data = self._pickles_by_key.popitem(last=False)
+            self.byte_count -= len(evicted_data)
+
+
+# Kept for the life of the process, across build_cache() contexts
+_pickle_cache = _PickleCache(max_bytes=MAX_MEMORY_CACHE_BYTES)
+
+
+class BuildCache:
+    """
+    Caches the PanelGroups returned by builder functions while the
+    build_cache() context is active. The key of a call is a hash of its
+    arguments and of the source files that the builder depends on (see
+    dependencies_v2.get_function_dependencies), so a cached PanelGroup is
+    only used if nothing that it was built from has changed.
+    """
+
+    def __init__(self, cache_dirpath: str) -> None:
+        self.cache_dirpath = cache_dirpath
+        self.hit_count = 0
+        self.miss_count = 0
+        self.uncacheable_count = 0
+        self._source_hashes_by_fn: dict[Callable, str] = {}
+        # Functions that have returned something other than a PanelGroup,
+        # e.g. a Workplane, which are not cached
+        self._helper_fns: set[Callable] = set()
+
+    def call(self, fn: Callable, args: tuple, kwargs: dict) -> Any:
+        if fn in self._helper_fns:
+            return fn(*args, **kwargs)
+
+        try:
+            key = self._get_key(fn=fn, args=args, kwargs=kwargs)
+        except _UncacheableError:
+            # E.g. an argument is a Workplane or a PanelGroup
+            self.uncacheable_count += 1
+            return fn(*args, **kwargs)
+
+        data = self._load(key=key)
+        if data is not None:
+            self.hit_count += 1
+            # A new copy for each call, as callers change the PanelGroups
+            # that they are given (e.g. apply_cutouts_from_children)
+            return pickle.loads(data)
+
+        result = fn(*args, **kwargs)
+        if type(result) is not PanelGroup:
+            self._helper_fns.add(fn)
+            return result
+
+        self.miss_count += 1
+        try:
+            data = _dumps(value=result)
+        except (pickle.PicklingError, TypeError):
+            # Something in the PanelGroup that can't be stored
+            self.uncacheable_count += 1
+            return result
+        self._store(key=key, data=data)
+        return result
+
+    def _get_key(self, fn: Callable, args: tuple, kwargs: dict) -> str:
+        bound_args = inspect.signature(fn).bind(*args, **kwargs)
+        bound_args.apply_defaults()
+        return _hash(value=[
+            CACHE_FORMAT_VERSION,
+            cadquery.__version__,
+            fn.__module__,
+            fn.__qualname__,
+            self._get_source_hash(fn=fn),
+            _get_canonical_value(value=dict(bound_args.arguments))
+        ])
+
+    def _get_source_hash(self, fn: Callable) -> str:
+        if fn not in self._source_hashes_by_fn:
+            source_hash = hashlib.sha256()
+            for path in sorted(dependencies_v2.get_function_dependencies(fn=fn)):
+                with open(path, "rb") as f:
+                    source_hash.update(f.read())
+            self._source_hashes_by_fn[fn] = source_hash.hexdigest()
+        return self._source_hashes_by_fn[fn]
+
+    def _get_path(self, key: str) -> str:
+        return os.path.join(self.cache_dirpath, key[:2], f"{key}.pickle")
+
+    def _load(self, key: str) -> Optional[bytes]:
+        data = _pickle_cache.get(key=key)
+        if data is None:
+            path = self._get_path(key=key)
+            if not os.path.isfile(path):
+                return None
+            with open(path, "rb") as f:
+                data = f.read()
+            _pickle_cache.put(key=key, data=data)
+        return data
+
+    def _store(self, key: str, data: bytes) -> None:
+        _pickle_cache.put(key=key, data=data)
+
+        # Written via a renamed temporary file, as several processes may
+        # build at once (see buildings_v2.export_models)
+        path = self._get_path(key=key)
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        fd, temp_path = tempfile.mkstemp(dir=os.path.dirname(path), suffix=".tmp")
+        with os.fdopen(fd, "wb") as f:
+            f.write(data)
+        os.replace(temp_path, path)
+
+
+@contextlib.contextmanager
+def build_cache(cache_dirpath: str = DEFAULT_CACHE_DIRPATH) -> Iterator[BuildCache]:
+    """
+    Opt-in caching of the PanelGroups returned by the builder functions of
+    the panels_v2 package, e.g.
+
+        with build_cache_v2.build_cache() as cache:
+            pg = buildings_v2.build_station()
+        print(cache.hit_count, cache.miss_count)
+
+    A changed builder is built again, along with the builders that call it,
+    but the other subtrees are loaded from the cache. The cache directory
+    can be deleted at any time.
+    """
+    cache = BuildCache(cache_dirpath=cache_dirpath)
+    originals: list[tuple[Any, str, Any]] = []
+
+    def cache_wrapper(fn: Callable) -> Callable:
+        return functools.wraps(fn)(
+            lambda *args, **kwargs: cache.call(fn, args, kwargs))
+
+    for module in _get_builder_modules():
+        for attr_name, fn in inspect.getmembers(module, inspect.isfunction):
+            if fn.__module__ == module.__name__:
+                originals.append((module, attr_name, fn))
+                setattr(module, attr_name, cache_wrapper(fn))
+
+    try:
+        yield cache
+    finally:
+        for owner, attr_name, fn in reversed(originals):
+            setattr(owner, attr_name, fn)
+
+
+def _get_builder_modules() -> list:
+    modules = []
+    for module_info in pkgutil.walk_packages(
+        panels_v2.__path__, prefix=f"{panels_v2.__name__}."
+    ):
+        modules.append(importlib.import_module(module_info.name))
+    return modules
+
+
+def _get_canonical_value(value: Any) -> Any:
+    """
+    Gets a JSON serializable value that is equal for equal arguments, or
+    raises _UncacheableError for arguments that can't be compared by value.
+    """
+    if value is None or type(value) in [bool, int, str]:
+        return value
+    if type(value) is float:
+        # repr() keeps every bit of the value
+        return {"float": repr(value)}
+    if type(value) in [list, tuple]:
+        return [_get_canonical_value(value=v) for v in value]
+    if type(value) is dict and all([type(k) is str for k in value]):
+        return {k: _get_canonical_value(value=v) for k, v in value.items()}
+    if dataclasses.is_dataclass(value) and not isinstance(value, type):
+        if type(value) is PanelGroup:
+            raise _UncacheableError()
+        return {
+            "type": f"{type(value).__module__}.{type(value).__qualname__}",
+            "fields": {
+                f.name: _get_canonical_value(value=getattr(value, f.name))
+                for f in dataclasses.fields(value)
+            }
+        }
+    raise _UncacheableError()
+
+
+def _hash(value: Any) -> str:
+    return hashlib.sha256(
+        json.dumps(value, separators=(",", ":")).encode("utf-8")
+    ).hexdigest()
+
+
+class _Pickler(pickle.Pickler):
+    """
+    Pickles the cadquery objects of a PanelGroup. Shapes are stored in the
+    binary BREP format, which keeps coordinates exactly, and Workplanes are
+    stored as their plane and the objects on their stack, without the
+    history of the Workplanes that they were made from.
+    """
+
+    def reducer_override(self, obj):
+        if isinstance(obj, Workplane):
+            return _load_workplane, (obj.plane, obj.objects)
+        if isinstance(obj, Shape):
+            return brep_v2.from_brep, (brep_v2.to_brep(shape=obj),)
+        if isinstance(obj, Plane):
+            return Plane, (obj.origin, obj.xDir, obj.zDir)
+        if isinstance(obj, Vector):
+            return Vector, obj.toTuple()
+        return NotImplemented
+
+
+def _dumps(value: Any) -> bytes:
+    f = io.BytesIO()
+    _Pickler(f, protocol=pickle.HIGHEST_PROTOCOL).dump(value)
+    return f.getvalue()
+
+
+def _load_workplane(plane: Plane, objects: list) -> Workplane:
+    workplane = Workplane(plane)
+    workplane.objects = objects
+    return workplane
@@ -1,7 +1,16 @@
-import subprocess
+import contextlib
+import os
+import time
+import traceback
+from concurrent.futures import ProcessPoolExecutor
+from dataclasses import dataclass
+from typing import Callable, Optional
+from buildings import build_cache_v2
+from buildings import cleanup_v2
 from buildings import export_v2
 from buildings import media_v2
 from buildings import panels_v2
+from buildings.cleanup_v2 import CleanupStats
 from buildings.media_v2 import Media
 from buildings.panels_v2 import Panel, PanelGroup, Cutout
 from buildings.panels_v2 import houses, wall_panels, window_panels, chimneys
@@ -16,6 +25,36 @@ from buildings.panels_v2.stokesley_station import platform_shelter
 from buildings.panels_v2.stokesley_station import signal_box
 
 
+PHOTO_MATCH_DATA_DIRPATH = "./photo-match-data"
+
+# The models that can be built, by the name of their mesh and output
+# directory. Builders are added with the register_model decorator.
+MODEL_BUILDERS: dict[str, Callable[[], PanelGroup]] = {}
+
+
+def register_model(model_name: str):
+    def decorator(fn: Callable[[], PanelGroup]) -> Callable[[], PanelGroup]:
+        if model_name in MODEL_BUILDERS:
+            raise Exception(f"Model already registered: {model_name}")
+        MODEL_BUILDERS[model_name] = fn
+        return fn
+    return decorator
+
+
+@dataclass
+class ModelExport:
+    model_name: str
+    output_dirpath: str
+    panel_count: int = 0
+    page_count: int = 0
+    changed_file_count: int = 0
+    build_seconds: float = 0
+    export_seconds: float = 0
+    cleanup_stats: Optional[CleanupStats] = None
+    error: Optional[str] = None
+
+
+@register_model("signal-box")
 def build_signal_box() -> PanelGroup:
     return PanelGroup(
         name="signal_box",
@@ -28,10 +67,12 @@ def build_signal_box() -> PanelGroup:
     )
 
 
+@register_model("platform-shelter")
 def build_platform_shelter() -> PanelGroup:
     return platform_shelter.platform_shelter(transform=[])
 
 
+@register_model("stokesley-station")
 def build_station() -> PanelGroup:
     wall_base_media = media_v2.CARD_2x169mm
     wall_front_media = media_v2.CARD_2x056mm
@@ -87,33 +128,168 @@ def build_station() -> PanelGroup:
     )
 
 
-def main():
-    # model_name = "stokesley-station"
-    # pg = build_station()
+def export_photo_match_files(
+    model_name: str,
+    panel_group: PanelGroup,
+    output_dirpath: str,
+    data_dirpath: str = PHOTO_MATCH_DATA_DIRPATH
+) -> list[str]:
+    """
+    Exports the mesh and edges of the model and copies them into the photo
+    match data directory. Returns the paths of the copies.
+    """
+    mesh_paths = export_v2.export_mesh(
+        output_dirpath=output_dirpath,
+        model_name=model_name,
+        panel_group=panel_group)
 
-    # model_name = "platform-shelter"
-    # pg = build_platform_shelter()
+    edges_path = export_v2.export_edges(
+        output_dirpath=output_dirpath,
+        model_name=model_name,
+        panel_group=panel_group)
 
-    model_name = "signal-box"
-    pg = build_signal_box()
+    # The buffer of the mesh is copied before the GLTF that refers to it
+    return [
+        export_v2.copy_file_atomic(src_path=path, dst_dirpath=data_dirpath)
+        for path in list(reversed(mesh_paths)) + [edges_path]
+    ]
 
-    output_dirpath = export_v2.get_output_dirpath(model_name=model_name)
-    export_v2.delete_output_dir(output_dirpath=output_dirpath)
-    
-    export_v2.export_mesh(
-        output_dirpath=output_dirpath,
+
+def export_model(
+    model_name: str,
+    include_svgs: bool = True,
+    use_build_cache: bool = False,
+    clean_topology: bool = False,
+    outline_jobs: int = 1
+) -> ModelExport:
+    """
+    Builds the model and exports its mesh, edges and (optionally) SVGs into
+    its own output directory, copying the mesh and edges into the photo
+    match data directory. Only files whose contents have changed are
+    written, and the output directory's manifest records which (see
+    export_v2.update_manifest). With use_build_cache, unchanged subtrees of
+    the model are loaded from the build cache (see build_cache_v2). With
+    clean_topology, the panels' faces and edges are merged after the build
+    (see cleanup_v2). The outlines for the SVGs are extracted in up to
+    outline_jobs processes at once. An exception raised while building or
+    exporting is returned as the error of the ModelExport.
+    """
+    model_export = ModelExport(
         model_name=model_name,
-        panel_group=pg)
-    
-    subprocess.run([
-        "cp",
-        f"{output_dirpath}/{model_name}.gltf",
-        f"./photo-match-data/{model_name}.gltf"
-    ])
-    
-    export_v2.export_svgs(
-        panel_group=pg,
-        output_dirpath=output_dirpath,
-        include_layout_boxes=False)
+        output_dirpath=export_v2.get_output_dirpath(model_name=model_name))
+
+    try:
+        start_time = time.perf_counter()
+        with (build_cache_v2.build_cache() if use_build_cache
+                else contextlib.nullcontext()):
+            pg = MODEL_BUILDERS[model_name]()
+        if clean_topology:
+            model_export.cleanup_stats = cleanup_v2.clean_panel_group(
+                panel_group=pg)
+        model_export.panel_count = len(panels_v2.get_all_panels(panel_group=pg))
+        model_export.build_seconds = time.perf_counter() - start_time
+
+        start_time = time.perf_counter()
+        photo_match_paths = export_photo_match_files(
+            model_name=model_name,
+            panel_group=pg,
+            output_dirpath=model_export.output_dirpath)
+
+        if include_svgs:
+            page_paths = export_v2.export_svgs(
+                panel_group=pg,
+                output_dirpath=model_export.output_dirpath,
+                include_layout_boxes=False,
+                outline_jobs=outline_jobs)
+        else:
+            # Keep the pages of the previous export
+            page_paths = export_v2.find_svg_paths(
+                output_dirpath=model_export.output_dirpath)
+        model_export.page_count = len(page_paths)
+
+        manifest = export_v2.update_manifest(
+            output_dirpath=model_export.output_dirpath,
+            paths=[
+                os.path.join(
+                    model_export.output_dirpath, os.path.basename(path))
+                for path in photo_match_paths
+            ] + page_paths)
+        model_export.changed_file_count = sum([
+            len(manifest[key]) for key in ["added", "changed", "removed"]
+        ])
+        model_export.export_seconds = time.perf_counter() - start_time
+    except Exception:
+        model_export.error = traceback.format_exc()
+
+    return model_export
+
+
+def export_models(
+    model_names: list[str],
+    jobs: int = 1,
+    include_svgs: bool = True,
+    use_build_cache: bool = False,
+    clean_topology: bool = False,
+    outline_jobs: int = 1
+) -> list[ModelExport]:
+    """
+    Exports the models, in up to jobs processes at once, each of which
+    extracts outlines in up to outline_jobs processes. Returns a
+    ModelExport per model, in the order of model_names.
+    """
+    for model_name in model_names:
+        if model_name not in MODEL_BUILDERS:
+            raise Exception(f"Unknown model: {model_name}")
+
+    if jobs <= 1:
+        return [
+            export_model(
+                model_name=model_name,
+                include_svgs=include_svgs,
+                use_build_cache=use_build_cache,
+                clean_topology=clean_topology,
+                outline_jobs=outline_jobs)
+            for model_name in model_names
+        ]
+
+    with ProcessPoolExecutor(max_workers=jobs) as executor:
+        futures = [
+            executor.submit(
+                export_model,
+                model_name=model_name,
+                include_svgs=include_svgs,
+                use_build_cache=use_build_cache,
+                clean_topology=clean_topology,
+                outline_jobs=outline_jobs)
+            for model_name in model_names
+        ]
+        return [future.result() for future in futures]
+
+
+def format_model_exports(model_exports: list[ModelExport]) -> str:
+    rows = [["Model", "Panels", "Pages", "Changed", "Build", "Export", "Result"]]
+    for me in model_exports:
+        rows.append([
+            me.model_name,
+            str(me.panel_count),
+            str(me.page_count),
+            str(me.changed_file_count),
+            f"{me.build_seconds:.1f}s",
+            f"{me.export_seconds:.1f}s",
+            "OK" if me.error is None else "FAILED"
+        ])
 
-    print("OK")
+    widths = [max([len(row[i]) for row in rows]) for i in range(len(rows[0]))]
+    lines = [
+        "  ".join([
+            value.ljust(width) if i == 0 else value.rjust(width)
+            for i, (value, width) in enumerate(zip(row, widths))
+        ]).rstrip()
+        for row in rows
+    ]
+    for me in model_exports:
+        if me.cleanup_stats is not None:
+            lines.append(
+                f"{me.model_name} cleanup: "
+                f"{cleanup_v2.format_cleanup_stats(stats=me.cleanup_stats)}")
+    return "\n".join(lines)
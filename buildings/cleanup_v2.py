@@ -0,0 +1,120 @@
+from dataclasses import dataclass
+from cadquery import Shape, Workplane
+from OCP.ShapeUpgrade import ShapeUpgrade_UnifySameDomain
+from buildings import panels_v2
+from buildings.panels_v2 import PanelGroup
+
+
+# Faces (and edges) closer than these to being on the same plane (or line)
+# are merged
+DEFAULT_LINEAR_TOLERANCE = 1e-4
+DEFAULT_ANGULAR_TOLERANCE = 1e-4  # radians
+
+
+@dataclass
+class CleanupStats:
+    panel_count: int = 0
+    face_count_before: int = 0
+    face_count_after: int = 0
+    edge_count_before: int = 0
+    edge_count_after: int = 0
+
+
+def clean_panel_group(
+    panel_group: PanelGroup,
+    linear_tolerance: float = DEFAULT_LINEAR_TOLERANCE,
+    angular_tolerance: float = DEFAULT_ANGULAR_TOLERANCE
+) -> CleanupStats:
+    """
+    Cleans the topology of the solid of every panel of the tree, after it
+    has been built and before it is meshed (get_assembly) or outlined for
+    the nets (get_vertex_loops). Solids joined without cleaning (cadquery's
+    + and - clean their result, but union(clean=False) and glued booleans
+    don't) have faces split where they were joined and collinear edge
+    fragments, which add triangles to the mesh and vertices to the nets.
+    Coplanar faces and collinear edges are merged, so the panels' shapes
+    are unchanged. Panels that share a solid share the cleaned solid, and a
+    mirrored solid (see panels_v2.mirror_workplane) is mirrored from the
+    cleaned source. Profile panels, which are extruded from clean outlines,
+    are left as they are.
+    """
+    stats = CleanupStats()
+    # By the id of the solid: the solid (so that its id isn't reused while
+    # the cleanup runs), its cleaned copy and their face and edge counts
+    cleaned_by_id: dict[int, tuple[Workplane, Workplane, tuple[int, ...]]] = {}
+
+    def get_cleaned(workplane: Workplane) -> Workplane:
+        if id(workplane) not in cleaned_by_id:
+            mirror_source = panels_v2.get_mirror_source(workplane=workplane)
+            if mirror_source is not None:
+                source_workplane, plane = mirror_source
+                cleaned = panels_v2.mirror_workplane(
+                    workplane=get_cleaned(workplane=source_workplane),
+                    plane=plane)
+            else:
+                cleaned = clean_workplane(
+                    workplane=workplane,
+                    linear_tolerance=linear_tolerance,
+                    angular_tolerance=angular_tolerance)
+            cleaned_by_id[id(workplane)] = (
+                workplane,
+                cleaned,
+                _get_counts(workplane=workplane) + _get_counts(workplane=cleaned))
+        return cleaned_by_id[id(workplane)][1]
+
+    for panel in _get_tree_panels(panel_group=panel_group):
+        if panel.workplane is None:
+            continue
+        cleaned = get_cleaned(workplane=panel.workplane)
+        face_count, edge_count, cleaned_face_count, cleaned_edge_count = (
+            cleaned_by_id[id(panel.workplane)][2])
+
+        stats.panel_count += 1
+        stats.face_count_before += face_count
+        stats.face_count_after += cleaned_face_count
+        stats.edge_count_before += edge_count
+        stats.edge_count_after += cleaned_edge_count
+        panel.workplane = cleaned
+
+    return stats
+
+
+def clean_workplane(
+    workplane: Workplane,
+    linear_tolerance: float = DEFAULT_LINEAR_TOLERANCE,
+    angular_tolerance: float = DEFAULT_ANGULAR_TOLERANCE
+) -> Workplane:
+    shapes = []
+    for shape in workplane.vals():
+        if not isinstance(shape, Shape):
+            continue
+        upgrader = ShapeUpgrade_UnifySameDomain(shape.wrapped, True, True, False)
+        upgrader.SetLinearTolerance(linear_tolerance)
+        upgrader.SetAngularTolerance(angular_tolerance)
+        upgrader.Build()
+        shapes.append(Shape.cast(upgrader.Shape()))
+    return Workplane("XY").newObject(shapes)
+
+
+def format_cleanup_stats(stats: CleanupStats) -> str:
+    return (
+        f"{stats.panel_count} panels: "
+        f"faces {stats.face_count_before} -> {stats.face_count_after}, "
+        f"edges {stats.edge_count_before} -> {stats.edge_count_after}")
+
+
+def _get_tree_panels(panel_group: PanelGroup) -> list[panels_v2.Panel]:
+    # The panels themselves, unlike panels_v2.get_all_panels, which copies
+    # them
+    panels = list(panel_group.panels)
+    for child_pg in panel_group.children:
+        panels.extend(_get_tree_panels(panel_group=child_pg))
+    return panels
+
+
+def _get_counts(workplane: Workplane) -> tuple[int, int]:
+    shapes = [shape for shape in workplane.vals() if isinstance(shape, Shape)]
+    return (
+        sum([len(shape.Faces()) for shape in shapes]),
+        sum([len(shape.Edges()) for shape in shapes])
+    )
@@ -0,0 +1,313 @@
+import contextlib
+import importlib
+import io
+import json
+import os
+import runpy
+import socket
+import socketserver
+import sys
+import time
+import traceback
+import unittest
+from dataclasses import asdict
+from typing import Any, Callable, Optional, TextIO
+
+# Only standard library modules are imported at the top of this module, so
+# that the client does not pay for importing cadquery. The daemon imports
+# the buildings modules when it handles a request.
+
+
+DEFAULT_SOCKET_PATH = "./output/.build-daemon.sock"
+
+# Modules of these packages are imported again after their source files
+# change. Everything else, notably cadquery and OCP, stays imported.
+RELOADED_PACKAGES = ["buildings", "test_buildings"]
+
+# Objects passed to show_object() by a previewed script are exported here
+PREVIEW_DIRPATH = "./output/preview"
+
+ROOT_DIRPATH = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+
+class DaemonNotRunningError(Exception):
+    pass
+
+
+def serve(socket_path: str = DEFAULT_SOCKET_PATH) -> None:
+    """
+    Runs the build daemon until it is sent a "stop" request. Requests are
+    handled one at a time, in the working directory of the client, as OCC
+    is not thread safe.
+    """
+    # Requests change the working directory, so a relative path would no
+    # longer point to the socket when it is removed
+    socket_path = os.path.abspath(socket_path)
+    if os.path.exists(socket_path):
+        try:
+            request(command="status", socket_path=socket_path, output=io.StringIO())
+            raise Exception(f"Build daemon is already running at {socket_path}")
+        except DaemonNotRunningError:
+            # Left behind by a daemon that did not stop cleanly
+            os.remove(socket_path)
+
+    os.makedirs(os.path.dirname(socket_path), exist_ok=True)
+
+    # Pay for importing the kernel once, up front
+    start_time = time.perf_counter()
+    importlib.import_module("cadquery")
+    importlib.import_module("buildings.buildings_v2")
+    print(f"Imported cadquery in {time.perf_counter() - start_time:.1f}s")
+
+    state = _DaemonState(
+        start_time=time.time(),
+        source_mtimes=_get_source_mtimes())
+
+    class RequestHandler(socketserver.StreamRequestHandler):
+
+        def handle(self):
+            message = json.loads(self.rfile.readline())
+            writer = _MessageWriter(wfile=self.wfile)
+            try:
+                result = _handle_request(
+                    state=state,
+                    command=message["command"],
+                    args=message.get("args", {}),
+                    cwd=message.get("cwd"),
+                    output=writer)
+                writer.send(message={"result": result})
+            except (Exception, SystemExit):
+                # SystemExit, e.g. from a script that calls sys.exit(), must
+                # not stop the daemon
+                writer.send(message={"error": traceback.format_exc()})
+
+            if message["command"] == "stop":
+                state.is_stopping = True
+
+    with socketserver.UnixStreamServer(socket_path, RequestHandler) as server:
+        print(f"Build daemon listening at {socket_path}")
+        try:
+            while not state.is_stopping:
+                server.handle_request()
+        except KeyboardInterrupt:
+            pass
+        finally:
+            os.remove(socket_path)
+
+    print("Build daemon stopped")
+
+
+def request(
+    command: str,
+    args: Optional[dict] = None,
+    socket_path: str = DEFAULT_SOCKET_PATH,
+    output: TextIO = sys.stdout
+) -> Any:
+    """
+    Sends a request to the build daemon, writing the output of the request
+    (e.g. print() calls and test results) to output as it arrives. Returns
+    the result of the request.
+    """
+    try:
+        sock = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+        sock.connect(socket_path)
+    except (FileNotFoundError, ConnectionRefusedError):
+        sock.close()
+        raise DaemonNotRunningError(
+            f"Build daemon is not running at {socket_path}")
+
+    with sock, sock.makefile("rwb") as f:
+        f.write(json.dumps({
+            "command": command,
+            "args": args or {},
+            "cwd": os.getcwd()
+        }).encode("utf-8") + b"\n")
+        f.flush()
+
+        for line in f:
+            message = json.loads(line)
+            if "output" in message:
+                output.write(message["output"])
+                output.flush()
+            elif "error" in message:
+                raise Exception(f"Build daemon request failed:\n{message['error']}")
+            else:
+                return message["result"]
+
+    raise Exception("Build daemon closed the connection")
+
+
+class _DaemonState:
+
+    def __init__(self, start_time: float, source_mtimes: dict[str, int]):
+        self.start_time = start_time
+        self.source_mtimes = source_mtimes
+        self.request_count = 0
+        self.reload_count = 0
+        self.is_stopping = False
+
+
+class _MessageWriter(io.TextIOBase):
+    """
+    Sends text written to it (e.g. by print()) to the client as "output"
+    messages. Output is dropped once the client has gone, so that the
+    request still completes.
+    """
+
+    def __init__(self, wfile):
+        self._wfile = wfile
+        self._is_closed = False
+
+    def writable(self) -> bool:
+        return True
+
+    def write(self, text: str) -> int:
+        if len(text) > 0:
+            self.send(message={"output": text})
+        return len(text)
+
+    def send(self, message: dict) -> None:
+        if self._is_closed:
+            return
+        try:
+            self._wfile.write(json.dumps(message).encode("utf-8") + b"\n")
+            self._wfile.flush()
+        except (BrokenPipeError, ConnectionResetError):
+            self._is_closed = True
+
+
+def _handle_request(
+    state: _DaemonState,
+    command: str,
+    args: dict,
+    cwd: Optional[str],
+    output: TextIO
+) -> Any:
+    state.request_count += 1
+    if cwd is not None:
+        os.chdir(cwd)
+
+    source_mtimes = _get_source_mtimes()
+    if source_mtimes != state.source_mtimes:
+        _unload_modules()
+        state.source_mtimes = source_mtimes
+        state.reload_count += 1
+
+    handlers: dict[str, Callable[..., Any]] = {
+        "status": lambda: _get_status(state=state),
+        "stop": lambda: None,
+        "build": _build,
+        "test": _test,
+        "run": _run
+    }
+    if command not in handlers:
+        raise Exception(f"Unknown command: {command}")
+
+    with contextlib.redirect_stdout(output), contextlib.redirect_stderr(output):
+        return handlers[command](**args)
+
+
+def _get_status(state: _DaemonState) -> dict:
+    return {
+        "pid": os.getpid(),
+        "uptimeSeconds": time.time() - state.start_time,
+        "requestCount": state.request_count,
+        "reloadCount": state.reload_count
+    }
+
+
+def _build(
+    model_names: list[str],
+    include_svgs: bool = True,
+    use_build_cache: bool = False,
+    clean_topology: bool = False
+) -> list[dict]:
+    buildings_v2 = importlib.import_module("buildings.buildings_v2")
+    model_exports = buildings_v2.export_models(
+        model_names=model_names,
+        include_svgs=include_svgs,
+        use_build_cache=use_build_cache,
+        clean_topology=clean_topology)
+
+    for me in model_exports:
+        if me.error is not None:
+            print(f"{me.model_name} failed:\n{me.error}")
+    print(buildings_v2.format_model_exports(model_exports=model_exports))
+
+    return [asdict(me) for me in model_exports]
+
+
+def _test(names: list[str], verbosity: int = 2) -> dict:
+    loader = unittest.TestLoader()
+    if len(names) > 0:
+        suite = loader.loadTestsFromNames(names)
+    else:
+        suite = loader.discover(start_dir=".")
+
+    result = unittest.TextTestRunner(
+        stream=sys.stderr,
+        verbosity=verbosity).run(suite)
+
+    return {
+        "testsRun": result.testsRun,
+        "failures": len(result.failures),
+        "errors": len(result.errors),
+        "wasSuccessful": result.wasSuccessful()
+    }
+
+
+def _run(path: str) -> list[str]:
+    """
+    Runs a script, e.g. aaa.py, as __main__. Objects that the script passes
+    to show_object(), as it would in CQ-editor, are exported as glTF files
+    to the preview directory. Returns the paths of those files.
+    """
+    shown_objects = []
+
+    def show_object(obj, name: Optional[str] = None, options: Optional[dict] = None):
+        shown_objects.append((obj, name))
+
+    runpy.run_path(
+        path,
+        init_globals={"show_object": show_object},
+        run_name="__main__")
+
+    cadquery = importlib.import_module("cadquery")
+    os.makedirs(PREVIEW_DIRPATH, exist_ok=True)
+    script_name = os.path.splitext(os.path.basename(path))[0]
+    preview_paths = []
+    for index, (obj, name) in enumerate(shown_objects):
+        if not isinstance(obj, cadquery.Assembly):
+            obj = cadquery.Assembly(obj)
+        preview_path = os.path.join(
+            PREVIEW_DIRPATH,
+            f"{script_name}-{name or index}.gltf")
+        obj.save(path=preview_path, exportType="GLTF", mode="fused")
+        print(f"Exported {preview_path}")
+        preview_paths.append(preview_path)
+
+    return preview_paths
+
+
+def _unload_modules() -> None:
+    """
+    Removes the modules of the reloaded packages, so that they (and any
+    caches they hold) are imported again from the changed source files.
+    """
+    for module_name in list(sys.modules.keys()):
+        if module_name.split(".")[0] in RELOADED_PACKAGES:
+            del sys.modules[module_name]
+    importlib.invalidate_caches()
+
+
+def _get_source_mtimes() -> dict[str, int]:
+    mtimes = {}
+    for package_name in RELOADED_PACKAGES:
+        package_dirpath = os.path.join(ROOT_DIRPATH, package_name)
+        for dirpath, dirnames, filenames in os.walk(package_dirpath):
+            dirnames[:] = [name for name in dirnames if name != "__pycache__"]
+            for filename in filenames:
+                if filename.endswith(".py"):
+                    path = os.path.join(dirpath, filename)
+                    mtimes[path] = os.stat(path).st_mtime_ns
+    return mtimes
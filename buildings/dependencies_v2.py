@@ -0,0 +1,134 @@
+import ast
+import inspect
+import os
+from typing import Callable, Optional
+
+
+PACKAGE_NAME = "buildings"
+
+
+def get_package_dirpath() -> str:
+    return os.path.dirname(os.path.abspath(__file__))
+
+
+def get_module_path(module_name: str) -> Optional[str]:
+    """
+    Gets the path of the source file of a module of the package, or None if
+    it is not a module of the package (e.g. a name imported from a module).
+    """
+    parts = module_name.split(".")
+    if parts[0] != PACKAGE_NAME:
+        return None
+
+    base_path = os.path.join(os.path.dirname(get_package_dirpath()), *parts)
+    for path in [base_path + ".py", os.path.join(base_path, "__init__.py")]:
+        if os.path.isfile(path):
+            return path
+    return None
+
+
+def get_imports(path: str) -> dict[str, str]:
+    """
+    Gets the modules of the package imported by the source file, by the
+    name they are bound to in the file. Names imported from a module (e.g.
+    PanelGroup in "from buildings.panels_v2 import PanelGroup") are bound
+    to the module they are imported from.
+    """
+    with open(path, "r") as f:
+        tree = ast.parse(f.read(), filename=path)
+
+    imports = {}
+    for node in ast.walk(tree):
+        if isinstance(node, ast.Import):
+            for alias in node.names:
+                if get_module_path(module_name=alias.name) is not None:
+                    bound_name = alias.asname or alias.name.split(".")[0]
+                    imports[bound_name] = alias.name
+
+        elif isinstance(node, ast.ImportFrom) and node.module is not None:
+            if get_module_path(module_name=node.module) is None:
+                continue
+            for alias in node.names:
+                submodule_name = f"{node.module}.{alias.name}"
+                if get_module_path(module_name=submodule_name) is not None:
+                    imports[alias.asname or alias.name] = submodule_name
+                else:
+                    imports[alias.asname or alias.name] = node.module
+
+    return imports
+
+
+def get_import_closure(module_names: list[str]) -> set[str]:
+    """
+    Gets the source file paths of the modules and of all the modules of the
+    package that they import, directly or indirectly. The __init__.py of
+    each parent package is included, as it is run when a submodule is
+    imported.
+    """
+    paths = set()
+    pending_module_names = list(module_names)
+    while len(pending_module_names) > 0:
+        module_name = pending_module_names.pop()
+        parts = module_name.split(".")
+        for i in range(1, len(parts) + 1):
+            path = get_module_path(module_name=".".join(parts[:i]))
+            if path is None or path in paths:
+                continue
+            paths.add(path)
+            pending_module_names.extend(get_imports(path=path).values())
+
+    return paths
+
+
+def get_function_dependencies(fn: Callable) -> set[str]:
+    """
+    Gets the source file paths that a function depends on: its own module,
+    and the import closures of the modules whose names it uses, including
+    through the other functions of its module that it calls. The names used
+    by the other statements of its module (e.g. constants such as
+    WALL_MEDIA = media_v2.CARD_056mm) are included, as they are run when
+    the module is imported.
+    """
+    path = inspect.getsourcefile(fn)
+    with open(path, "r") as f:
+        tree = ast.parse(f.read(), filename=path)
+    functions_by_name = {
+        node.name: node
+        for node in tree.body
+        if isinstance(node, ast.FunctionDef)
+    }
+    imports = get_imports(path=path)
+
+    module_names = set()
+    visited_names = set([fn.__name__])
+    pending_nodes = [
+        node
+        for node in tree.body
+        if not isinstance(node, (ast.FunctionDef, ast.Import, ast.ImportFrom))
+    ]
+    if fn.__name__ in functions_by_name:
+        pending_nodes.append(functions_by_name[fn.__name__])
+    while len(pending_nodes) > 0:
+        for node in ast.walk(pending_nodes.pop()):
+            if not isinstance(node, ast.Name):
+                continue
+            if node.id in imports:
+                module_names.add(imports[node.id])
+            if node.id in functions_by_name and node.id not in visited_names:
+                visited_names.add(node.id)
+                pending_nodes.append(functions_by_name[node.id])
+
+    return {os.path.abspath(path)} | get_import_closure(
+        module_names=sorted(module_names))
+
+
+def get_affected_names(
+    dependencies_by_name: dict[str, set[str]],
+    changed_paths: list[str]
+) -> list[str]:
+    changed_paths = set([os.path.abspath(path) for path in changed_paths])
+    return [
+        name
+        for name, dependencies in dependencies_by_name.items()
+        if len(dependencies & changed_paths) > 0
+    ]
@@ -0,0 +1,311 @@
+import json
+import math
+from dataclasses import asdict, dataclass
+from typing import Optional
+from cadquery import Workplane, exporters
+from buildings import panels_v2
+from buildings import transforms_v2
+from buildings.panels_v2 import PanelGroup
+
+
+Point3 = tuple[float, float, float]
+Edge3 = tuple[Point3, Point3]
+
+# Edges shorter than this are dropped, which removes the edges across the
+# thickness of the card
+MIN_EDGE_LENGTH = 3.0
+
+# Parallel edges closer than this are merged, e.g. the edges of the front
+# and back faces of a panel, or of panels laminated together
+MERGE_DISTANCE = 2.0
+
+# Curved edges are split into straight edges of about this length
+CURVE_SEGMENT_LENGTH = 5.0
+
+# Edges are parallel if the sine of the angle between them is less than this
+PARALLEL_TOLERANCE = 0.02
+
+# Output coordinates are rounded to this many decimal places (0.01 mm)
+COORDINATE_DECIMALS = 2
+
+
+@dataclass
+class ShapeEdges:
+    id: int
+    name: str
+    edges: list[list[float]]  # [x0, y0, z0, x1, y1, z1] per edge
+
+
+def get_shape_edges(panel_group: PanelGroup) -> list[ShapeEdges]:
+    """
+    Gets the simplified outline edges of each top level child of the
+    PanelGroup (e.g. each building of a station), in the same coordinates
+    as the exported mesh. The panels of the PanelGroup itself, if any, are
+    an extra shape named after it. Shape IDs are the indexes of the shapes,
+    and edge IDs are the indexes of the edges within a shape.
+    """
+    workplanes_by_shape_name: dict[str, list[Workplane]] = {}
+    if len(panel_group.panels) > 0:
+        workplanes_by_shape_name[panel_group.name] = [
+            transforms_v2.apply_transform(
+                workplane=panels_v2.get_panel_workplane(panel=panel),
+                transform=panel.transform)
+            for panel in panel_group.panels
+        ]
+
+    for child_pg in panel_group.children:
+        workplanes_by_shape_name[child_pg.name] = [
+            transforms_v2.apply_transform(
+                workplane=workplane,
+                transform=child_pg.transform)
+            for workplane in panels_v2.get_all_transformed_workplanes(
+                panel_group=child_pg)
+        ]
+
+    shape_edges = []
+    for index, (name, workplanes) in enumerate(workplanes_by_shape_name.items()):
+        edges = []
+        for workplane in workplanes:
+            edges.extend(get_workplane_edges(workplane=workplane))
+
+        shape_edges.append(ShapeEdges(
+            id=index,
+            name=name,
+            edges=[
+                [round(value, COORDINATE_DECIMALS) for value in edge[0] + edge[1]]
+                for edge in simplify_edges(edges=edges)
+            ]
+        ))
+
+    return shape_edges
+
+
+def get_workplane_edges(workplane: Workplane) -> list[Edge3]:
+    """
+    Gets the edges of the shapes of the workplane as straight edges.
+    """
+    edges = []
+    for edge in exporters.utils.toCompound(workplane).Edges():
+        if edge.geomType() == "LINE":
+            points = [edge.startPoint(), edge.endPoint()]
+        else:
+            segment_count = max(2, math.ceil(edge.Length() / CURVE_SEGMENT_LENGTH))
+            points = edge.positions([
+                i / segment_count
+                for i in range(segment_count + 1)
+            ])
+
+        for p0, p1 in zip(points[:-1], points[1:]):
+            edges.append(((p0.x, p0.y, p0.z), (p1.x, p1.y, p1.z)))
+
+    return edges
+
+
+def simplify_edges(
+    edges: list[Edge3],
+    min_length: float = MIN_EDGE_LENGTH,
+    merge_distance: float = MERGE_DISTANCE
+) -> list[Edge3]:
+    """
+    Simplifies the edges by joining parallel edges that meet end to end,
+    dropping edges shorter than min_length, and dropping edges that lie
+    along a longer parallel edge within merge_distance. The edges are
+    returned in a fixed order, so that edge IDs only change where the
+    geometry has changed.
+    """
+    edges = _join_edges(edges=edges, merge_distance=merge_distance)
+    edges = [edge for edge in edges if _length(edge=edge) >= min_length]
+
+    # Keep the longest edges first, so that shorter duplicates along them
+    # are the ones dropped
+    edges = sorted(edges, key=lambda edge: (-_length(edge=edge), edge))
+
+    grid = _EdgeGrid(cell_size=max(merge_distance, min_length) * 4)
+    kept_edges = []
+    for edge in edges:
+        is_duplicate = any([
+            _is_along(edge=edge, other=other, merge_distance=merge_distance)
+            for other in grid.get_nearby_edges(point=edge[0])
+        ])
+        if not is_duplicate:
+            kept_edges.append(edge)
+            grid.add(edge=edge)
+
+    return sorted([_get_canonical_edge(edge=edge) for edge in kept_edges])
+
+
+def shape_edges_to_json(shape_edges: list[ShapeEdges]) -> str:
+    return json.dumps({
+        # As the mesh: millimeters with Z up
+        "units": "mm",
+        "upAxis": "Z",
+        "shapes": [asdict(se) for se in shape_edges]
+    }, separators=(",", ":"))
+
+
+class _EdgeGrid:
+    """
+    Finds the edges that pass near a point, by adding each edge to the grid
+    cells along it.
+    """
+
+    def __init__(self, cell_size: float):
+        self.cell_size = cell_size
+        self._edges_by_cell: dict[tuple[int, int, int], list[Edge3]] = {}
+
+    def add(self, edge: Edge3) -> None:
+        step_count = max(1, math.ceil(2 * _length(edge=edge) / self.cell_size))
+        cells = set()
+        for i in range(step_count + 1):
+            t = i / step_count
+            cells.add(self._get_cell(point=tuple([
+                edge[0][k] + t * (edge[1][k] - edge[0][k])
+                for k in range(3)
+            ])))
+
+        for cell in cells:
+            self._edges_by_cell.setdefault(cell, []).append(edge)
+
+    def get_nearby_edges(self, point: Point3) -> list[Edge3]:
+        cx, cy, cz = self._get_cell(point=point)
+        nearby_edges = []
+        for dx in [-1, 0, 1]:
+            for dy in [-1, 0, 1]:
+                for dz in [-1, 0, 1]:
+                    nearby_edges.extend(
+                        self._edges_by_cell.get((cx + dx, cy + dy, cz + dz), []))
+        return nearby_edges
+
+    def _get_cell(self, point: Point3) -> tuple[int, int, int]:
+        return tuple([math.floor(value / self.cell_size) for value in point])
+
+
+def _join_edges(edges: list[Edge3], merge_distance: float) -> list[Edge3]:
+    """
+    Joins parallel edges that meet end to end into single edges, e.g. the
+    top edge of a wall that is made of several panels.
+    """
+    edges_by_end: dict[tuple[int, int, int], list[int]] = {}
+    joined_edges: list[Optional[Edge3]] = [
+        edge for edge in edges if _length(edge=edge) > 0
+    ]
+
+    def get_key(point: Point3) -> tuple[int, int, int]:
+        return tuple([math.floor(value / merge_distance) for value in point])
+
+    def get_nearby_indexes(point: Point3) -> list[int]:
+        kx, ky, kz = get_key(point=point)
+        return [
+            index
+            for dx in [-1, 0, 1]
+            for dy in [-1, 0, 1]
+            for dz in [-1, 0, 1]
+            for index in edges_by_end.get((kx + dx, ky + dy, kz + dz), [])
+        ]
+
+    for index, edge in enumerate(joined_edges):
+        for point in edge:
+            edges_by_end.setdefault(get_key(point=point), []).append(index)
+
+    for index in range(len(joined_edges)):
+        is_joined = True
+        while is_joined and joined_edges[index] is not None:
+            is_joined = False
+            edge = joined_edges[index]
+            for end_index in [0, 1]:
+                point = edge[end_index]
+                for other_index in get_nearby_indexes(point=point):
+                    other = joined_edges[other_index]
+                    if other_index == index or other is None:
+                        continue
+                    joined_edge = _get_joined_edge(
+                        edge=edge,
+                        other=other,
+                        merge_distance=merge_distance)
+                    if joined_edge is None:
+                        continue
+
+                    joined_edges[index] = joined_edge
+                    joined_edges[other_index] = None
+                    for end_point in joined_edge:
+                        edges_by_end.setdefault(
+                            get_key(point=end_point), []).append(index)
+                    is_joined = True
+                    break
+                if is_joined:
+                    break
+
+    return [edge for edge in joined_edges if edge is not None]
+
+
+def _get_joined_edge(
+    edge: Edge3,
+    other: Edge3,
+    merge_distance: float
+) -> Optional[Edge3]:
+    # Order the edges so that the end of the edge meets the start of other
+    for e0 in [edge, _reverse(edge=edge)]:
+        for e1 in [other, _reverse(edge=other)]:
+            if _distance(e0[1], e1[0]) <= merge_distance * 0.5:
+                if _is_parallel(edge=e0, other=e1) and _dot(e0, e1) > 0:
+                    return (e0[0], e1[1])
+    return None
+
+
+def _is_along(edge: Edge3, other: Edge3, merge_distance: float) -> bool:
+    """
+    Gets whether the edge lies along the other edge, i.e. is parallel to it
+    and both of its ends are within merge_distance of it.
+    """
+    return (
+        _is_parallel(edge=edge, other=other) and
+        _distance_to_edge(point=edge[0], edge=other) <= merge_distance and
+        _distance_to_edge(point=edge[1], edge=other) <= merge_distance
+    )
+
+
+def _is_parallel(edge: Edge3, other: Edge3) -> bool:
+    d0 = _direction(edge=edge)
+    d1 = _direction(edge=other)
+    cross = (
+        d0[1] * d1[2] - d0[2] * d1[1],
+        d0[2] * d1[0] - d0[0] * d1[2],
+        d0[0] * d1[1] - d0[1] * d1[0]
+    )
+    return math.sqrt(sum([c * c for c in cross])) < PARALLEL_TOLERANCE
+
+
+def _distance_to_edge(point: Point3, edge: Edge3) -> float:
+    d = [edge[1][k] - edge[0][k] for k in range(3)]
+    length_squared = sum([v * v for v in d])
+    t = sum([(point[k] - edge[0][k]) * d[k] for k in range(3)]) / length_squared
+    t = min(max(t, 0), 1)
+    closest = tuple([edge[0][k] + t * d[k] for k in range(3)])
+    return _distance(point, closest)
+
+
+def _direction(edge: Edge3) -> Point3:
+    length = _length(edge=edge)
+    return tuple([(edge[1][k] - edge[0][k]) / length for k in range(3)])
+
+
+def _dot(edge: Edge3, other: Edge3) -> float:
+    d0 = _direction(edge=edge)
+    d1 = _direction(edge=other)
+    return sum([d0[k] * d1[k] for k in range(3)])
+
+
+def _get_canonical_edge(edge: Edge3) -> Edge3:
+    return edge if edge[0] <= edge[1] else _reverse(edge=edge)
+
+
+def _reverse(edge: Edge3) -> Edge3:
+    return (edge[1], edge[0])
+
+
+def _length(edge: Edge3) -> float:
+    return _distance(edge[0], edge[1])
+
+
+def _distance(p0: Point3, p1: Point3) -> float:
+    return math.sqrt(sum([(p1[k] - p0[k]) ** 2 for k in range(3)]))
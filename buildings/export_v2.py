@@ -1,37 +1,190 @@
+import glob
+import hashlib
+import json
 import os
 import shutil
 import tempfile
+from typing import Callable, Optional
 from cadquery import Assembly
+from buildings import edges_v2
+from buildings import gltf_v2
 from buildings import nets_v2
 from buildings import panels_v2
+from buildings import transforms_v2
+from buildings.media_v2 import SingleLayerMedia
 from buildings.nets_v2 import LayoutPanel
 from buildings.panels_v2 import PanelGroup
 from buildings.vertices_v2 import Vertex
 
 
+MANIFEST_FILENAME = "manifest.json"
+
+
 def get_output_dirpath(model_name: str) -> str:
     return f"./output/{model_name}"
 
 
-def delete_output_dir(output_dirpath: str) -> None:
-    shutil.rmtree(output_dirpath, ignore_errors=True)
+def get_mesh_filenames(model_name: str) -> list[str]:
+    """
+    The files of the GLTF mesh of a model: the GLTF and its binary buffer,
+    which the GLTF refers to by name
+    """
+    return [f"{model_name}.gltf", f"{model_name}.bin"]
 
 
 def export_mesh(
     output_dirpath: str,
     model_name: str,
     panel_group: PanelGroup
-) -> None:
+) -> list[str]:
+    """
+    Exports the GLTF mesh, only replacing the existing files if the mesh has
+    changed. Returns the paths of the mesh files (see get_mesh_filenames).
+    """
     assembly = panels_v2.get_assembly(panel_group=panel_group)
     
     os.makedirs(output_dirpath, exist_ok=True)
-    mesh_path = os.path.join(output_dirpath, f"{model_name}.gltf")
+    mesh_filenames = get_mesh_filenames(model_name=model_name)
+
+    # Export GLTF mesh. It is exported under its final name, as the GLTF
+    # refers to its buffer by the name of the file, into a temporary
+    # directory next to the files it replaces, so that os.replace() is
+    # atomic. The buffer is replaced first, so the GLTF never refers to a
+    # buffer that isn't there yet.
+    with tempfile.TemporaryDirectory(dir=output_dirpath) as temp_dirpath:
+        assembly.save(
+            path=os.path.join(temp_dirpath, mesh_filenames[0]),
+            exportType="GLTF",
+            mode="fused")
+        for filename in reversed(mesh_filenames):
+            replace_if_changed(
+                src_path=os.path.join(temp_dirpath, filename),
+                dst_path=os.path.join(output_dirpath, filename))
+
+    return [
+        os.path.join(output_dirpath, filename) for filename in mesh_filenames
+    ]
+
+
+def export_edges(
+    output_dirpath: str,
+    model_name: str,
+    panel_group: PanelGroup
+) -> str:
+    """
+    Exports the simplified outline edges of each top level child of the
+    PanelGroup next to the mesh, for photo matching (see edges_v2). Returns
+    the path of the edges file.
+    """
+    shape_edges = edges_v2.get_shape_edges(panel_group=panel_group)
+
+    os.makedirs(output_dirpath, exist_ok=True)
+    edges_path = os.path.join(output_dirpath, f"{model_name}.edges.json")
+    write_file_if_changed(
+        path=edges_path,
+        data_str=edges_v2.shape_edges_to_json(shape_edges=shape_edges))
+
+    return edges_path
+
 
-    # Export GLTF mesh
-    assembly.save(
-        path=mesh_path,
-        exportType="GLTF",
-        mode="fused")
+def copy_file_atomic(src_path: str, dst_dirpath: str) -> str:
+    """
+    Copies a file into a directory via a temporary file that is renamed, so
+    that a reader of the directory (e.g. the photo match server) never sees
+    a partly written file. An existing file with the same contents is left
+    alone. Returns the path of the copy.
+    """
+    dst_path = os.path.join(dst_dirpath, os.path.basename(src_path))
+    temp_path = _get_temp_path(dirpath=dst_dirpath, suffix=".tmp")
+    try:
+        with open(temp_path, "wb") as dst_f, open(src_path, "rb") as src_f:
+            shutil.copyfileobj(src_f, dst_f)
+    except BaseException:
+        os.remove(temp_path)
+        raise
+    replace_if_changed(src_path=temp_path, dst_path=dst_path)
+
+    return dst_path
+
+
+def write_file_if_changed(path: str, data_str: str) -> bool:
+    """
+    Writes the file, unless it already has these contents. Returns whether
+    the file was written.
+    """
+    temp_path = _get_temp_path(dirpath=os.path.dirname(path), suffix=".tmp")
+    try:
+        with open(temp_path, "w") as f:
+            f.write(data_str)
+    except BaseException:
+        os.remove(temp_path)
+        raise
+    return replace_if_changed(src_path=temp_path, dst_path=path)
+
+
+def replace_if_changed(src_path: str, dst_path: str) -> bool:
+    """
+    Renames the file at src_path to dst_path, unless dst_path already has
+    the same contents, in which case src_path is removed and dst_path (and
+    its modification time) is left alone. Returns whether dst_path was
+    replaced.
+    """
+    if os.path.isfile(dst_path) and _files_equal(path_a=src_path, path_b=dst_path):
+        os.remove(src_path)
+        return False
+
+    os.replace(src_path, dst_path)
+    return True
+
+
+def update_manifest(output_dirpath: str, paths: list[str]) -> dict:
+    """
+    Removes files in the output directory that are not in paths (e.g. the
+    pages of a previous export that now has fewer pages) and writes a
+    manifest of the content hash of each file, and of which files were
+    added, changed and removed since the previous manifest, so that tools
+    can tell which pages need cutting again. Returns the manifest.
+    """
+    manifest_path = os.path.join(output_dirpath, MANIFEST_FILENAME)
+    previous_hashes = {}
+    if os.path.isfile(manifest_path):
+        with open(manifest_path, "r") as f:
+            previous_hashes = json.load(f)["files"]
+
+    hashes = {
+        os.path.relpath(path, output_dirpath): _get_file_hash(path=path)
+        for path in paths
+    }
+
+    removed = []
+    for dirpath, dirnames, filenames in os.walk(output_dirpath, topdown=False):
+        for filename in filenames:
+            path = os.path.join(dirpath, filename)
+            relpath = os.path.relpath(path, output_dirpath)
+            if relpath not in hashes and relpath != MANIFEST_FILENAME:
+                os.remove(path)
+                if relpath in previous_hashes:
+                    removed.append(relpath)
+        if dirpath != output_dirpath and len(os.listdir(dirpath)) == 0:
+            os.rmdir(dirpath)
+
+    manifest = {
+        "files": dict(sorted(hashes.items())),
+        "added": sorted([
+            relpath for relpath in hashes if relpath not in previous_hashes
+        ]),
+        "changed": sorted([
+            relpath
+            for relpath, file_hash in hashes.items()
+            if relpath in previous_hashes and previous_hashes[relpath] != file_hash
+        ]),
+        "removed": sorted(removed)
+    }
+    write_file_if_changed(
+        path=manifest_path,
+        data_str=json.dumps(manifest, indent=2) + "\n")
+
+    return manifest
 
 
 def export_mesh_to_xml_string(panel_group: PanelGroup) -> str:
@@ -53,11 +206,16 @@ def export_mesh_to_xml_string(panel_group: PanelGroup) -> str:
     return mesh_xml_str
 
 
-def _polygon_svg_str(vertices: list[Vertex]) -> str:
+def _get_points_str(vertices: list[Vertex]) -> str:
+    # "100,100 150,25 150,75 200,0"
+    return " ".join([",".join([str(x), str(y)]) for x, y in vertices])
+
+
+def _polygon_svg_str(points_str: str) -> str:
     # <polygon points="100,100 150,25 150,75 200,0" fill="none" stroke="black" />
     polygon_svg_str = (
         '<polygon points="'
-        f'{" ".join([",".join([str(x), str(y)]) for x, y in vertices])}'
+        f'{points_str}'
         '" fill="none" stroke="black" />'
     )
     return polygon_svg_str
@@ -68,7 +226,8 @@ def _compute_svg_for_page(
     layout_panels: list[LayoutPanel],
     page_index: int,
     packer_rect_list: list[tuple],
-    include_layout_boxes: bool
+    include_layout_boxes: bool,
+    outline_store: Optional[nets_v2.OutlineStore] = None
 ) -> str:
     panel_svg_strings = []
     label_svg_strings = []
@@ -92,11 +251,17 @@ def _compute_svg_for_page(
         x = layout_panel.x
         y = layout_panel.y
         r = layout_panel.r
-        vertex_loops_dict = layout_panel.vertex_loops
-        for vs in vertex_loops_dict.values():
+        if outline_store is not None:
+            points_strs = outline_store.get_points_strs(name=layout_panel.name)
+        else:
+            points_strs = [
+                _get_points_str(vertices=vs)
+                for vs in layout_panel.vertex_loops.values()
+            ]
+        for points_str in points_strs:
             panel_svg_strings.append(
                 f'<g transform="translate({x},-{y}) rotate({r})">'
-                f'{_polygon_svg_str(vertices=vs)}'
+                f'{_polygon_svg_str(points_str=points_str)}'
                 '</g>'
             )
         
@@ -120,44 +285,200 @@ def _compute_svg_for_page(
 def export_svgs(
     panel_group: PanelGroup,
     output_dirpath: str,
-    include_layout_boxes=False
-) -> None:
+    include_layout_boxes=False,
+    outline_jobs: int = 1
+) -> list[str]:
+    """
+    Exports the cutting SVG pages of each media. Returns the paths of the
+    pages. The outlines of the panels are extracted in up to outline_jobs
+    processes at once.
+    """
     panels = panels_v2.get_all_panels(panel_group=panel_group)
     
     media_by_name = nets_v2.get_single_layer_media_by_name(panels=panels)
 
-    layout_panels_by_media = nets_v2.get_layout_panels_by_media(panels=panels)
+    outline_store = nets_v2.OutlineStore()
+    outline_store.add_panels(panels=panels, jobs=outline_jobs)
 
     with open("page.svg.template", "r") as f:
         template_str = f.read()
 
-    for media_name, _layout_panels in layout_panels_by_media.items():
-        # Compute the layout
-        layout_panels, packer_rect_list = nets_v2.compute_layout(
-            layout_panels=_layout_panels,
-            media=media_by_name[media_name])
+    page_paths = []
+    for media_name in outline_store.get_media_names():
+        page_paths += _export_media_svgs(
+            template_str=template_str,
+            media_name=media_name,
+            layout_panels=outline_store.get_layout_panels(media_name=media_name),
+            media=media_by_name[media_name],
+            output_dirpath=output_dirpath,
+            include_layout_boxes=include_layout_boxes,
+            outline_store=outline_store)
 
-        bin_indexes = [layout_panel.bin_index for layout_panel in layout_panels]
-        page_count = max(bin_indexes) + 1
+    return page_paths
 
-        for page_index in range(page_count):
-            page_number = page_index + 1
 
-            svg_str = _compute_svg_for_page(
-                template_str=template_str,
-                layout_panels=layout_panels,
-                page_index=page_index,
-                packer_rect_list=packer_rect_list,
-                include_layout_boxes=include_layout_boxes
-            )
+def find_svg_paths(output_dirpath: str) -> list[str]:
+    """
+    Finds the SVG pages previously exported to the output directory.
+    """
+    return sorted(glob.glob(
+        os.path.join(output_dirpath, "media-*", "page-*-cut.svg")))
+
+
+def export_streaming(
+    output_dirpath: str,
+    model_name: str,
+    name: str,
+    builders: list[Callable[[], PanelGroup]],
+    include_layout_boxes=False,
+    outline_jobs: int = 1
+) -> int:
+    """
+    Exports the mesh and SVGs of a model that is too large to hold in memory
+    at once. Each builder builds one top level child PanelGroup of the model.
+    The children are built one at a time: the meshes of their panels are
+    appended to the GLB file and their outlines are added to an
+    OutlineStore, after which the child and its OCC shapes are released.
+    Only the packing and the SVG pages use the outlines of all the panels.
+
+    The SVGs are the same as export_svgs of
+    PanelGroup(name=name, children=[builder() for builder in builders]) and
+    the mesh has the same nodes as export_mesh. Returns the number of
+    panels.
+    """
+    os.makedirs(output_dirpath, exist_ok=True)
+    mesh_path = os.path.join(output_dirpath, f"{model_name}.glb")
+
+    outline_store = nets_v2.OutlineStore()
+    media_by_name: dict[str, SingleLayerMedia] = {}
+    panel_count = 0
+
+    with gltf_v2.GlbWriter(filepath=mesh_path, name=name) as writer:
+        for index, builder in enumerate(builders):
+            child_pg = builder()
+            panel_count += _export_child_streaming(
+                child_pg=child_pg,
+                name_prefix=f"{name}_c{index}_",
+                writer=writer,
+                outline_store=outline_store,
+                media_by_name=media_by_name,
+                outline_jobs=outline_jobs)
+            # Release the child before the next one is built
+            del child_pg
+
+    with open("page.svg.template", "r") as f:
+        template_str = f.read()
+
+    for media_name in outline_store.get_media_names():
+        _export_media_svgs(
+            template_str=template_str,
+            media_name=media_name,
+            layout_panels=outline_store.get_layout_panels(media_name=media_name),
+            media=media_by_name[media_name],
+            output_dirpath=output_dirpath,
+            include_layout_boxes=include_layout_boxes,
+            outline_store=outline_store)
+
+    return panel_count
+
+
+def _export_child_streaming(
+    child_pg: PanelGroup,
+    name_prefix: str,
+    writer: gltf_v2.GlbWriter,
+    outline_store: nets_v2.OutlineStore,
+    media_by_name: dict[str, SingleLayerMedia],
+    outline_jobs: int
+) -> int:
+    panels = panels_v2.get_all_panels(
+        panel_group=child_pg,
+        name_prefix=name_prefix)
+    workplanes = panels_v2.get_all_transformed_workplanes(panel_group=child_pg)
+
+    # This works because the panels are processed in the same order by both
+    # functions
+    for panel, workplane in zip(panels, workplanes):
+        workplane = transforms_v2.apply_transform(
+            workplane=workplane,
+            transform=child_pg.transform)
+        writer.add_mesh(
+            name=panel.name,
+            workplane=workplane,
+            rgba=panels_v2.get_panel_rgba(media_desc=panel.media.description))
+
+    media_by_name.update(nets_v2.get_single_layer_media_by_name(panels=panels))
+    outline_store.add_panels(panels=panels, jobs=outline_jobs)
+
+    return len(panels)
+
+
+def _export_media_svgs(
+    template_str: str,
+    media_name: str,
+    layout_panels: list[LayoutPanel],
+    media: SingleLayerMedia,
+    output_dirpath: str,
+    include_layout_boxes: bool,
+    outline_store: Optional[nets_v2.OutlineStore] = None
+) -> list[str]:
+    # Compute the layout
+    layout_panels, packer_rect_list = nets_v2.compute_layout(
+        layout_panels=layout_panels,
+        media=media)
+
+    bin_indexes = [layout_panel.bin_index for layout_panel in layout_panels]
+    page_count = max(bin_indexes) + 1
+
+    page_paths = []
+    for page_index in range(page_count):
+        page_number = page_index + 1
+
+        svg_str = _compute_svg_for_page(
+            template_str=template_str,
+            layout_panels=layout_panels,
+            page_index=page_index,
+            packer_rect_list=packer_rect_list,
+            include_layout_boxes=include_layout_boxes,
+            outline_store=outline_store
+        )
+
+        media_dirpath = os.path.join(
+            output_dirpath, f"media-{media_name}")
+
+        os.makedirs(media_dirpath, exist_ok=True)
+
+        output_filepath = os.path.join(
+            media_dirpath, f"page-{page_number}-cut.svg")
+
+        write_file_if_changed(path=output_filepath, data_str=svg_str)
+        page_paths.append(output_filepath)
+
+    return page_paths
+
+
+def _get_temp_path(dirpath: str, suffix: str) -> str:
+    # Created in the same directory as the file it replaces, so that
+    # os.replace() is atomic
+    fd, temp_path = tempfile.mkstemp(dir=dirpath, suffix=suffix)
+    os.close(fd)
+    return temp_path
 
-            media_dirpath = os.path.join(
-                output_dirpath, f"media-{media_name}")
 
-            os.makedirs(media_dirpath, exist_ok=True)
+def _files_equal(path_a: str, path_b: str) -> bool:
+    if os.path.getsize(path_a) != os.path.getsize(path_b):
+        return False
+    with open(path_a, "rb") as f_a, open(path_b, "rb") as f_b:
+        while True:
+            chunk_a = f_a.read(1 << 20)
+            if chunk_a != f_b.read(1 << 20):
+                return False
+            if len(chunk_a) == 0:
+                return True
 
-            output_filepath = os.path.join(
-                media_dirpath, f"page-{page_number}-cut.svg")
 
-            with open(output_filepath, "w") as f:
-                f.write(svg_str)
+def _get_file_hash(path: str) -> str:
+    file_hash = hashlib.sha256()
+    with open(path, "rb") as f:
+        for chunk in iter(lambda: f.read(1 << 20), b""):
+            file_hash.update(chunk)
+    return file_hash.hexdigest()
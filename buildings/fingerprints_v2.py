@@ -0,0 +1,206 @@
+import hashlib
+import json
+import math
+from dataclasses import asdict, dataclass
+from cadquery import Shape, Workplane, exporters
+from buildings import panels_v2
+from buildings.panels_v2 import PanelGroup
+from buildings.vertices_v2 import VertexLoops
+
+
+# Coordinates are snapped to a grid of this size before hashing, and
+# numeric values are compared with this relative/absolute tolerance
+DEFAULT_TOLERANCE = 1e-3
+
+# Tessellation settings used for the tessellation hash
+TESSELLATION_TOLERANCE = 0.1
+TESSELLATION_ANGULAR_TOLERANCE = 0.1
+
+
+@dataclass
+class PanelFingerprint:
+    name: str
+    media: str
+    volume: float
+    area: float
+    bounding_box: list[float]  # [xmin, ymin, zmin, xmax, ymax, zmax]
+    vertex_loops_hash: str
+    tessellation_hash: str
+
+
+def get_fingerprints(
+    panel_group: PanelGroup,
+    tolerance: float = DEFAULT_TOLERANCE
+) -> list[PanelFingerprint]:
+    """
+    Gets a fingerprint for every panel in the PanelGroup. Volume, area,
+    bounding box and tessellation are taken from the transformed panel (as
+    exported in the mesh), the vertex loops from the untransformed panel (as
+    used for the nets).
+    """
+    panels = panels_v2.get_all_panels(panel_group=panel_group)
+    workplanes = panels_v2.get_all_transformed_workplanes(
+        panel_group=panel_group)
+
+    # This works because the panels are processed in the same order by both
+    # functions
+    fingerprints = []
+    for panel, workplane in zip(panels, workplanes):
+        shape = _to_shape(workplane=workplane)
+        bb = shape.BoundingBox()
+        vertex_loops = panels_v2.get_vertex_loops(panel=panel)
+
+        fingerprints.append(PanelFingerprint(
+            name=panel.name,
+            media=panel.media.description,
+            volume=shape.Volume(),
+            area=shape.Area(),
+            bounding_box=[bb.xmin, bb.ymin, bb.zmin, bb.xmax, bb.ymax, bb.zmax],
+            vertex_loops_hash=_vertex_loops_hash(
+                vertex_loops=vertex_loops,
+                tolerance=tolerance),
+            tessellation_hash=_tessellation_hash(
+                shape=shape,
+                tolerance=tolerance)
+        ))
+
+    return fingerprints
+
+
+def compare_fingerprints(
+    fingerprints: list[PanelFingerprint],
+    expected_fingerprints: list[PanelFingerprint],
+    tolerance: float = DEFAULT_TOLERANCE
+) -> list[str]:
+    """
+    Compares two lists of fingerprints and returns a list of human readable
+    differences, one per changed property of each changed panel. An empty
+    list means that the fingerprints are equal within the tolerance.
+    """
+    fingerprints_by_name = {fp.name: fp for fp in fingerprints}
+    expected_by_name = {fp.name: fp for fp in expected_fingerprints}
+
+    differences = []
+    for name in expected_by_name:
+        if name not in fingerprints_by_name:
+            differences.append(f"{name}: panel removed")
+
+    for name in fingerprints_by_name:
+        if name not in expected_by_name:
+            differences.append(f"{name}: panel added")
+
+    for name, expected_fp in expected_by_name.items():
+        fp = fingerprints_by_name.get(name)
+        if fp is None:
+            continue
+
+        if fp.media != expected_fp.media:
+            differences.append(
+                f"{name}: media {fp.media!r} != {expected_fp.media!r}")
+
+        for key in ["volume", "area"]:
+            value = getattr(fp, key)
+            expected_value = getattr(expected_fp, key)
+            if not _is_close(value, expected_value, tolerance):
+                differences.append(
+                    f"{name}: {key} {value:.6f} != {expected_value:.6f}")
+
+        bb_close = [
+            _is_close(value, expected_value, tolerance)
+            for value, expected_value in zip(
+                fp.bounding_box, expected_fp.bounding_box)
+        ]
+        if not all(bb_close):
+            differences.append(
+                f"{name}: bounding_box {_format_floats(fp.bounding_box)} != "
+                f"{_format_floats(expected_fp.bounding_box)}")
+
+        if fp.vertex_loops_hash != expected_fp.vertex_loops_hash:
+            differences.append(f"{name}: vertex loops changed")
+
+        if fp.tessellation_hash != expected_fp.tessellation_hash:
+            differences.append(f"{name}: tessellation changed")
+
+    return differences
+
+
+def fingerprints_to_json(fingerprints: list[PanelFingerprint]) -> str:
+    # One panel per line keeps the golden files compact and makes version
+    # control diffs readable
+    lines = [
+        json.dumps(asdict(fp), sort_keys=True)
+        for fp in fingerprints
+    ]
+    return "[\n" + ",\n".join(lines) + "\n]\n"
+
+
+def fingerprints_from_json(json_str: str) -> list[PanelFingerprint]:
+    return [PanelFingerprint(**fp_dict) for fp_dict in json.loads(json_str)]
+
+
+def _to_shape(workplane: Workplane) -> Shape:
+    return exporters.utils.toCompound(workplane)
+
+
+def _is_close(value: float, expected_value: float, tolerance: float) -> bool:
+    return math.isclose(
+        value, expected_value, rel_tol=tolerance, abs_tol=tolerance)
+
+
+def _format_floats(values: list[float]) -> str:
+    return "[" + ", ".join([f"{v:.4f}" for v in values]) + "]"
+
+
+def _quantize(value: float, tolerance: float) -> int:
+    # The "+ 0" ensures that we never see -0, only 0
+    return round(value / tolerance) + 0
+
+
+def _quantize_vertex(vertex: tuple, tolerance: float) -> tuple:
+    return tuple(_quantize(value=v, tolerance=tolerance) for v in vertex)
+
+
+def _canonical_loop(loop: list[tuple]) -> list[tuple]:
+    # Loops are equal regardless of start vertex and direction, so start at
+    # the smallest vertex and choose the smaller of the two directions
+    start = loop.index(min(loop))
+    forward = loop[start:] + loop[:start]
+    backward = [forward[0]] + list(reversed(forward[1:]))
+    return min(forward, backward)
+
+
+def _hash(value) -> str:
+    return hashlib.sha1(
+        json.dumps(value, separators=(",", ":")).encode("utf-8")
+    ).hexdigest()
+
+
+def _vertex_loops_hash(vertex_loops: VertexLoops, tolerance: float) -> str:
+    loops = []
+    for vertices in vertex_loops.values():
+        loop = [
+            _quantize_vertex(vertex=v, tolerance=tolerance)
+            for v in vertices
+        ]
+        loops.append(_canonical_loop(loop=loop))
+
+    return _hash(sorted(loops))
+
+
+def _tessellation_hash(shape: Shape, tolerance: float) -> str:
+    vertices, triangles = shape.tessellate(
+        TESSELLATION_TOLERANCE, TESSELLATION_ANGULAR_TOLERANCE)
+
+    quantized_vertices = [
+        _quantize_vertex(vertex=v.toTuple(), tolerance=tolerance)
+        for v in vertices
+    ]
+
+    quantized_triangles = []
+    for triangle in triangles:
+        tri = [quantized_vertices[i] for i in triangle]
+        # Rotate so that the smallest vertex is first (keeps the winding)
+        start = tri.index(min(tri))
+        quantized_triangles.append(tri[start:] + tri[:start])
+
+    return _hash(sorted(quantized_triangles))
@@ -0,0 +1,232 @@
+import json
+import math
+import shutil
+import struct
+import tempfile
+from array import array
+from cadquery import Workplane, exporters
+
+
+# Same defaults as the CadQuery GLTF export
+TESSELLATION_TOLERANCE = 1e-3
+TESSELLATION_ANGULAR_TOLERANCE = 0.1
+
+GLB_MAGIC = 0x46546C67  # "glTF"
+GLB_VERSION = 2
+GLB_CHUNK_JSON = 0x4E4F534A  # "JSON"
+GLB_CHUNK_BIN = 0x004E4942  # "BIN"
+
+COMPONENT_TYPE_FLOAT = 5126
+COMPONENT_TYPE_UNSIGNED_INT = 5125
+TARGET_ARRAY_BUFFER = 34962
+TARGET_ELEMENT_ARRAY_BUFFER = 34963
+MODE_TRIANGLES = 4
+
+
+class GlbWriter:
+    """
+    Writes a binary glTF (GLB) file mesh by mesh. The vertex data of each
+    mesh is appended to a temporary file straight away, so only the glTF
+    JSON index is kept in memory. As with the CadQuery GLTF export, there is
+    one node per panel under a root node, in millimeters with Z up, e.g.
+
+        with gltf_v2.GlbWriter(filepath="town.glb", name="town") as writer:
+            for panel, workplane in ...:
+                writer.add_mesh(name=panel.name, workplane=workplane, rgba=...)
+    """
+
+    def __init__(
+        self,
+        filepath: str,
+        name: str,
+        tolerance: float = TESSELLATION_TOLERANCE,
+        angular_tolerance: float = TESSELLATION_ANGULAR_TOLERANCE
+    ) -> None:
+        self.filepath = filepath
+        self.name = name
+        self.tolerance = tolerance
+        self.angular_tolerance = angular_tolerance
+        self._bin_file = tempfile.TemporaryFile()
+        self._bin_length = 0
+        self._accessors: list[dict] = []
+        self._buffer_views: list[dict] = []
+        self._meshes: list[dict] = []
+        self._nodes: list[dict] = [{"name": name, "children": []}]
+        self._materials: list[dict] = []
+        self._material_index_by_rgba: dict[tuple, int] = {}
+
+    def __enter__(self) -> "GlbWriter":
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback) -> None:
+        if exc_type is None:
+            self.close()
+        else:
+            self._bin_file.close()
+
+    def add_mesh(
+        self,
+        name: str,
+        workplane: Workplane,
+        rgba: tuple[float, float, float, float]
+    ) -> None:
+        positions, normals, indices = _tessellate(
+            workplane=workplane,
+            tolerance=self.tolerance,
+            angular_tolerance=self.angular_tolerance)
+
+        # Add the node even if the panel has no triangles, so that the nodes
+        # always match the panels
+        node: dict = {"name": name}
+        if len(indices) > 0:
+            primitive = {
+                "attributes": {
+                    "POSITION": self._add_accessor(
+                        data=positions,
+                        component_type=COMPONENT_TYPE_FLOAT,
+                        accessor_type="VEC3",
+                        target=TARGET_ARRAY_BUFFER,
+                        include_min_max=True),
+                    "NORMAL": self._add_accessor(
+                        data=normals,
+                        component_type=COMPONENT_TYPE_FLOAT,
+                        accessor_type="VEC3",
+                        target=TARGET_ARRAY_BUFFER)
+                },
+                "indices": self._add_accessor(
+                    data=indices,
+                    component_type=COMPONENT_TYPE_UNSIGNED_INT,
+                    accessor_type="SCALAR",
+                    target=TARGET_ELEMENT_ARRAY_BUFFER),
+                "material": self._get_material_index(rgba=rgba),
+                "mode": MODE_TRIANGLES
+            }
+            self._meshes.append({"name": name, "primitives": [primitive]})
+            node["mesh"] = len(self._meshes) - 1
+
+        self._nodes.append(node)
+        self._nodes[0]["children"].append(len(self._nodes) - 1)
+
+    def close(self) -> None:
+        gltf: dict = {
+            "asset": {"generator": "model-railway-buildings", "version": "2.0"},
+            "scene": 0,
+            "scenes": [{"nodes": [0]}],
+            "nodes": self._nodes,
+            "materials": self._materials
+        }
+        if self._meshes:
+            gltf["meshes"] = self._meshes
+            gltf["accessors"] = self._accessors
+            gltf["bufferViews"] = self._buffer_views
+            gltf["buffers"] = [{"byteLength": self._bin_length}]
+
+        json_bytes = json.dumps(gltf, separators=(",", ":")).encode("utf-8")
+        json_bytes += b" " * _padding(length=len(json_bytes))
+        bin_padding = _padding(length=self._bin_length)
+
+        total_length = 12 + 8 + len(json_bytes)
+        if self._meshes:
+            total_length += 8 + self._bin_length + bin_padding
+
+        with open(self.filepath, "wb") as f:
+            f.write(struct.pack("<III", GLB_MAGIC, GLB_VERSION, total_length))
+            f.write(struct.pack("<II", len(json_bytes), GLB_CHUNK_JSON))
+            f.write(json_bytes)
+            if self._meshes:
+                f.write(struct.pack(
+                    "<II", self._bin_length + bin_padding, GLB_CHUNK_BIN))
+                self._bin_file.seek(0)
+                shutil.copyfileobj(self._bin_file, f)
+                f.write(b"\0" * bin_padding)
+
+        self._bin_file.close()
+
+    def _add_accessor(
+        self,
+        data: array,
+        component_type: int,
+        accessor_type: str,
+        target: int,
+        include_min_max: bool = False
+    ) -> int:
+        # All of the data is 4 byte floats or ints, so every buffer view
+        # stays 4 byte aligned
+        byte_length = len(data) * data.itemsize
+        self._buffer_views.append({
+            "buffer": 0,
+            "byteOffset": self._bin_length,
+            "byteLength": byte_length,
+            "target": target
+        })
+        data.tofile(self._bin_file)
+        self._bin_length += byte_length
+
+        component_count = 3 if accessor_type == "VEC3" else 1
+        accessor = {
+            "bufferView": len(self._buffer_views) - 1,
+            "byteOffset": 0,
+            "componentType": component_type,
+            "count": len(data) // component_count,
+            "type": accessor_type
+        }
+        if include_min_max:
+            accessor["min"] = [min(data[i::3]) for i in range(3)]
+            accessor["max"] = [max(data[i::3]) for i in range(3)]
+        self._accessors.append(accessor)
+
+        return len(self._accessors) - 1
+
+    def _get_material_index(self, rgba: tuple[float, float, float, float]) -> int:
+        if rgba not in self._material_index_by_rgba:
+            self._materials.append({
+                "name": f"mat_{len(self._materials)}",
+                "pbrMetallicRoughness": {"baseColorFactor": list(rgba)},
+                "doubleSided": True
+            })
+            self._material_index_by_rgba[rgba] = len(self._materials) - 1
+
+        return self._material_index_by_rgba[rgba]
+
+
+def _padding(length: int) -> int:
+    return (4 - length % 4) % 4
+
+
+def _tessellate(
+    workplane: Workplane,
+    tolerance: float,
+    angular_tolerance: float
+) -> tuple[array, array, array]:
+    """
+    Tessellates the workplane face by face. Vertices are not shared between
+    faces, so that the normals of the flat faces are not smoothed across the
+    panel edges.
+    """
+    positions = array("f")
+    normals = array("f")
+    indices = array("I")
+
+    shape = exporters.utils.toCompound(workplane)
+    shape.mesh(tolerance, angular_tolerance)
+    for face in shape.Faces():
+        vertices, triangles = face.tessellate(tolerance, angular_tolerance)
+        vertex_normals = [[0.0, 0.0, 0.0] for _ in vertices]
+        for triangle in triangles:
+            v0, v1, v2 = [vertices[i] for i in triangle]
+            n = (v1 - v0).cross(v2 - v0)
+            for i in triangle:
+                vertex_normals[i][0] += n.x
+                vertex_normals[i][1] += n.y
+                vertex_normals[i][2] += n.z
+
+        index_offset = len(positions) // 3
+        for vertex, normal in zip(vertices, vertex_normals):
+            positions.extend([vertex.x, vertex.y, vertex.z])
+            length = math.sqrt(sum([n * n for n in normal])) or 1
+            normals.extend([n / length for n in normal])
+
+        for triangle in triangles:
+            indices.extend([index_offset + i for i in triangle])
+
+    return positions, normals, indices
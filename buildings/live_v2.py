@@ -0,0 +1,246 @@
+import json
+import multiprocessing
+import os
+import queue
+import tempfile
+import threading
+import time
+import traceback
+from concurrent.futures import ProcessPoolExecutor
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Optional
+from buildings import buildings_v2
+from buildings import dependencies_v2
+from buildings import export_v2
+
+
+DEFAULT_PORT = 5008
+
+# How often the source files are checked for changes, in seconds. A rebuild
+# starts once the files have not changed for one interval, so that saving
+# several files at once causes a single rebuild.
+DEFAULT_INTERVAL = 0.5
+
+# Connected viewers are sent a comment this often, in seconds, so that
+# closed connections are noticed
+KEEP_ALIVE_INTERVAL = 15
+
+
+class EventBroadcaster:
+    """
+    Sends server-sent events to every connected client. Each client has a
+    queue of events, which its request handler thread writes to the client.
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._queues: list[queue.Queue] = []
+
+    def add_client(self) -> queue.Queue:
+        client_queue = queue.Queue()
+        with self._lock:
+            self._queues.append(client_queue)
+        return client_queue
+
+    def remove_client(self, client_queue: queue.Queue) -> None:
+        with self._lock:
+            self._queues.remove(client_queue)
+
+    def publish(self, event: str, data: dict) -> None:
+        message = f"event: {event}\ndata: {json.dumps(data)}\n\n"
+        with self._lock:
+            for client_queue in self._queues:
+                client_queue.put(message)
+
+
+def start_event_server(
+    broadcaster: EventBroadcaster,
+    port: int = DEFAULT_PORT
+) -> ThreadingHTTPServer:
+    """
+    Starts a server that streams the events at /events in a background
+    thread. It only listens on the loopback interface.
+    """
+
+    class EventsRequestHandler(BaseHTTPRequestHandler):
+
+        def do_GET(self):
+            if self.path != "/events":
+                self.send_error(404)
+                return
+
+            self.send_response(200)
+            self.send_header("Content-Type", "text/event-stream")
+            self.send_header("Cache-Control", "no-cache")
+            # The viewer is served from a different local port
+            self.send_header("Access-Control-Allow-Origin", "*")
+            self.end_headers()
+
+            client_queue = broadcaster.add_client()
+            try:
+                while True:
+                    try:
+                        message = client_queue.get(timeout=KEEP_ALIVE_INTERVAL)
+                    except queue.Empty:
+                        message = ": keep-alive\n\n"
+                    self.wfile.write(message.encode("utf-8"))
+                    self.wfile.flush()
+            except (BrokenPipeError, ConnectionResetError):
+                pass
+            finally:
+                broadcaster.remove_client(client_queue)
+
+        def log_message(self, format, *args):
+            pass
+
+    server = ThreadingHTTPServer(("127.0.0.1", port), EventsRequestHandler)
+    server.daemon_threads = True
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    return server
+
+
+def watch(
+    model_names: Optional[list[str]] = None,
+    data_dirpath: str = buildings_v2.PHOTO_MATCH_DATA_DIRPATH,
+    port: int = DEFAULT_PORT,
+    interval: float = DEFAULT_INTERVAL
+) -> None:
+    """
+    Watches the source files of the package and, when they change, rebuilds
+    the models that depend on them (see dependencies_v2), writes their
+    meshes and edges into the photo match data directory, and sends a
+    "model" event to the connected viewers. A build that fails sends an
+    "error" event instead. Runs until interrupted.
+    """
+    if model_names is None:
+        model_names = list(buildings_v2.MODEL_BUILDERS.keys())
+
+    broadcaster = EventBroadcaster()
+    server = start_event_server(broadcaster=broadcaster, port=port)
+    print(f"Sending events at http://127.0.0.1:{port}/events")
+
+    mtimes = _get_source_mtimes()
+    try:
+        while True:
+            time.sleep(interval)
+            new_mtimes = _get_source_mtimes()
+            if new_mtimes == mtimes:
+                continue
+
+            # Wait until the files have stopped changing
+            while True:
+                time.sleep(interval)
+                latest_mtimes = _get_source_mtimes()
+                if latest_mtimes == new_mtimes:
+                    break
+                new_mtimes = latest_mtimes
+
+            changed_paths = [
+                path
+                for path in set(mtimes) | set(new_mtimes)
+                if mtimes.get(path) != new_mtimes.get(path)
+            ]
+            mtimes = new_mtimes
+
+            # The dependencies are found again each time, as the changes may
+            # have added or removed imports
+            try:
+                dependencies_by_name = get_model_dependencies(
+                    model_names=model_names)
+            except SyntaxError as e:
+                print(f"Not rebuilding: {e}")
+                broadcaster.publish(event="error", data={"error": str(e)})
+                continue
+
+            affected_model_names = dependencies_v2.get_affected_names(
+                dependencies_by_name=dependencies_by_name,
+                changed_paths=changed_paths)
+
+            for model_name in affected_model_names:
+                _rebuild(
+                    model_name=model_name,
+                    data_dirpath=data_dirpath,
+                    broadcaster=broadcaster)
+    except KeyboardInterrupt:
+        pass
+    finally:
+        server.shutdown()
+
+
+def get_model_dependencies(model_names: list[str]) -> dict[str, set[str]]:
+    # Every model depends on the export code as well as its builder
+    export_dependencies = dependencies_v2.get_function_dependencies(
+        fn=buildings_v2.export_photo_match_files)
+    return {
+        model_name: export_dependencies | dependencies_v2.get_function_dependencies(
+            fn=buildings_v2.MODEL_BUILDERS[model_name])
+        for model_name in model_names
+    }
+
+
+def build_model(model_name: str, data_dirpath: str) -> list[str]:
+    """
+    Builds the model and writes its photo match files into the data
+    directory. Returns the filenames written.
+    """
+    panel_group = buildings_v2.MODEL_BUILDERS[model_name]()
+    with tempfile.TemporaryDirectory() as output_dirpath:
+        paths = buildings_v2.export_photo_match_files(
+            model_name=model_name,
+            panel_group=panel_group,
+            output_dirpath=output_dirpath,
+            data_dirpath=data_dirpath)
+
+    return [os.path.basename(path) for path in paths]
+
+
+def _rebuild(
+    model_name: str,
+    data_dirpath: str,
+    broadcaster: EventBroadcaster
+) -> None:
+    print(f"Rebuilding {model_name}")
+    start_time = time.perf_counter()
+
+    # Build in a new process, so that the changed modules are imported
+    # rather than the ones already imported by this process
+    try:
+        with ProcessPoolExecutor(
+                max_workers=1,
+                mp_context=multiprocessing.get_context("spawn")) as executor:
+            filenames = executor.submit(
+                build_model,
+                model_name=model_name,
+                data_dirpath=data_dirpath).result()
+    except Exception:
+        error = traceback.format_exc()
+        print(error)
+        broadcaster.publish(event="error", data={
+            "model": model_name,
+            "error": error
+        })
+        return
+
+    build_seconds = time.perf_counter() - start_time
+    print(f"Rebuilt {model_name} in {build_seconds:.1f}s")
+    # The viewer reloads the scenes whose mesh is the GLTF, which it loads
+    # with its buffer
+    mesh_filenames = export_v2.get_mesh_filenames(model_name=model_name)
+    broadcaster.publish(event="model", data={
+        "model": model_name,
+        "meshFilename": mesh_filenames[0],
+        "meshFilenames": mesh_filenames,
+        "filenames": filenames,
+        "buildSeconds": build_seconds
+    })
+
+
+def _get_source_mtimes() -> dict[str, int]:
+    mtimes = {}
+    for dirpath, dirnames, filenames in os.walk(dependencies_v2.get_package_dirpath()):
+        dirnames[:] = [name for name in dirnames if name != "__pycache__"]
+        for filename in filenames:
+            if filename.endswith(".py"):
+                path = os.path.join(dirpath, filename)
+                mtimes[path] = os.stat(path).st_mtime_ns
+    return mtimes
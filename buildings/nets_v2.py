@@ -1,14 +1,22 @@
 import copy
+import itertools
 import os
+import numpy as np
 import rectpack  # type: ignore
+from array import array
 from dataclasses import dataclass
+from buildings import panels_v2
 from buildings import vertices_v2
 from buildings.panels_v2 import Panel, PanelGroup
 from buildings.media_v2 import LayeredMedia, SingleLayerMedia
 from buildings.vertices_v2 import Vertex, VertexLoops
 
 
-@dataclass
+# Number of pages that the packing starts with
+MIN_BIN_COUNT = 20
+
+
+@dataclass(slots=True)
 class LayoutPanel:
     name: str
     vertex_loops: VertexLoops
@@ -51,24 +59,26 @@ def compute_layout(
 
     # Run the packing algorithm and get the positions, bin index and
     # rotation of each rectangle
-    packer = rectpack.newPacker()
-    for rectangle in rectangles_by_id.values():
-        packer.add_rect(
-            width=rectangle["width"],
-            height=rectangle["height"],
-            rid=rectangle["id"])
-
     # - Bins are the size of the drawing area of a page
     # - They are created up front
     # - We must have enough bins to fit all of the objects otherwise the
-    #   objects will overlap
-    MAX_BIN_COUNT = 20
-    for i in range(MAX_BIN_COUNT):
-        packer.add_bin(
-            width=media.width,
-            height=media.height)
-    
-    packer.pack()
+    #   objects will overlap, so if any are left over, pack again with twice
+    #   as many bins (stopping if that doesn't help, e.g. if an object is
+    #   larger than a page)
+    bin_count = MIN_BIN_COUNT
+    packed_count = 0
+    while True:
+        packer = _pack_rectangles(
+            rectangles=list(rectangles_by_id.values()),
+            media=media,
+            bin_count=bin_count)
+        previous_packed_count = packed_count
+        packed_count = len(packer.rect_list())
+        if packed_count == len(rectangles_by_id):
+            break
+        if packed_count <= previous_packed_count:
+            break
+        bin_count *= 2
 
     for rect in packer.rect_list():
         bin_index, x, y, width, height, rect_id = rect
@@ -91,7 +101,33 @@ def compute_layout(
     return layout_panels, packer.rect_list()
 
 
-def get_layout_panels_by_media(panels: list[Panel]) -> dict[str, list[LayoutPanel]]:
+def _pack_rectangles(
+    rectangles: list[dict],
+    media: SingleLayerMedia,
+    bin_count: int
+):
+    packer = rectpack.newPacker()
+    for rectangle in rectangles:
+        packer.add_rect(
+            width=rectangle["width"],
+            height=rectangle["height"],
+            rid=rectangle["id"])
+
+    for i in range(bin_count):
+        packer.add_bin(
+            width=media.width,
+            height=media.height)
+
+    packer.pack()
+
+    return packer
+
+
+def get_panels_by_media(panels: list[Panel]) -> dict[str, list[Panel]]:
+    """
+    Groups the panels by the name of their single layer media. Panels with
+    layered media are copied once per layer.
+    """
     panels_by_media: dict[str, list[Panel]] = {}
     for panel in panels:
         media = panel.media
@@ -115,13 +151,34 @@ def get_layout_panels_by_media(panels: list[Panel]) -> dict[str, list[LayoutPane
             copied_panel = copy.copy(panel)
             copied_panel.name += f"_{index}"
             panels_by_media[media_name].append(copied_panel)
-    
+
+    return panels_by_media
+
+
+def get_layout_panels_by_media(
+    panels: list[Panel],
+    jobs: int = 1
+) -> dict[str, list[LayoutPanel]]:
+    """
+    Gets the outlines and sizes of the panels for packing, by media. With
+    jobs > 1, the outlines are extracted in up to jobs processes at once
+    (see panels_v2.get_all_vertex_loops).
+    """
+    panels_by_media = get_panels_by_media(panels=panels)
+    all_panels = [
+        panel
+        for media_panels in panels_by_media.values()
+        for panel in media_panels
+    ]
+    all_vertex_loops = panels_v2.get_all_vertex_loops(panels=all_panels, jobs=jobs)
+
     layout_panels_by_media: dict[str, list[LayoutPanel]] = {}
+    index = 0
     for media_name, panels in panels_by_media.items():
         layout_panels_by_media[media_name] = []
         for panel in panels:
-            vertex_loops = vertices_v2.get_panel_vertex_loops(
-                workplane=panel.workplane)
+            vertex_loops = all_vertex_loops[index]
+            index += 1
 
             width, height, center_offset_x, center_offset_y = \
                 vertices_v2.get_width_height(panel_vertices=vertex_loops)
@@ -153,3 +210,138 @@ def get_single_layer_media_by_name(
             raise Exception("Unknown media")
 
     return media_by_name
+
+
+class _MediaOutlines:
+    """
+    The outlines of the panels of one media as a struct of arrays
+    """
+    __slots__ = ["names", "panel_loop_starts", "loop_vertex_starts", "coords"]
+
+    def __init__(self) -> None:
+        self.names: list[str] = []
+        # Index of the first loop of each panel, plus one past the end
+        self.panel_loop_starts = array("q", [0])
+        # Index of the first vertex of each loop, plus one past the end
+        self.loop_vertex_starts = array("q", [0])
+        # x, y of each vertex
+        self.coords = array("d")
+
+
+class OutlineStore:
+    """
+    Compact store of the vertex loops of many panels, so that the outlines of
+    a large model can be kept in memory without its OCC shapes. The vertices
+    of the loops of each media are stored in one flat array of doubles, with
+    arrays of offsets to the loops of each panel, which takes a fraction of
+    the memory of the equivalent dicts of lists of tuples. The panel sizes
+    for packing are computed from the arrays directly, while the SVG points
+    of the outlines are only formatted a panel at a time as the pages are
+    written.
+    """
+
+    def __init__(self) -> None:
+        self._outlines_by_media: dict[str, _MediaOutlines] = {}
+        # Media name and index within the media of each panel
+        self._index_by_name: dict[str, tuple[str, int]] = {}
+
+    def add(self, name: str, media_name: str, vertex_loops: VertexLoops) -> None:
+        if name in self._index_by_name:
+            raise Exception(f"Duplicate panel name: {name}")
+        if not any(vertex_loops.values()):
+            raise Exception(f"Panel has no outline: {name}")
+
+        if media_name not in self._outlines_by_media:
+            self._outlines_by_media[media_name] = _MediaOutlines()
+        outlines = self._outlines_by_media[media_name]
+
+        self._index_by_name[name] = (media_name, len(outlines.names))
+        outlines.names.append(name)
+        for vertices in vertex_loops.values():
+            outlines.coords.extend(itertools.chain.from_iterable(vertices))
+            outlines.loop_vertex_starts.append(len(outlines.coords) // 2)
+        outlines.panel_loop_starts.append(len(outlines.loop_vertex_starts) - 1)
+
+    def add_panels(self, panels: list[Panel], jobs: int = 1) -> None:
+        """
+        Adds the outlines of the panels by media, as in
+        get_layout_panels_by_media.
+        """
+        media_names_and_panels = [
+            (media_name, panel)
+            for media_name, media_panels in get_panels_by_media(panels=panels).items()
+            for panel in media_panels
+        ]
+        all_vertex_loops = panels_v2.get_all_vertex_loops(
+            panels=[panel for _, panel in media_names_and_panels],
+            jobs=jobs)
+        for (media_name, panel), vertex_loops in zip(media_names_and_panels, all_vertex_loops):
+            self.add(
+                name=panel.name,
+                media_name=media_name,
+                vertex_loops=vertex_loops)
+
+    def get_media_names(self) -> list[str]:
+        # In the order that the media are first used, as in
+        # get_layout_panels_by_media
+        return list(self._outlines_by_media)
+
+    def get_layout_panels(self, media_name: str) -> list[LayoutPanel]:
+        """
+        Gets the layout panels of one media without their vertex loops (see
+        get_points_strs).
+        """
+        outlines = self._outlines_by_media[media_name]
+        coords = np.frombuffer(outlines.coords, dtype=np.float64).reshape(-1, 2)
+        loop_vertex_starts = np.frombuffer(outlines.loop_vertex_starts, dtype=np.int64)
+        panel_loop_starts = np.frombuffer(outlines.panel_loop_starts, dtype=np.int64)
+
+        # The min and max x, y of the vertices of each panel, in one pass
+        panel_vertex_starts = loop_vertex_starts[panel_loop_starts[:-1]]
+        mins = np.minimum.reduceat(coords, panel_vertex_starts, axis=0)
+        maxs = np.maximum.reduceat(coords, panel_vertex_starts, axis=0)
+        sizes = np.hstack([maxs - mins, 0.5 * (mins + maxs)]).tolist()
+
+        return [
+            LayoutPanel(
+                name=name,
+                vertex_loops={},
+                width=width,
+                height=height,
+                center_offset_x=center_offset_x,
+                center_offset_y=center_offset_y
+            )
+            for name, (width, height, center_offset_x, center_offset_y)
+            in zip(outlines.names, sizes)
+        ]
+
+    def get_vertex_loops(self, name: str) -> VertexLoops:
+        vertex_loops: VertexLoops = {}
+        for loop_index, coords in enumerate(self._get_loop_coords(name=name)):
+            vertex_loops[loop_index] = list(zip(coords[0::2], coords[1::2]))
+
+        return vertex_loops
+
+    def get_points_strs(self, name: str) -> list[str]:
+        """
+        Gets the SVG polygon points of each loop of a panel, e.g.
+        "0.0,0.0 40.0,0.0 40.0,30.0"
+        """
+        points_strs = []
+        for coords in self._get_loop_coords(name=name):
+            coord_strs = list(map(str, coords))
+            points_strs.append(" ".join(map(
+                ",".join, zip(coord_strs[0::2], coord_strs[1::2]))))
+
+        return points_strs
+
+    def _get_loop_coords(self, name: str) -> list[array]:
+        media_name, index = self._index_by_name[name]
+        outlines = self._outlines_by_media[media_name]
+        loop_vertex_starts = outlines.loop_vertex_starts
+        return [
+            outlines.coords[2 * loop_vertex_starts[i]:2 * loop_vertex_starts[i + 1]]
+            for i in range(
+                outlines.panel_loop_starts[index],
+                outlines.panel_loop_starts[index + 1])
+        ]
@@ -1,11 +1,18 @@
 import copy
 import math
+import weakref
+from concurrent.futures import ProcessPoolExecutor
 from dataclasses import dataclass, field
-from typing import Optional, Union
-from cadquery import Assembly, Color, Workplane
+from typing import Any, Callable, Hashable, Optional, Union
+from cadquery import Assembly, Color, Compound, Location, Shape, Vector, Workplane
+from buildings import brep_v2
+from buildings import profiles_v2
 from buildings import transforms_v2
+from buildings import vertices_v2
 from buildings.media_v2 import Media
-from buildings.transforms_v2 import Transform
+from buildings.profiles_v2 import Profile
+from buildings.transforms_v2 import Transform, Translate
+from buildings.vertices_v2 import VertexLoops
 from buildings.tabs import Tab, TabDirection
 
 
@@ -13,19 +20,42 @@ def empty(type):
     return field(default_factory=type)
 
 
+# Solids extruded from profiles, and the outlines of panels for the nets,
+# by the profile or solid that they were made from. Panels often share
+# these (e.g. the layers of a stack, and the copies of a panel made for
+# each layer of its LayeredMedia), so each is only made once.
+_workplanes_by_profile: "weakref.WeakKeyDictionary[Profile, Workplane]" = (
+    weakref.WeakKeyDictionary())
+_vertex_loops_by_source: "weakref.WeakKeyDictionary[Any, VertexLoops]" = (
+    weakref.WeakKeyDictionary())
+
+# Solids made by mirroring another solid (see twin), by the solid and the
+# plane that they were mirrored from, so that their outlines are mirrored
+# rather than rendered again
+_mirror_sources_by_workplane: (
+    "weakref.WeakKeyDictionary[Workplane, tuple[Workplane, str]]"
+) = weakref.WeakKeyDictionary()
+
+
+# A Panel or Cutout is either a solid (workplane) or a planar profile that
+# is extruded to a solid only when one is needed (workplane=None and a
+# profile, see get_panel_workplane)
+
 @dataclass
 class Panel:
     name: str
     media: Media
-    workplane: Workplane
+    workplane: Optional[Workplane]
     transform: Transform = empty(Transform)
+    profile: Optional[Profile] = None
 
 
 @dataclass
 class Cutout:
-    workplane: Workplane
+    workplane: Optional[Workplane]
     subtract_from: list[str]
     transform: Transform = empty(Transform)
+    profile: Optional[Profile] = None
 
 
 @dataclass
@@ -56,6 +86,389 @@ def get_all_panels(panel_group: PanelGroup, name_prefix: str = "") -> list[Panel
     return panels
 
 
+def get_panel_workplane(panel: Union[Panel, Cutout]) -> Workplane:
+    """
+    Gets the solid of a panel or cutout, extruding its profile (once) if it
+    has one.
+    """
+    if panel.workplane is None:
+        if panel.profile not in _workplanes_by_profile:
+            _workplanes_by_profile[panel.profile] = profiles_v2.to_workplane(
+                profile=panel.profile)
+        panel.workplane = _workplanes_by_profile[panel.profile]
+    return panel.workplane
+
+
+def get_vertex_loops(panel: Panel) -> VertexLoops:
+    """
+    Gets the outline and holes of the untransformed panel, for the nets.
+    They are read from the profile of a profile panel, without rendering
+    it.
+    """
+    if panel.profile is None:
+        return _get_workplane_vertex_loops(workplane=panel.workplane)
+    if panel.profile not in _vertex_loops_by_source:
+        _vertex_loops_by_source[panel.profile] = profiles_v2.get_vertex_loops(
+            profile=panel.profile)
+    return _vertex_loops_by_source[panel.profile]
+
+
+def get_all_vertex_loops(panels: list[Panel], jobs: int = 1) -> list[VertexLoops]:
+    """
+    Gets the vertex loops of the panels, in the order of the panels. With
+    jobs > 1, the outlines of the solids are rendered in up to jobs
+    processes at once, each solid being sent to a process as binary BREP.
+    Outlines that are already known, mirrored (see mirror_workplane) or read
+    from profiles are done in this process.
+    """
+    if jobs > 1:
+        workplanes = []
+        workplane_ids = set()
+        for panel in panels:
+            if panel.profile is not None:
+                continue
+            workplane = panel.workplane
+            while workplane in _mirror_sources_by_workplane:
+                workplane = _mirror_sources_by_workplane[workplane][0]
+            if (workplane not in _vertex_loops_by_source and
+                    id(workplane) not in workplane_ids):
+                workplanes.append(workplane)
+                workplane_ids.add(id(workplane))
+
+        if len(workplanes) > 1:
+            breps = [
+                [brep_v2.to_brep(shape=shape) for shape in _get_shapes(workplane=workplane)]
+                for workplane in workplanes
+            ]
+            with ProcessPoolExecutor(max_workers=jobs) as executor:
+                all_vertex_loops = executor.map(
+                    _get_brep_vertex_loops,
+                    breps,
+                    chunksize=max(1, len(breps) // (4 * jobs)))
+                for workplane, vertex_loops in zip(workplanes, all_vertex_loops):
+                    _vertex_loops_by_source[workplane] = vertex_loops
+
+    return [get_vertex_loops(panel=panel) for panel in panels]
+
+
+def _get_brep_vertex_loops(breps: list[bytes]) -> VertexLoops:
+    # Runs in a worker process of get_all_vertex_loops
+    return vertices_v2.get_panel_vertex_loops(
+        workplane=Workplane("XY").newObject([
+            brep_v2.from_brep(data=data) for data in breps
+        ]))
+
+
+def _get_workplane_vertex_loops(workplane: Workplane) -> VertexLoops:
+    if workplane not in _vertex_loops_by_source:
+        if workplane in _mirror_sources_by_workplane:
+            source_workplane, plane = _mirror_sources_by_workplane[workplane]
+            vertex_loops = vertices_v2.mirror_vertex_loops(
+                vertex_loops=_get_workplane_vertex_loops(
+                    workplane=source_workplane),
+                plane=plane)
+        else:
+            vertex_loops = vertices_v2.get_panel_vertex_loops(
+                workplane=workplane)
+        _vertex_loops_by_source[workplane] = vertex_loops
+    return _vertex_loops_by_source[workplane]
+
+
+def twin(
+    panel_group: PanelGroup,
+    name: str,
+    transform: Transform,
+    mirror_plane: Optional[str] = None
+) -> PanelGroup:
+    """
+    Gets a twin of a panel group, e.g. the back wall of a house that is
+    built from the same parameters as the front wall. The twin's panels
+    share the solids (or profiles) of the group's panels rather than
+    building them again. With a mirror_plane, e.g. "XZ", the twin is the
+    mirror image of the group in that plane (before the group transform),
+    and the outlines of its panels for the nets are mirrored from the
+    group's outlines rather than rendered again.
+    """
+    # The mirror images by the id of the solid or profile that they mirror,
+    # so that twins of panels that share a solid share its mirror image
+    mirrored_by_id: dict[int, tuple[Any, Any]] = {}
+    return _twin_panel_group(
+        panel_group=panel_group,
+        name=name,
+        transform=transform,
+        mirror_plane=mirror_plane,
+        mirrored_by_id=mirrored_by_id)
+
+
+def _twin_panel_group(
+    panel_group: PanelGroup,
+    name: str,
+    transform: Transform,
+    mirror_plane: Optional[str],
+    mirrored_by_id: dict[int, tuple[Any, Any]]
+) -> PanelGroup:
+    return PanelGroup(
+        name=name,
+        panels=[
+            _twin_panel(
+                panel=panel,
+                mirror_plane=mirror_plane,
+                mirrored_by_id=mirrored_by_id)
+            for panel in panel_group.panels
+        ],
+        cutouts=[
+            _twin_panel(
+                panel=cutout,
+                mirror_plane=mirror_plane,
+                mirrored_by_id=mirrored_by_id)
+            for cutout in panel_group.cutouts
+        ],
+        children=[
+            _twin_panel_group(
+                panel_group=child_pg,
+                name=child_pg.name,
+                transform=(
+                    child_pg.transform if mirror_plane is None else
+                    transforms_v2.mirror_transform(
+                        transform=child_pg.transform, plane=mirror_plane)
+                ),
+                mirror_plane=mirror_plane,
+                mirrored_by_id=mirrored_by_id)
+            for child_pg in panel_group.children
+        ],
+        transform=transform
+    )
+
+
+def _twin_panel(
+    panel: Union[Panel, Cutout],
+    mirror_plane: Optional[str],
+    mirrored_by_id: dict[int, tuple[Any, Any]]
+) -> Union[Panel, Cutout]:
+    twin_panel = copy.copy(panel)
+    twin_panel.transform = list(panel.transform)
+    if mirror_plane is None:
+        return twin_panel
+
+    twin_panel.transform = transforms_v2.mirror_transform(
+        transform=panel.transform, plane=mirror_plane)
+    source = panel.profile if panel.profile is not None else panel.workplane
+    # The source is kept with its mirror image, so that its id isn't reused
+    # while the twin is made
+    if id(source) not in mirrored_by_id:
+        if panel.profile is not None:
+            mirrored = profiles_v2.mirror(profile=source, plane=mirror_plane)
+        else:
+            mirrored = mirror_workplane(workplane=source, plane=mirror_plane)
+        mirrored_by_id[id(source)] = (source, mirrored)
+    mirrored = mirrored_by_id[id(source)][1]
+
+    if panel.profile is not None:
+        twin_panel.profile = mirrored
+        twin_panel.workplane = None
+    else:
+        twin_panel.workplane = mirrored
+    return twin_panel
+
+
+def mirror_workplane(workplane: Workplane, plane: str) -> Workplane:
+    """
+    Mirrors a solid in a plane through the origin, e.g. "XZ". The outline of
+    the mirrored solid for the nets is mirrored from the outline of the
+    solid rather than rendered again.
+    """
+    mirrored_workplane = workplane.mirror(plane, (0, 0, 0))
+    _mirror_sources_by_workplane[mirrored_workplane] = (workplane, plane)
+    return mirrored_workplane
+
+
+def get_mirror_source(workplane: Workplane) -> Optional[tuple[Workplane, str]]:
+    """
+    Gets the solid and plane that a solid was mirrored from by
+    mirror_workplane, or None
+    """
+    return _mirror_sources_by_workplane.get(workplane)
+
+
+def stack_panels(
+    media: Media,
+    layers: list[tuple[Hashable, Transform]],
+    build_layer: Callable[[Any], Union[Workplane, Profile]],
+    name_prefix: str = "p"
+) -> list[Panel]:
+    """
+    Gets the panels of a stack of layers glued together, e.g. the layers of
+    a roof. Each layer is given as a key and a transform, and build_layer
+    builds the solid or profile of a layer from its key. It is called once
+    per distinct key, so identical layers share one solid (or profile),
+    which is built, extruded and outlined for the nets once.
+    """
+    layers_by_key: dict[Hashable, Union[Workplane, Profile]] = {}
+    panels = []
+    for index, (key, transform) in enumerate(layers):
+        if key not in layers_by_key:
+            layers_by_key[key] = build_layer(key)
+        panels.append(shape_panel(
+            name=f"{name_prefix}{index}",
+            media=media,
+            shape=layers_by_key[key],
+            transform=transform
+        ))
+
+    return panels
+
+
+def shape_panel(
+    name: str,
+    media: Media,
+    shape: Union[Workplane, Profile],
+    transform: Optional[Transform] = None
+) -> Panel:
+    """
+    Gets a panel of either a solid or a profile, for builders that can make
+    either (see use_profiles in wall_panels)
+    """
+    return Panel(
+        name=name,
+        media=media,
+        workplane=shape if isinstance(shape, Workplane) else None,
+        transform=transform if transform is not None else [],
+        profile=shape if isinstance(shape, Profile) else None
+    )
+
+
+def linear_offsets(
+    count: int,
+    spacing: tuple[float, float, float],
+    centered: bool = True
+) -> list[tuple[float, float, float]]:
+    """
+    Offsets of count copies in a row, spacing apart. The row is centered on
+    the origin, or starts at it.
+    """
+    start = -0.5 * (count - 1) if centered else 0
+    return [
+        (
+            (start + i) * spacing[0],
+            (start + i) * spacing[1],
+            (start + i) * spacing[2]
+        )
+        for i in range(count)
+    ]
+
+
+def grid_offsets(
+    column_count: int,
+    row_count: int,
+    column_spacing: float,
+    row_spacing: float,
+    centered: bool = True
+) -> list[tuple[float, float, float]]:
+    """
+    Offsets of copies in a grid in the XY plane, row by row from the bottom
+    """
+    return [
+        (x, y, 0)
+        for _, y, _ in linear_offsets(
+            count=row_count, spacing=(0, row_spacing, 0), centered=centered)
+        for x, _, _ in linear_offsets(
+            count=column_count, spacing=(column_spacing, 0, 0), centered=centered)
+    ]
+
+
+def combine_workplanes(workplanes: list[Workplane]) -> Workplane:
+    """
+    The solids of the workplanes as one compound, so that cutting them from
+    (or adding them to) a panel is one boolean operation rather than one
+    per workplane.
+    """
+    return _get_compound_workplane(shapes=[
+        shape
+        for workplane in workplanes
+        for shape in _get_shapes(workplane=workplane)
+    ])
+
+
+def array_workplane(
+    workplane: Workplane,
+    offsets: list[tuple[float, float, float]]
+) -> Workplane:
+    """
+    Copies of the workplane at each offset, as one compound (see
+    combine_workplanes). The copies are placed with locations, so they share
+    the geometry of the workplane rather than copying it.
+    """
+    shapes = _get_shapes(workplane=workplane)
+    return _get_compound_workplane(shapes=[
+        shape.moved(Location(Vector(*offset)))
+        for offset in offsets
+        for shape in shapes
+    ])
+
+
+def array_panels(
+    panel: Panel,
+    offsets: list[tuple[float, float, float]]
+) -> list[Panel]:
+    """
+    Copies of the panel moved by each offset (after the panel's transform),
+    named {name}{index}. The copies share the panel's solid or profile, so
+    it is built and outlined for the nets once.
+    """
+    return [
+        Panel(
+            name=f"{panel.name}{index}",
+            media=panel.media,
+            workplane=panel.workplane,
+            transform=panel.transform + [Translate(offset)],
+            profile=panel.profile
+        )
+        for index, offset in enumerate(offsets)
+    ]
+
+
+def array_cutout(
+    cutout: Cutout,
+    offsets: list[tuple[float, float, float]]
+) -> Cutout:
+    """
+    One cutout that makes the hole of the cutout moved by each offset (after
+    the cutout's transform), so each panel is cut once rather than once per
+    hole.
+    """
+    if cutout.profile is not None and all([o[2] == 0 for o in offsets]):
+        profile = profiles_v2.apply_transforms(
+            profile=cutout.profile,
+            transforms=[cutout.transform],
+            reverse_transform=[])
+        if profile is not None:
+            holes = [
+                profiles_v2.translate(profile=profile, vector=offset)
+                for offset in offsets
+            ]
+            for hole in holes[1:]:
+                holes[0] = profiles_v2.union(profile=holes[0], other=hole)
+            return Cutout(
+                workplane=None,
+                subtract_from=cutout.subtract_from,
+                profile=holes[0])
+
+    workplane = transforms_v2.apply_transform(
+        workplane=get_panel_workplane(panel=cutout),
+        transform=cutout.transform)
+    return Cutout(
+        workplane=array_workplane(workplane=workplane, offsets=offsets),
+        subtract_from=cutout.subtract_from)
+
+
+def _get_shapes(workplane: Workplane) -> list[Shape]:
+    return [shape for shape in workplane.vals() if isinstance(shape, Shape)]
+
+
+def _get_compound_workplane(shapes: list[Shape]) -> Workplane:
+    return Workplane("XY").newObject([Compound.makeCompound(shapes)])
+
+
 def get_all_transformed_workplanes(panel_group: PanelGroup) -> list[Workplane]:
     """
     Get a list of transformed workplanes from the PanelGroup by transforming
@@ -65,7 +478,7 @@ def get_all_transformed_workplanes(panel_group: PanelGroup) -> list[Workplane]:
     transformed_workplanes = []
     for panel in panel_group.panels:
         wp = transforms_v2.apply_transform(
-            workplane=panel.workplane,
+            workplane=get_panel_workplane(panel=panel),
             transform=panel.transform
         )
         transformed_workplanes.append(wp)
@@ -90,15 +503,7 @@ def apply_cutouts_from_children(panel_group: PanelGroup) -> None:
 
     for child_pg in panel_group.children:
         for cutout in child_pg.cutouts:
-            cutout_wp = cutout.workplane
-            cutout_wp = transforms_v2.apply_transform(
-                workplane=cutout_wp,
-                transform=cutout.transform
-            )
-            cutout_wp = transforms_v2.apply_transform(
-                workplane=cutout_wp,
-                transform=child_pg.transform
-            )
+            cutout_wp = None
             for panel_name in cutout.subtract_from:
                 if panel_name not in panels_by_name:
                     # print(
@@ -109,6 +514,32 @@ def apply_cutouts_from_children(panel_group: PanelGroup) -> None:
 
                 panel = panels_by_name[panel_name]
 
+                # A profile cutout that goes straight through a profile
+                # panel is cut from the profile, in the panel's coordinates
+                if panel.profile is not None and cutout.profile is not None:
+                    cutout_profile = profiles_v2.apply_transforms(
+                        profile=cutout.profile,
+                        transforms=[cutout.transform, child_pg.transform],
+                        reverse_transform=panel.transform)
+                    if cutout_profile is not None and profiles_v2.cuts_through(
+                            profile=panel.profile, cutter=cutout_profile):
+                        panel.profile = profiles_v2.difference(
+                            profile=panel.profile,
+                            cutter=cutout_profile)
+                        panel.workplane = None
+                        continue
+
+                if cutout_wp is None:
+                    cutout_wp = get_panel_workplane(panel=cutout)
+                    cutout_wp = transforms_v2.apply_transform(
+                        workplane=cutout_wp,
+                        transform=cutout.transform
+                    )
+                    cutout_wp = transforms_v2.apply_transform(
+                        workplane=cutout_wp,
+                        transform=child_pg.transform
+                    )
+
                 # panel.workplane = panel.workplane - cutout_wp
 
                 # Cut the cutout from the panel as follows:
@@ -116,7 +547,7 @@ def apply_cutouts_from_children(panel_group: PanelGroup) -> None:
                 # - Cut the cutout from the panel
                 # - Apply the reverse panel local transform to return it
                 #   to its original position
-                panel_wp = panel.workplane
+                panel_wp = get_panel_workplane(panel=panel)
                 panel_wp = transforms_v2.apply_transform(
                     workplane=panel_wp,
                     transform=panel.transform)
@@ -125,6 +556,8 @@ def apply_cutouts_from_children(panel_group: PanelGroup) -> None:
                     workplane=panel_wp,
                     transform=panel.transform)
                 panel.workplane = panel_wp
+                # The profile no longer matches the panel
+                panel.profile = None
 
     return None
 
@@ -158,15 +591,18 @@ def get_assembly(panel_group: PanelGroup) -> Assembly:
 
     assembly = Assembly(name=panel_group.name)
     for panel_name, panel_media_desc, workplane in named_workplanes:
-        if "corrugated" in panel_media_desc:
-            color = Color(0.83, 0.64, 0.42, 1)
-        else:
-            color = Color(1, 1, 1, 1)
+        color = Color(*get_panel_rgba(media_desc=panel_media_desc))
         assembly.add(workplane, name=panel_name, color=color)
     
     return assembly
 
 
+def get_panel_rgba(media_desc: str) -> tuple[float, float, float, float]:
+    if "corrugated" in media_desc:
+        return (0.83, 0.64, 0.42, 1)
+    return (1, 1, 1, 1)
+
+
 # ======================================================================
 # ======================================================================
 # ======================================================================
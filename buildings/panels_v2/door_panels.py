@@ -434,6 +434,8 @@ def shelter_inset_door_windows(
     frame_thickness = 1
     door_x = -0.5 * width + frame_thickness + 0.5 * door_width
 
+    # The two layers have different holes, so there is nothing for
+    # panels_v2.stack_panels to share between them
     layer1 = Panel(
         name="layer1",
         transform=[
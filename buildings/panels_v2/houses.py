@@ -31,7 +31,8 @@ def basic_house(
     floor_hole: bool = True,
     front_roof_vertical_holes: list[dict] = [],
     back_roof_vertical_holes: list[dict] = [],
-    tab_length_y: float = 30
+    tab_length_y: float = 30,
+    use_profiles: bool = False
 ) -> PanelGroup:
 
     floor = floor_panels.floor(
@@ -56,20 +57,17 @@ def basic_house(
         width=length,
         height=height,
         left_right_tab_direction=TabDirection.OUT,
+        use_profiles=use_profiles,
         transform=[
             Rotate((0, 0, 0), (1, 0, 0), 90),
             Rotate((0, 0, 0), (0, 0, 1), 180),
             Translate((0, 0.5 * width - wall_base_media.thickness - wall_front_media.thickness, 0.5 * height))
         ]
     )
-    back_wall = wall_panels.wall(
+    # The back wall is built from the same parameters as the front wall
+    back_wall = panels_v2.twin(
+        panel_group=front_wall,
         name="back_wall",
-        wall_base_media=wall_base_media,
-        wall_front_media=wall_front_media,
-        wall_back_media=wall_back_media,
-        width=length,
-        height=height,
-        left_right_tab_direction=TabDirection.OUT,
         transform=[
             Rotate((0, 0, 0), (1, 0, 0), 90),
             Rotate((0, 0, 0), (0, 0, 1), 0),
@@ -89,6 +87,7 @@ def basic_house(
         tab_length_roof=tab_length_roof,
         tab_offset_roof=tab_offset_roof,
         tab_length_x=tab_length_y,
+        use_profiles=use_profiles,
         transform=[
             Rotate((0, 0, 0), (1, 0, 0), 90),
             Rotate((0, 0, 0), (0, 0, 1), 90),
@@ -98,19 +97,9 @@ def basic_house(
                 0.5 * height))
         ]
     )
-    left_wall = wall_panels.gable_wall(
+    left_wall = panels_v2.twin(
+        panel_group=right_wall,
         name="left_wall",
-        wall_base_media=wall_base_media,
-        wall_front_media=wall_front_media,
-        wall_back_media=wall_back_media,
-        roof_media=roof_media,
-        roof_layer_count=roof_layer_count,
-        width=width,
-        height=height,
-        gable_height=gable_height,
-        tab_length_roof=tab_length_roof,
-        tab_offset_roof=tab_offset_roof,
-        tab_length_x=tab_length_y,
         transform=[
             Rotate((0, 0, 0), (1, 0, 0), 90),
             Rotate((0, 0, 0), (0, 0, 1), -90),
@@ -147,28 +136,38 @@ def basic_house(
         top_layer_no_tabs=True
     )
     fr_vertical_holes = roof_vertical_holes + front_roof_vertical_holes
-    front_roof = roof_panels.roof_v2(
-        name="front_roof",
-        media=roof_media,
-        wall_front_media=wall_front_media,
-        house_length=length,
-        house_width=width,
-        gable_height=gable_height,
-        overhang_left=roof_overhang_left,
-        overhang_right=roof_overhang_right,
-        overhang_bottom=roof_overhang_bottom,
-        layer_count=roof_layer_count,
-        mirror=True,
-        trapezoid=front_roof_trapezoid,
-        left_stepped_triangle=None,
-        vertical_holes=fr_vertical_holes,
-        tab_holes=roof_tab_holes,
-        transform=[
-            Rotate((0, 0, 0), (1, 0, 0), -roof_angle),
-            Translate((0, 0, height + gable_height))
-        ],
-        top_layer_no_tabs=True
-    )
+    front_roof_transform = [
+        Rotate((0, 0, 0), (1, 0, 0), -roof_angle),
+        Translate((0, 0, height + gable_height))
+    ]
+    if front_roof_trapezoid is None and fr_vertical_holes == br_vertical_holes:
+        # The front roof is the mirror image of the back roof
+        front_roof = panels_v2.twin(
+            panel_group=back_roof,
+            name="front_roof",
+            transform=front_roof_transform,
+            mirror_plane="XZ"
+        )
+    else:
+        front_roof = roof_panels.roof_v2(
+            name="front_roof",
+            media=roof_media,
+            wall_front_media=wall_front_media,
+            house_length=length,
+            house_width=width,
+            gable_height=gable_height,
+            overhang_left=roof_overhang_left,
+            overhang_right=roof_overhang_right,
+            overhang_bottom=roof_overhang_bottom,
+            layer_count=roof_layer_count,
+            mirror=True,
+            trapezoid=front_roof_trapezoid,
+            left_stepped_triangle=None,
+            vertical_holes=fr_vertical_holes,
+            tab_holes=roof_tab_holes,
+            transform=front_roof_transform,
+            top_layer_no_tabs=True
+        )
 
     house = PanelGroup(
         name=name,
@@ -213,7 +212,8 @@ def bare_end_house(
     front_roof_trapezoid: Optional[dict] = None,
     front_roof_overlap_height: float = 0,
     no_front_wall: bool = False,
-    back_roof_vertical_holes: list[dict] = []
+    back_roof_vertical_holes: list[dict] = [],
+    use_profiles: bool = False
 ) -> PanelGroup:
     
     original_length = length
@@ -250,6 +250,7 @@ def bare_end_house(
         left_right_tab_direction=TabDirection.OUT,
         tab_length_x=tab_length_x,
         tab_length_y=tab_length_z,
+        use_profiles=use_profiles,
         transform=[
             Rotate((0, 0, 0), (1, 0, 0), 90),
             Rotate((0, 0, 0), (0, 0, 1), 180),
@@ -260,16 +261,10 @@ def bare_end_house(
             ))
         ]
     )
-    back_wall = wall_panels.wall(
+    # The back wall is built from the same parameters as the front wall
+    back_wall = panels_v2.twin(
+        panel_group=front_wall,
         name="back_wall",
-        wall_base_media=wall_base_media,
-        wall_front_media=wall_front_media,
-        wall_back_media=wall_back_media,
-        width=length,
-        height=height,
-        left_right_tab_direction=TabDirection.OUT,
-        tab_length_x=tab_length_x,
-        tab_length_y=tab_length_z,
         transform=[
             Rotate((0, 0, 0), (1, 0, 0), 90),
             Rotate((0, 0, 0), (0, 0, 1), 0),
@@ -294,6 +289,7 @@ def bare_end_house(
         tab_length_y=tab_length_z,
         tab_length_roof=tab_length_roof,
         tab_offset_roof=tab_offset_roof,
+        use_profiles=use_profiles,
         transform=[
             Rotate((0, 0, 0), (1, 0, 0), 90),
             Rotate((0, 0, 0), (0, 0, 1), 90),
@@ -317,6 +313,7 @@ def bare_end_house(
         tab_length_y=tab_length_z,
         tab_length_roof=tab_length_roof,
         tab_offset_roof=tab_offset_roof,
+        use_profiles=use_profiles,
         transform=[
             Rotate((0, 0, 0), (1, 0, 0), 90),
             Rotate((0, 0, 0), (0, 0, 1), -90),
@@ -353,30 +350,41 @@ def bare_end_house(
             Translate((0, 0, height + gable_height))
         ]
     )
-    
-    front_roof = roof_panels.roof_v2(
-        name="front_roof",
-        media=roof_media,
-        wall_front_media=wall_front_media,
-        house_length=original_length,
-        house_width=width,
-        gable_height=gable_height,
-        overhang_left=roof_overhang_left,
-        overhang_right=roof_overhang_right,
-        overhang_bottom=roof_overhang_bottom,
-        layer_count=roof_layer_count,
-        mirror=True,
-        trapezoid=front_roof_trapezoid,
-        left_stepped_triangle=roof_left_stepped_triangle,
-        vertical_holes=roof_vertical_holes,
-        tab_holes=roof_tab_holes,
-        end_taper=roof_end_taper,
-        transform=[
-            Rotate((0, 0, 0), (1, 0, 0), -roof_angle),
-            Translate((0, 0, height + gable_height))
-        ],
-        roof_overlap_height=front_roof_overlap_height
-    )
+
+    front_roof_transform = [
+        Rotate((0, 0, 0), (1, 0, 0), -roof_angle),
+        Translate((0, 0, height + gable_height))
+    ]
+    if (front_roof_trapezoid is None and front_roof_overlap_height == 0 and
+            roof_vertical_holes == br_vertical_holes):
+        # The front roof is the mirror image of the back roof
+        front_roof = panels_v2.twin(
+            panel_group=back_roof,
+            name="front_roof",
+            transform=front_roof_transform,
+            mirror_plane="XZ"
+        )
+    else:
+        front_roof = roof_panels.roof_v2(
+            name="front_roof",
+            media=roof_media,
+            wall_front_media=wall_front_media,
+            house_length=original_length,
+            house_width=width,
+            gable_height=gable_height,
+            overhang_left=roof_overhang_left,
+            overhang_right=roof_overhang_right,
+            overhang_bottom=roof_overhang_bottom,
+            layer_count=roof_layer_count,
+            mirror=True,
+            trapezoid=front_roof_trapezoid,
+            left_stepped_triangle=roof_left_stepped_triangle,
+            vertical_holes=roof_vertical_holes,
+            tab_holes=roof_tab_holes,
+            end_taper=roof_end_taper,
+            transform=front_roof_transform,
+            roof_overlap_height=front_roof_overlap_height
+        )
 
     children = [
         floor
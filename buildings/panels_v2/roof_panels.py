@@ -39,22 +39,12 @@ def roof_panel(
     roof_overhang_d = 0.75 * wall_front_media.thickness / math.sin(math.radians(roof_angle))
     offset_c = -1 if reverse_hole_offsets else 1
 
-    panels = []
-    for i in range(layer_count):
-        if end_taper and layer_count - i > 3:
-            dh = roof_overhang_d * (layer_count - i - 3)
-            height = roof_height - dh
-            offset_y = 0.5 * dh
-        else:
-            height = roof_height
-            offset_y = 0
-
-        roof_wp0 = panels_v2.basic_rect(
+    def build_layer(dh: float) -> Workplane:
+        roof_wp = panels_v2.basic_rect(
             width=roof_width,
-            height=height,
+            height=roof_height - dh,
             thickness=roof_media.thickness
         )
-        roof_wp = roof_wp0
         for chimney_hole in chimney_holes:
             hole_wp = panels_v2.basic_rect(
                 width=chimney_hole["width"],
@@ -62,23 +52,33 @@ def roof_panel(
                 thickness=20
             ).translate((
                 offset_c * chimney_hole["offset_x"] - roof_offset_x,
-                0.5 * roof_height - offset_y,
+                0.5 * roof_height - 0.5 * dh,
                 -5
             ))
             roof_wp = roof_wp - hole_wp
+        return roof_wp
 
-        panels.append(Panel(
-            name=f"p{i}",
-            media=roof_media,
-            workplane=roof_wp,
-            transform=[
-                Translate((
-                    roof_offset_x,
-                    i * roof_media.thickness * tan_a + offset_y,
-                    i * roof_media.thickness
-                ))
-            ]
-        ))
+    # Layers are keyed by how much shorter they are than the roof, so the
+    # layers that aren't tapered are built once
+    layers = []
+    for i in range(layer_count):
+        if end_taper and layer_count - i > 3:
+            dh = roof_overhang_d * (layer_count - i - 3)
+        else:
+            dh = 0
+        layers.append((dh, [
+            Translate((
+                roof_offset_x,
+                i * roof_media.thickness * tan_a + 0.5 * dh,
+                i * roof_media.thickness
+            ))
+        ]))
+
+    panels = panels_v2.stack_panels(
+        media=roof_media,
+        layers=layers,
+        build_layer=build_layer
+    )
 
     roof = PanelGroup(
         name=name,
@@ -0,0 +1,302 @@
+import random
+from typing import Callable
+from buildings import media_v2
+from buildings import panels_v2
+from buildings.panels_v2 import PanelGroup
+from buildings.panels_v2 import houses, window_panels
+from buildings.panels_v2.stokesley_station import platform_shelter
+from buildings.panels_v2.stokesley_station import signal_box
+from buildings.transforms_v2 import Transform, Translate, Rotate
+
+
+# Synthetic streets of parametric buildings, used to measure how building
+# and exporting scale with the number of buildings in a model. The walls
+# and windows of the houses are planar profiles (see use_profiles in
+# wall_panels), so they are only extruded when a solid is needed
+
+
+# Gap between neighbouring buildings in a street
+BUILDING_GAP = 10
+
+# Distance between the centers of neighbouring streets
+STREET_SPACING = 120
+
+# Windows are kept this far in total from the two ends of each wall
+WALL_END_MARGIN = 20
+
+PLATFORM_SHELTER_LENGTH = 182
+SIGNAL_BOX_LENGTH = 73
+
+wall_base_media = media_v2.CARD_2x169mm
+wall_front_media = media_v2.CARD_2x056mm
+wall_back_media = media_v2.CARD_056mm
+window_media = media_v2.CARD_056mm
+roof_media = media_v2.CARD_056mm
+
+
+BuildingBuilder = Callable[[], PanelGroup]
+
+
+def town(
+    name: str,
+    building_count: int,
+    transform: Transform,
+    buildings_per_street: int = 20,
+    seed: int = 0
+) -> PanelGroup:
+    """
+    Builds a town of building_count buildings laid out in parallel streets.
+    The same seed always produces the same town.
+    """
+    builders = get_building_builders(
+        building_count=building_count,
+        buildings_per_street=buildings_per_street,
+        seed=seed)
+
+    return PanelGroup(
+        name=name,
+        children=[builder() for builder in builders],
+        transform=transform
+    )
+
+
+def get_building_builders(
+    building_count: int,
+    buildings_per_street: int = 20,
+    seed: int = 0
+) -> list[BuildingBuilder]:
+    """
+    Gets one builder function per building, each of which builds the
+    building already positioned in its street. Buildings can therefore be
+    built one at a time instead of all at once.
+    """
+    rng = random.Random(seed)
+
+    builders = []
+    x = 0.0
+    for index in range(building_count):
+        street_index, street_position = divmod(index, buildings_per_street)
+        if street_position == 0:
+            x = 0.0
+
+        kind = rng.choices(
+            ["basic_house", "bare_end_house", "platform_shelter", "signal_box"],
+            weights=[50, 25, 15, 10]
+        )[0]
+
+        if kind == "platform_shelter":
+            length = PLATFORM_SHELTER_LENGTH
+        elif kind == "signal_box":
+            length = SIGNAL_BOX_LENGTH
+        else:
+            length = rng.randrange(50, 110, 2)
+
+        offset = (x + 0.5 * length, street_index * STREET_SPACING, 0)
+        x += length + BUILDING_GAP
+
+        builders.append(_get_building_builder(
+            kind=kind,
+            name=f"building_{index}",
+            length=length,
+            offset=offset,
+            rng=rng
+        ))
+
+    return builders
+
+
+def _get_building_builder(
+    kind: str,
+    name: str,
+    length: float,
+    offset: tuple[float, float, float],
+    rng: random.Random
+) -> BuildingBuilder:
+    # Draw all of the random parameters now, so that the town does not
+    # depend on the order in which the buildings are built
+    if kind == "platform_shelter":
+        return lambda: PanelGroup(
+            name=name,
+            children=[platform_shelter.platform_shelter(transform=[])],
+            transform=[Translate(offset)]
+        )
+
+    if kind == "signal_box":
+        return lambda: PanelGroup(
+            name=name,
+            children=[signal_box.signal_box(transform=[
+                Rotate((0, 0, 0), (0, 0, 1), 180)
+            ])],
+            transform=[Translate(offset)]
+        )
+
+    width = rng.randrange(40, 70, 2)
+    height = rng.randrange(50, 90, 2)
+    gable_height = rng.randrange(12, 26, 2)
+    max_window_count = max(1, int((length - WALL_END_MARGIN) // 25))
+    front_window_count = rng.randint(1, max_window_count)
+    back_window_count = rng.randint(0, max_window_count)
+
+    if kind == "basic_house":
+        return lambda: terraced_house(
+            name=name,
+            length=length,
+            width=width,
+            height=height,
+            gable_height=gable_height,
+            front_window_count=front_window_count,
+            back_window_count=back_window_count,
+            transform=[Translate(offset)]
+        )
+
+    return lambda: end_house(
+        name=name,
+        length=length,
+        width=width,
+        height=height,
+        gable_height=gable_height,
+        front_window_count=front_window_count,
+        back_window_count=back_window_count,
+        transform=[Translate(offset)]
+    )
+
+
+def terraced_house(
+    name: str,
+    length: float,
+    width: float,
+    height: float,
+    gable_height: float,
+    front_window_count: int,
+    back_window_count: int,
+    transform: Transform
+) -> PanelGroup:
+    house_pg = houses.basic_house(
+        name=name,
+        wall_base_media=wall_base_media,
+        wall_front_media=wall_front_media,
+        wall_back_media=wall_back_media,
+        roof_media=roof_media,
+        length=length,
+        width=width,
+        height=height,
+        gable_height=gable_height,
+        roof_tab_holes=_roof_tab_holes(length=length, left_overhang=True),
+        tab_offset_roof=2,
+        use_profiles=True,
+        transform=transform
+    )
+    _add_windows(
+        house_pg=house_pg,
+        length=length,
+        height=height,
+        front_window_count=front_window_count,
+        back_window_count=back_window_count)
+
+    return house_pg
+
+
+def end_house(
+    name: str,
+    length: float,
+    width: float,
+    height: float,
+    gable_height: float,
+    front_window_count: int,
+    back_window_count: int,
+    transform: Transform
+) -> PanelGroup:
+    house_pg = houses.bare_end_house(
+        name=name,
+        wall_base_media=wall_base_media,
+        wall_front_media=wall_front_media,
+        wall_back_media=wall_back_media,
+        roof_media=roof_media,
+        length=length,
+        width=width,
+        height=height,
+        gable_height=gable_height,
+        roof_overhang_left=0,
+        roof_tab_holes=_roof_tab_holes(length=length, left_overhang=False),
+        tab_offset_roof=2,
+        use_profiles=True,
+        transform=transform
+    )
+    _add_windows(
+        house_pg=house_pg,
+        length=length,
+        height=height,
+        front_window_count=front_window_count,
+        back_window_count=back_window_count)
+
+    return house_pg
+
+
+def _roof_tab_holes(length: float, left_overhang: bool) -> list[dict]:
+    right_offset_x = (
+        0.5 * length - wall_front_media.thickness -
+        0.5 * wall_base_media.thickness
+    )
+    if left_overhang:
+        left_offset_x = -right_offset_x
+    else:
+        # Left wall with no overhang (open hole at edge of roof)
+        left_offset_x = -(0.5 * length - 0.5 * wall_base_media.thickness)
+
+    return [
+        {
+            "offset_x": left_offset_x,
+            "offset_y": 2,
+            "width": wall_base_media.thickness
+        },
+        {
+            "offset_x": right_offset_x,
+            "offset_y": 2,
+            "width": wall_base_media.thickness
+        }
+    ]
+
+
+def _add_windows(
+    house_pg: PanelGroup,
+    length: float,
+    height: float,
+    front_window_count: int,
+    back_window_count: int
+) -> None:
+    window_width = 11.5
+    window_height = 20
+    walls = [
+        ("front_wall", front_window_count),
+        ("back_wall", back_window_count)
+    ]
+    for wall_name, window_count in walls:
+        if window_count == 0:
+            continue
+
+        wall_pg = panels_v2.get_child_panel_group(
+            panel_group=house_pg,
+            name=wall_name
+        )
+        # Space the windows evenly along the wall, away from the corners
+        window_length = length - WALL_END_MARGIN
+        spacing = window_length / window_count
+        for i in range(window_count):
+            panels_v2.add_child_panel_group(
+                parent=wall_pg,
+                child=window_panels.window(
+                    base_media=wall_base_media,
+                    media=window_media,
+                    window_width=window_width,
+                    window_height=window_height,
+                    sill_width=window_width + 3,
+                    sill_height=2,
+                    window_margin=2,
+                    use_profiles=True,
+                    transform=[Translate((
+                        -0.5 * window_length + (i + 0.5) * spacing,
+                        0.5 * height - 0.5 * window_height - 12,
+                        0
+                    ))]
+                )
+            )
@@ -1,5 +1,6 @@
 from cadquery import Workplane
 from buildings import panels_v2
+from buildings import profiles_v2
 from buildings.media_v2 import Media
 from buildings.panels_v2 import Cutout, Panel, PanelGroup
 from buildings.panels_v2 import window_panels
@@ -59,17 +60,22 @@ def wall(
     transform: Transform,
     name: str = "wall",
     tab_length_x: float = 30,
-    tab_length_y: float = 30
+    tab_length_y: float = 30,
+    use_profiles: bool = False
 ) -> PanelGroup:
+    # The panels are planar profiles rather than solids with use_profiles
+    rect = profiles_v2.rect if use_profiles else panels_v2.rect
+    basic_rect = profiles_v2.rect if use_profiles else panels_v2.basic_rect
+
     if left_right_tab_direction == TabDirection.IN:
         base_wall_width = width - 2 * wall_front_media.thickness
     else:
         base_wall_width = width - 2 * (wall_front_media.thickness + wall_base_media.thickness)
 
-    base_wall = Panel(
+    base_wall = panels_v2.shape_panel(
         name="base_wall",
         media=wall_base_media,
-        workplane=panels_v2.rect(
+        shape=rect(
             width=base_wall_width,
             height=height,
             thickness=wall_base_media.thickness,
@@ -99,10 +105,10 @@ def wall(
     else:
         inside_wall_width = base_wall_width - 2 * (wall_back_media.thickness + 0.25)
 
-    inside_wall = Panel(
+    inside_wall = panels_v2.shape_panel(
         name="inside_wall",
         media=wall_back_media,
-        workplane=panels_v2.basic_rect(
+        shape=basic_rect(
             width=inside_wall_width,
             height=height - 2 * (wall_base_media.thickness + 0.25),
             thickness=wall_back_media.thickness
@@ -115,10 +121,10 @@ def wall(
     else:
         outside_wall_width = width - 2 * wall_front_media.thickness
 
-    outside_wall = Panel(
+    outside_wall = panels_v2.shape_panel(
         name="outside_wall",
         media=wall_front_media,
-        workplane=panels_v2.basic_rect(
+        shape=basic_rect(
             width=outside_wall_width,
             height=height,
             thickness=wall_front_media.thickness
@@ -152,8 +158,13 @@ def gable_wall(
     tab_length_y: float = 30,
     tab_length_roof: float = 20,
     tab_offset_roof: float = 5,
-    roof_top_layer_no_tabs: bool = True
+    roof_top_layer_no_tabs: bool = True,
+    use_profiles: bool = False
 ) -> PanelGroup:
+    # The panels are planar profiles rather than solids with use_profiles
+    basic_rect = profiles_v2.rect if use_profiles else panels_v2.basic_rect
+    gable_panel = profiles_v2.gable_panel if use_profiles else panels_v2.gable_panel
+
     base_wall_width = width - 2 * wall_front_media.thickness
     gable_height_d = 2 * wall_front_media.thickness / width
     base_wall_gable_height = gable_height * (1 - gable_height_d)
@@ -164,10 +175,10 @@ def gable_wall(
     else:
         tab_top_height = roof_layer_count * roof_media.thickness
 
-    base_wall = Panel(
+    base_wall = panels_v2.shape_panel(
         name="base_wall",
         media=wall_base_media,
-        workplane=panels_v2.gable_panel(
+        shape=gable_panel(
             width=base_wall_width,
             height=base_wall_height,
             gable_height=base_wall_gable_height,
@@ -216,10 +227,10 @@ def gable_wall(
 
     inside_wall_width = base_wall_width - 2 * (wall_base_media.thickness + 0.25)
 
-    inside_wall = Panel(
+    inside_wall = panels_v2.shape_panel(
         name="inside_wall",
         media=wall_back_media,
-        workplane=panels_v2.basic_rect(
+        shape=basic_rect(
             width=inside_wall_width,
             height=height - 2 * (wall_base_media.thickness + 0.25),
             thickness=wall_back_media.thickness
@@ -229,10 +240,10 @@ def gable_wall(
     
     outside_wall_width = width
 
-    outside_wall = Panel(
+    outside_wall = panels_v2.shape_panel(
         name="outside_wall",
         media=wall_front_media,
-        workplane=panels_v2.gable_panel(
+        shape=gable_panel(
             width=outside_wall_width,
             height=height,
             gable_height=gable_height,
@@ -267,8 +278,13 @@ def bare_gable_wall(
     tab_length_y: float = 30,
     tab_length_roof: float = 20,
     tab_offset_roof: float = 5,
-    roof_top_layer_no_tabs: bool = True
+    roof_top_layer_no_tabs: bool = True,
+    use_profiles: bool = False
 ) -> PanelGroup:
+    # The panels are planar profiles rather than solids with use_profiles
+    basic_rect = profiles_v2.rect if use_profiles else panels_v2.basic_rect
+    gable_panel = profiles_v2.gable_panel if use_profiles else panels_v2.gable_panel
+
     base_wall_width = width - 2 * wall_front_media.thickness
     gable_height_d = 2 * wall_front_media.thickness / width
     base_wall_gable_height = gable_height * (1 - gable_height_d)
@@ -279,10 +295,10 @@ def bare_gable_wall(
     else:
         tab_top_height = roof_layer_count * roof_media.thickness
 
-    base_wall = Panel(
+    base_wall = panels_v2.shape_panel(
         name="base_wall",
         media=wall_base_media,
-        workplane=panels_v2.gable_panel(
+        shape=gable_panel(
             width=base_wall_width,
             height=base_wall_height,
             gable_height=base_wall_gable_height,
@@ -331,10 +347,10 @@ def bare_gable_wall(
 
     inside_wall_width = base_wall_width - 2 * (wall_base_media.thickness + 0.25)
 
-    inside_wall = Panel(
+    inside_wall = panels_v2.shape_panel(
         name="inside_wall",
         media=wall_back_media,
-        workplane=panels_v2.basic_rect(
+        shape=basic_rect(
             width=inside_wall_width,
             height=height - 2 * (wall_base_media.thickness + 0.25),
             thickness=wall_back_media.thickness
@@ -391,35 +407,28 @@ def connector_slots(
         Workplane("XY")
         .box(hole_width, hole_height, 100)
     )
-    hole0 = Cutout(
-        transform=[
-            Translate((-0.5 * hole_spacing, 0, 0))
-        ],
-        subtract_from=["base_wall", "outside_wall"],
-        # subtract_from=["base_wall", "outside_wall", "inside_wall"],
-        workplane=hole_wp
+    hole_offsets = panels_v2.linear_offsets(
+        count=2,
+        spacing=(hole_spacing, 0, 0)
     )
-    hole1 = Cutout(
-        transform=[
-            Translate((0.5 * hole_spacing, 0, 0))
-        ],
-        subtract_from=["base_wall", "outside_wall"],
-        # subtract_from=["base_wall", "outside_wall", "inside_wall"],
-        workplane=hole_wp
+    # Both slots are cut in one boolean
+    holes = panels_v2.array_cutout(
+        cutout=Cutout(
+            subtract_from=["base_wall", "outside_wall"],
+            # subtract_from=["base_wall", "outside_wall", "inside_wall"],
+            workplane=hole_wp
+        ),
+        offsets=hole_offsets
     )
 
     panels = []
     if include_pins:
-        pin0 = Panel(
-            name="pin0",
+        # Both pins share one solid, and stand in the slots
+        pin = Panel(
+            name="pin",
             transform=[
                 Rotate((0, 0, 0), (1, 0, 0), 90),
-                Rotate((0, 0, 0), (0, 0, 1), 90),
-                Translate((
-                    -0.5 * hole_spacing - 0.5 * base_media.thickness,
-                    0,
-                    0.5 * pin_height
-                ))
+                Rotate((0, 0, 0), (0, 0, 1), 90)
             ],
             media=base_media,
             workplane=panels_v2.basic_rect(
@@ -428,30 +437,18 @@ def connector_slots(
                 thickness=base_media.thickness
             )
         )
-        pin1 = Panel(
-            name="pin1",
-            transform=[
-                Rotate((0, 0, 0), (1, 0, 0), 90),
-                Rotate((0, 0, 0), (0, 0, 1), 90),
-                Translate((
-                    0.5 * hole_spacing - 0.5 * base_media.thickness,
-                    0,
-                    0.5 * pin_height
-                ))
-            ],
-            media=base_media,
-            workplane=panels_v2.basic_rect(
-                width=pin_width,
-                height=pin_height,
-                thickness=base_media.thickness
-            )
+        panels = panels_v2.array_panels(
+            panel=pin,
+            offsets=[
+                (x - 0.5 * base_media.thickness, 0, 0.5 * pin_height)
+                for x, _, _ in hole_offsets
+            ]
         )
-        panels = [pin0, pin1]
 
     return PanelGroup(
         name="connector_slots",
         panels=panels,
-        cutouts=[hole0, hole1],
+        cutouts=[holes],
         transform=transform
     )
 
@@ -1,7 +1,9 @@
 from cadquery import Workplane
 from buildings import panels_v2
+from buildings import profiles_v2
 from buildings.media_v2 import Media
 from buildings.panels_v2 import Panel, PanelGroup, Cutout
+from buildings.profiles_v2 import Profile
 from buildings.transforms_v2 import Transform, Translate, Rotate
 
 
@@ -15,15 +17,19 @@ def window(
     sill_height: float,
     window_margin: float = 1,
     no_vertical_frame: bool = False,
-    top_arc_height: float = 0
+    top_arc_height: float = 0,
+    use_profiles: bool = False
 ) -> PanelGroup:
-    frame = Panel(
+    # The frame, sill and holes are planar profiles rather than solids with
+    # use_profiles, except for the hole of an arched window
+    frame_fn = window_frame_profile if use_profiles else window_frame
+    frame = panels_v2.shape_panel(
         name="frame",
         transform=[
             Translate((0, 0, base_media.thickness - media.thickness))
         ],
         media=media,
-        workplane=window_frame(
+        shape=frame_fn(
             thickness=media.thickness,
             center_frame_thickness=0.75,
             window_width=window_width,
@@ -32,40 +38,63 @@ def window(
             no_vertical_frame=no_vertical_frame
         )
     )
-    sill = Panel(
+    sill_fn = profiles_v2.rect if use_profiles else window_sill
+    sill = panels_v2.shape_panel(
         name="sill",
         transform=[
             Translate((0, -0.5 * window_height - 0.5 * sill_height, base_media.thickness + 2 * media.thickness))
         ],
         media=media,
-        workplane=window_sill(
+        shape=sill_fn(
             thickness=media.thickness,
             width=sill_width,
             height=sill_height
         )
     )
-    base_back_hole = Cutout(
-        transform=[
-            Translate((0, 0, 0))
-        ],
-        subtract_from=["base_wall", "inside_wall"],
-        workplane=window_hole_base(
-            window_width=window_width,
-            window_height=window_height,
-            window_margin=window_margin
+    if use_profiles:
+        base_back_hole = Cutout(
+            workplane=None,
+            subtract_from=["base_wall", "inside_wall"],
+            profile=_window_hole_profile(
+                window_width=window_width,
+                window_height=window_height,
+                window_margin=window_margin
+            )
         )
-    )
-    front_hole = Cutout(
-        transform=[
-            Translate((0, 0, 0))
-        ],
-        subtract_from=["outside_wall"],
-        workplane=window_hole_front(
-            window_width=window_width,
-            window_height=window_height,
-            top_arc_height=top_arc_height
+    else:
+        base_back_hole = Cutout(
+            transform=[
+                Translate((0, 0, 0))
+            ],
+            subtract_from=["base_wall", "inside_wall"],
+            workplane=window_hole_base(
+                window_width=window_width,
+                window_height=window_height,
+                window_margin=window_margin
+            )
+        )
+    if use_profiles and top_arc_height == 0:
+        front_hole = Cutout(
+            workplane=None,
+            subtract_from=["outside_wall"],
+            profile=_window_hole_profile(
+                window_width=window_width,
+                window_height=window_height,
+                window_margin=0
+            )
+        )
+    else:
+        front_hole = Cutout(
+            transform=[
+                Translate((0, 0, 0))
+            ],
+            subtract_from=["outside_wall"],
+            workplane=window_hole_front(
+                window_width=window_width,
+                window_height=window_height,
+                top_arc_height=top_arc_height
+            )
         )
-    )
     return PanelGroup(
         name="window",
         panels=[frame, sill],
@@ -100,6 +129,24 @@ def _window_hole(
     )
 
 
+def _window_hole_profile(
+    window_width: float,
+    window_height: float,
+    window_margin: float
+) -> Profile:
+    """
+    The same hole as _window_hole
+    """
+    return profiles_v2.translate(
+        profile=profiles_v2.rect(
+            width=window_width + 2 * window_margin,
+            height=window_height + 2 * window_margin,
+            thickness=100
+        ),
+        vector=(0, 0, -50)
+    )
+
+
 def window_hole_base(
     window_width: float,
     window_height: float,
@@ -195,6 +242,53 @@ def window_frame(
     return window_panel
 
 
+def window_frame_profile(
+    thickness: float,
+    center_frame_thickness: float,
+    window_width: float,
+    window_height: float,
+    window_margin: float,
+    no_vertical_frame: bool
+) -> Profile:
+    """
+    The same panel as window_frame
+    """
+    frame_thickness = 0.5
+
+    panel = profiles_v2.rect(
+        width=window_width + 2 * window_margin,
+        height=window_height + 2 * window_margin,
+        thickness=thickness
+    )
+    hole = profiles_v2.translate(
+        profile=profiles_v2.rect(
+            width=window_width - 4 * frame_thickness,
+            height=window_height - 6 * frame_thickness,
+            thickness=10
+        ),
+        vector=(0, 0, -5)
+    )
+    horizontal_frame = profiles_v2.rect(
+        width=window_width - 2 * frame_thickness,
+        height=center_frame_thickness,
+        thickness=thickness
+    )
+
+    window_panel = profiles_v2.difference(profile=panel, cutter=hole)
+
+    if not no_vertical_frame:
+        vertical_frame = profiles_v2.rect(
+            width=center_frame_thickness,
+            height=window_height - 4 * frame_thickness,
+            thickness=thickness
+        )
+        window_panel = profiles_v2.union(profile=window_panel, other=vertical_frame)
+
+    window_panel = profiles_v2.union(profile=window_panel, other=horizontal_frame)
+
+    return window_panel
+
+
 def arch_faux_window(
     base_media: Media,
     media: Media,
@@ -280,20 +374,27 @@ def inner_frames(
         thickness=thickness
     )
 
-    wp = None
-    for i in range(1, horizontal_panel_count):
-        f_wp = vert_wp.translate((-0.5 * hole_width + i * horiz_d, 0, 0))
-        if wp is None:
-            wp = f_wp
-        else:
-            wp += f_wp
-        
-    for i in range(1, vertical_panel_count):
-        f_wp = horiz_wp.translate((0, -0.5 * hole_height + i * vert_d, 0))
-        if wp is None:
-            wp = f_wp
-        else:
-            wp += f_wp
+    # The vertical bars between the panes side by side and the horizontal
+    # bars between the panes one above the other
+    bars = []
+    if horizontal_panel_count > 1:
+        bars.append(panels_v2.array_workplane(
+            workplane=vert_wp,
+            offsets=panels_v2.linear_offsets(
+                count=horizontal_panel_count - 1,
+                spacing=(horiz_d, 0, 0))))
+    if vertical_panel_count > 1:
+        bars.append(panels_v2.array_workplane(
+            workplane=horiz_wp,
+            offsets=panels_v2.linear_offsets(
+                count=vertical_panel_count - 1,
+                spacing=(0, vert_d, 0))))
+
+    if len(bars) == 0:
+        return None
+    wp = bars[0]
+    for bars_wp in bars[1:]:
+        wp += bars_wp
 
     return wp
 
@@ -345,10 +446,14 @@ def signal_box_front_window_set(
         thickness=10
     )
 
-    frame0_wp -= C_wp.translate((Cx, 0, -5))
-    frame0_wp -= D_wp.translate((Dx, 0, -5))
-    frame0_wp -= C_wp.translate((-Cx, 0, -5))
-    frame0_wp -= D_wp.translate((-Dx, 0, -5))
+    frame0_wp -= panels_v2.combine_workplanes([
+        panels_v2.array_workplane(
+            workplane=C_wp,
+            offsets=[(Cx, 0, -5), (-Cx, 0, -5)]),
+        panels_v2.array_workplane(
+            workplane=D_wp,
+            offsets=[(Dx, 0, -5), (-Dx, 0, -5)])
+    ])
 
     frame0 = Panel(
         name="frame",
@@ -380,10 +485,6 @@ def signal_box_front_window_set(
         horizontal_panel_count=3,
         vertical_panel_count=3
     )
-    frame1_wp -= C1_wp.translate((Cx, 0, -5))
-    frame1_wp += C1f_wp.translate((Cx, 0, 0))
-    frame1_wp -= C1_wp.translate((-Cx, 0, -5))
-    frame1_wp += C1f_wp.translate((-Cx, 0, 0))
 
     D1w = 2 * c
     D1_offset_x = 0.5 * b + c
@@ -399,15 +500,32 @@ def signal_box_front_window_set(
         horizontal_panel_count=2,
         vertical_panel_count=3
     )
-    frame1_wp -= D1_wp.translate((Dx + D1_offset_x, 0, -5))
-    frame1_wp += D1f_wp.translate((Dx + D1_offset_x, 0, 0))
-    frame1_wp -= D1_wp.translate((Dx - D1_offset_x, 0, -5))
-    frame1_wp += D1f_wp.translate((Dx - D1_offset_x, 0, 0))
 
-    frame1_wp -= D1_wp.translate((-Dx + D1_offset_x, 0, -5))
-    frame1_wp += D1f_wp.translate((-Dx + D1_offset_x, 0, 0))
-    frame1_wp -= D1_wp.translate((-Dx - D1_offset_x, 0, -5))
-    frame1_wp += D1f_wp.translate((-Dx - D1_offset_x, 0, 0))
+    # All of the pane holes are cut, and then all of the inner frames are
+    # added, in one boolean each
+    C1_xs = [Cx, -Cx]
+    D1_xs = [
+        Dx + D1_offset_x,
+        Dx - D1_offset_x,
+        -Dx + D1_offset_x,
+        -Dx - D1_offset_x
+    ]
+    frame1_wp -= panels_v2.combine_workplanes([
+        panels_v2.array_workplane(
+            workplane=C1_wp,
+            offsets=[(x, 0, -5) for x in C1_xs]),
+        panels_v2.array_workplane(
+            workplane=D1_wp,
+            offsets=[(x, 0, -5) for x in D1_xs])
+    ])
+    frame1_wp += panels_v2.combine_workplanes([
+        panels_v2.array_workplane(
+            workplane=C1f_wp,
+            offsets=[(x, 0, 0) for x in C1_xs]),
+        panels_v2.array_workplane(
+            workplane=D1f_wp,
+            offsets=[(x, 0, 0) for x in D1_xs])
+    ])
 
     frame1 = Panel(
         name="frame",
@@ -521,10 +639,10 @@ def signal_box_right_window_set(
         thickness=10
     )
 
-    frame0_wp -= C_wp.translate((Cx, 0, -5))
-    frame0_wp -= D_wp.translate((Dx, 0, -5))
-    # frame0_wp -= C_wp.translate((-Cx, 0, -5))
-    # frame0_wp -= D_wp.translate((-Dx, 0, -5))
+    frame0_wp -= panels_v2.combine_workplanes([
+        C_wp.translate((Cx, 0, -5)),
+        D_wp.translate((Dx, 0, -5))
+    ])
 
     frame0 = Panel(
         name="frame",
@@ -563,10 +681,6 @@ def signal_box_right_window_set(
         horizontal_panel_count=3,
         vertical_panel_count=3
     )
-    frame1_wp -= C1_wp.translate((Cx, 0, -5))
-    frame1_wp += C1f_wp.translate((Cx, 0, 0))
-    # frame1_wp -= C1_wp.translate((-Cx, 0, -5))
-    # frame1_wp += C1f_wp.translate((-Cx, 0, 0))
 
     D1w = 2 * c
     D1_offset_x = 0.5 * b + c
@@ -582,15 +696,20 @@ def signal_box_right_window_set(
         horizontal_panel_count=2,
         vertical_panel_count=3
     )
-    frame1_wp -= D1_wp.translate((Dx + D1_offset_x, 0, -5))
-    frame1_wp += D1f_wp.translate((Dx + D1_offset_x, 0, 0))
-    frame1_wp -= D1_wp.translate((Dx - D1_offset_x, 0, -5))
-    frame1_wp += D1f_wp.translate((Dx - D1_offset_x, 0, 0))
 
-    # frame1_wp -= D1_wp.translate((-Dx + D1_offset_x, 0, -5))
-    # frame1_wp += D1f_wp.translate((-Dx + D1_offset_x, 0, 0))
-    # frame1_wp -= D1_wp.translate((-Dx - D1_offset_x, 0, -5))
-    # frame1_wp += D1f_wp.translate((-Dx - D1_offset_x, 0, 0))
+    D1_xs = [Dx + D1_offset_x, Dx - D1_offset_x]
+    frame1_wp -= panels_v2.combine_workplanes([
+        C1_wp.translate((Cx, 0, -5)),
+        panels_v2.array_workplane(
+            workplane=D1_wp,
+            offsets=[(x, 0, -5) for x in D1_xs])
+    ])
+    frame1_wp += panels_v2.combine_workplanes([
+        C1f_wp.translate((Cx, 0, 0)),
+        panels_v2.array_workplane(
+            workplane=D1f_wp,
+            offsets=[(x, 0, 0) for x in D1_xs])
+    ])
 
     frame1 = Panel(
         name="frame",
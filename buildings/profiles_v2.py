@@ -0,0 +1,370 @@
+import math
+from dataclasses import dataclass
+from decimal import Decimal
+from typing import Optional, Union
+from cadquery import Workplane
+from shapely import affinity
+from shapely.geometry import MultiPolygon, Polygon
+from shapely.geometry.polygon import orient
+from buildings.tabs import Tab, TabDirection
+from buildings.transforms_v2 import Rotate, Transform, Translate
+from buildings.vertices_v2 import Vertex, VertexLoops
+
+
+Geometry = Union[Polygon, MultiPolygon]
+Matrix = list[list[float]]  # 4 x 4 affine transform
+
+# Matrix entries closer than this to their planar values are treated as
+# equal to them (e.g. cos(90) is 6e-17, not 0)
+PLANAR_TOLERANCE = 1e-9
+
+
+@dataclass(eq=False)
+class Profile:
+    """
+    A planar panel: a polygon with holes in the XY plane, extruded from z to
+    z + thickness. Tabs and cutouts are polygon booleans, so a panel that is
+    built from a Profile only needs OCC when its solid is needed (see
+    to_workplane). Profiles are compared by identity, as panels that share
+    a Profile share the work done for it (see panels_v2.stack_panels).
+    """
+    polygon: Geometry
+    thickness: float
+    z: float = 0
+
+
+def polygon(
+    points: list[Vertex],
+    thickness: float,
+    holes: Optional[list[list[Vertex]]] = None
+) -> Profile:
+    return Profile(
+        polygon=orient(Polygon(points, holes=holes)),
+        thickness=thickness)
+
+
+def rect(
+    width: float,
+    height: float,
+    thickness: float,
+    tab_left: Optional[Tab] = None,
+    tab_right: Optional[Tab] = None,
+    tab_bottom: Optional[Tab] = None,
+    tab_top: Optional[Tab] = None
+) -> Profile:
+    """
+    The same panel as panels_v2.rect
+    """
+    w2 = 0.5 * width
+    h2 = 0.5 * height
+    profile = polygon(
+        points=[(-w2, -h2), (w2, -h2), (w2, h2), (-w2, h2)],
+        thickness=thickness)
+
+    return add_tabs(profile=profile, tabs_by_edge=[
+        (((-w2, h2), (-w2, -h2)), tab_left),
+        (((w2, -h2), (w2, h2)), tab_right),
+        (((-w2, -h2), (w2, -h2)), tab_bottom),
+        (((w2, h2), (-w2, h2)), tab_top)
+    ])
+
+
+def gable_panel(
+    width: float,
+    height: float,
+    gable_height: float,
+    thickness: float,
+    tab_left: Optional[Tab] = None,
+    tab_bottom: Optional[Tab] = None,
+    tab_right: Optional[Tab] = None,
+    tab_top_right: Optional[Tab] = None,
+    tab_top_left: Optional[Tab] = None
+) -> Profile:
+    """
+    The same panel as panels_v2.gable_panel
+    """
+    points = [
+        (-0.5 * width, 0.5 * height),
+        (-0.5 * width, -0.5 * height),
+        (0.5 * width, -0.5 * height),
+        (0.5 * width, 0.5 * height),
+        (0, 0.5 * height + gable_height)
+    ]
+    profile = polygon(points=points, thickness=thickness)
+
+    tabs = [tab_left, tab_bottom, tab_right, tab_top_right, tab_top_left]
+    return add_tabs(profile=profile, tabs_by_edge=[
+        ((points[i], points[(i + 1) % len(points)]), tab)
+        for i, tab in enumerate(tabs)
+    ])
+
+
+def add_tabs(
+    profile: Profile,
+    tabs_by_edge: list[tuple[tuple[Vertex, Vertex], Optional[Tab]]]
+) -> Profile:
+    """
+    Adds tabs to edges of the profile, as panels_v2._add_tabs does to the
+    side faces of a panel: an OUT tab is added to the panel and an IN tab
+    is cut from it. Each tab is centered on its edge, moved along the edge
+    by its offset. Tabs must be as thick as the panel.
+    """
+    for_union = []
+    for_difference = []
+    for edge, tab in tabs_by_edge:
+        if tab is None:
+            continue
+        if not math.isclose(tab.thickness, profile.thickness):
+            raise Exception(
+                "Tab thickness must equal the thickness of a profile panel")
+        tab_polygon = _get_tab_polygon(edge=edge, tab=tab)
+        if tab.direction == TabDirection.OUT:
+            for_union.append(tab_polygon)
+        elif tab.direction == TabDirection.IN:
+            for_difference.append(tab_polygon)
+
+    geometry = profile.polygon
+    for tab_polygon in for_difference:
+        geometry = geometry.difference(tab_polygon)
+    for tab_polygon in for_union:
+        geometry = geometry.union(tab_polygon)
+
+    return _with_polygon(profile=profile, geometry=geometry)
+
+
+def union(profile: Profile, other: Profile) -> Profile:
+    if not (math.isclose(profile.z, other.z) and
+            math.isclose(profile.thickness, other.thickness)):
+        raise Exception("Profiles must have the same z and thickness")
+    return _with_polygon(
+        profile=profile,
+        geometry=profile.polygon.union(other.polygon))
+
+
+def difference(profile: Profile, cutter: Profile) -> Profile:
+    if not cuts_through(profile=profile, cutter=cutter):
+        raise Exception("Cutter must extend through the whole profile")
+    return _with_polygon(
+        profile=profile,
+        geometry=profile.polygon.difference(cutter.polygon))
+
+
+def cuts_through(profile: Profile, cutter: Profile) -> bool:
+    return (
+        cutter.z <= profile.z + PLANAR_TOLERANCE and
+        cutter.z + cutter.thickness >=
+            profile.z + profile.thickness - PLANAR_TOLERANCE
+    )
+
+
+def translate(profile: Profile, vector: tuple[float, float, float]) -> Profile:
+    return Profile(
+        polygon=affinity.translate(profile.polygon, vector[0], vector[1]),
+        thickness=profile.thickness,
+        z=profile.z + vector[2])
+
+
+def mirror(profile: Profile, plane: str) -> Profile:
+    """
+    Mirrors the profile in a plane through the origin, as
+    Workplane.mirror(plane) does
+    """
+    if plane == "XY":
+        return Profile(
+            polygon=profile.polygon,
+            thickness=profile.thickness,
+            z=-(profile.z + profile.thickness))
+
+    xfact, yfact = {"YZ": (-1, 1), "XZ": (1, -1)}[plane]
+    geometry = affinity.scale(
+        profile.polygon, xfact=xfact, yfact=yfact, origin=(0, 0))
+    return Profile(
+        polygon=orient(geometry) if isinstance(geometry, Polygon) else geometry,
+        thickness=profile.thickness,
+        z=profile.z)
+
+
+def apply_transforms(
+    profile: Profile,
+    transforms: list[Transform],
+    reverse_transform: Transform
+) -> Optional[Profile]:
+    """
+    Applies the transforms in turn and then the reverse of
+    reverse_transform, as transforms_v2 does to a workplane. Returns None
+    if the result is not in the XY plane, e.g. a cutout that meets a panel
+    at an angle.
+    """
+    matrix = _get_identity_matrix()
+    for transform in transforms:
+        matrix = _multiply(a=_get_matrix(transform=transform), b=matrix)
+    matrix = _multiply(
+        a=_get_reverse_matrix(transform=reverse_transform),
+        b=matrix)
+
+    m = matrix
+    is_planar = all([
+        abs(value) < PLANAR_TOLERANCE
+        for value in [m[0][2], m[1][2], m[2][0], m[2][1]]
+    ]) and abs(abs(m[2][2]) - 1) < PLANAR_TOLERANCE
+    if not is_planar:
+        return None
+
+    geometry = affinity.affine_transform(
+        profile.polygon,
+        [m[0][0], m[0][1], m[1][0], m[1][1], m[0][3], m[1][3]])
+    z_values = [
+        m[2][2] * z + m[2][3]
+        for z in [profile.z, profile.z + profile.thickness]
+    ]
+    return Profile(
+        polygon=orient(geometry) if isinstance(geometry, Polygon) else geometry,
+        thickness=profile.thickness,
+        z=min(z_values))
+
+
+def get_vertex_loops(profile: Profile) -> VertexLoops:
+    """
+    Gets the outline and holes of the profile, as
+    vertices_v2.get_panel_vertex_loops gets them from the top view of the
+    extruded panel (which mirrors x) but without rendering it.
+    """
+    loops: VertexLoops = {}
+    for part in _get_parts(geometry=profile.polygon):
+        for ring in [part.exterior] + list(part.interiors):
+            loops[len(loops)] = [
+                (_round(-x), _round(y))
+                for x, y in ring.coords[:-1]
+            ]
+    return loops
+
+
+def to_workplane(profile: Profile) -> Workplane:
+    """
+    Extrudes the profile to a solid
+    """
+    sketch = Workplane("XY").sketch()
+    for part in _get_parts(geometry=profile.polygon):
+        sketch = sketch.polygon(list(part.exterior.coords), mode="a")
+        for interior in part.interiors:
+            sketch = sketch.polygon(list(interior.coords), mode="s")
+
+    workplane = sketch.finalize().extrude(profile.thickness)
+    if profile.z != 0:
+        workplane = workplane.translate((0, 0, profile.z))
+    return workplane
+
+
+def _with_polygon(profile: Profile, geometry: Geometry) -> Profile:
+    # simplify(0) removes the vertices left in the middle of straight edges
+    # where polygons were joined, as a union of solids does
+    return Profile(
+        polygon=geometry.simplify(0),
+        thickness=profile.thickness,
+        z=profile.z)
+
+
+def _get_parts(geometry: Geometry) -> list[Polygon]:
+    if isinstance(geometry, MultiPolygon):
+        return list(geometry.geoms)
+    if geometry.is_empty:
+        return []
+    return [geometry]
+
+
+def _get_tab_polygon(edge: tuple[Vertex, Vertex], tab: Tab) -> Polygon:
+    (x0, y0), (x1, y1) = edge
+    length = math.hypot(x1 - x0, y1 - y0)
+    # Along the edge and away from the panel, for an anticlockwise outline
+    ux, uy = (x1 - x0) / length, (y1 - y0) / length
+    nx, ny = uy, -ux
+
+    # The tab is a tab.width x 2 * tab.height box centered on the edge, so
+    # tab.height of it is outside the panel
+    cx = 0.5 * (x0 + x1) + tab.offset * -ny
+    cy = 0.5 * (y0 + y1) + tab.offset * nx
+    w2 = 0.5 * tab.width
+    return Polygon([
+        (cx + sw * w2 * -ny + sh * tab.height * nx,
+         cy + sw * w2 * nx + sh * tab.height * ny)
+        for sw, sh in [(-1, -1), (1, -1), (1, 1), (-1, 1)]
+    ])
+
+
+def _round(value: float) -> float:
+    # As vertices_v2._format_vertex_str, and "+ 0" so that there is no -0.0
+    return float(f"{Decimal(value):.8f}") + 0
+
+
+def _get_identity_matrix() -> Matrix:
+    return [[1.0 if i == j else 0.0 for j in range(4)] for i in range(4)]
+
+
+def _multiply(a: Matrix, b: Matrix) -> Matrix:
+    return [
+        [sum([a[i][k] * b[k][j] for k in range(4)]) for j in range(4)]
+        for i in range(4)
+    ]
+
+
+def _get_translate_matrix(vector: tuple[float, float, float]) -> Matrix:
+    matrix = _get_identity_matrix()
+    for i in range(3):
+        matrix[i][3] = vector[i]
+    return matrix
+
+
+def _get_rotate_matrix(rotate: Rotate, angle: float) -> Matrix:
+    # Rotation by angle degrees about the axis from startVector to endVector
+    p = rotate.startVector
+    d = [rotate.endVector[i] - p[i] for i in range(3)]
+    length = math.sqrt(sum([v * v for v in d]))
+    u = [v / length for v in d]
+    c = math.cos(math.radians(angle))
+    s = math.sin(math.radians(angle))
+    cross = [
+        [0, -u[2], u[1]],
+        [u[2], 0, -u[0]],
+        [-u[1], u[0], 0]
+    ]
+    r = [
+        [
+            (c if i == j else 0) + s * cross[i][j] + (1 - c) * u[i] * u[j]
+            for j in range(3)
+        ]
+        for i in range(3)
+    ]
+
+    matrix = _get_identity_matrix()
+    for i in range(3):
+        for j in range(3):
+            matrix[i][j] = r[i][j]
+        matrix[i][3] = p[i] - sum([r[i][j] * p[j] for j in range(3)])
+    return matrix
+
+
+def _get_matrix(transform: Transform) -> Matrix:
+    matrix = _get_identity_matrix()
+    for tf in transform:
+        if type(tf) is Translate:
+            tf_matrix = _get_translate_matrix(vector=tf.vector)
+        elif type(tf) is Rotate:
+            tf_matrix = _get_rotate_matrix(rotate=tf, angle=tf.angle)
+        else:
+            raise Exception("Unknown transform operation")
+        matrix = _multiply(a=tf_matrix, b=matrix)
+    return matrix
+
+
+def _get_reverse_matrix(transform: Transform) -> Matrix:
+    matrix = _get_identity_matrix()
+    for tf in reversed(transform):
+        if type(tf) is Translate:
+            tf_matrix = _get_translate_matrix(
+                vector=(-tf.vector[0], -tf.vector[1], -tf.vector[2]))
+        elif type(tf) is Rotate:
+            tf_matrix = _get_rotate_matrix(rotate=tf, angle=-tf.angle)
+        else:
+            raise Exception("Unknown transform operation")
+        matrix = _multiply(a=tf_matrix, b=matrix)
+    return matrix
@@ -0,0 +1,283 @@
+import contextlib
+import functools
+import importlib
+import inspect
+import json
+import pkgutil
+import time
+from dataclasses import dataclass, field
+from typing import Any, Callable, Iterator, Optional
+from cadquery import Compound, Shape, Solid, Workplane
+from buildings import panels_v2
+from buildings.panels_v2 import PanelGroup
+
+
+# Helpers in the panels_v2 package itself that are profiled. All functions
+# in the panels_v2 submodules (houses, chimneys, window_panels, etc.) are
+# profiled as well.
+PROFILED_HELPERS = [
+    "rect",
+    "gable_panel",
+    "_add_tabs",
+    "apply_cutouts_from_children"
+]
+
+# OCC operations counted by the profiler
+BOOLEAN_METHODS = ["fuse", "cut", "intersect"]
+TRANSFORM_METHODS = ["translate", "rotate", "rotateAboutCenter", "mirror"]
+
+
+@dataclass
+class ProfileNode:
+    name: str
+    start: float
+    duration: float = 0
+    panel_group_name: Optional[str] = None
+    boolean_count: int = 0
+    transform_count: int = 0
+    face_count: int = 0
+    edge_count: int = 0
+    children: list["ProfileNode"] = field(default_factory=list)
+
+    @property
+    def self_duration(self) -> float:
+        return self.duration - sum([c.duration for c in self.children])
+
+    @property
+    def total_boolean_count(self) -> int:
+        return self.boolean_count + sum(
+            [c.total_boolean_count for c in self.children])
+
+    @property
+    def total_transform_count(self) -> int:
+        return self.transform_count + sum(
+            [c.total_transform_count for c in self.children])
+
+
+class Profiler:
+    """
+    Records a tree of ProfileNodes, one per profiled call, while the
+    profile() context is active.
+    """
+
+    def __init__(self) -> None:
+        self.start = time.perf_counter()
+        self.root = ProfileNode(name="root", start=self.start)
+        self._stack = [self.root]
+        # Booleans call each other internally (e.g. Compound.cut), so only
+        # the outermost call is counted
+        self._boolean_depth = 0
+
+    def call(self, name: str, fn: Callable, args: tuple, kwargs: dict) -> Any:
+        node = ProfileNode(name=name, start=time.perf_counter())
+        self._stack[-1].children.append(node)
+        self._stack.append(node)
+        try:
+            result = fn(*args, **kwargs)
+        finally:
+            node.duration = time.perf_counter() - node.start
+            self._stack.pop()
+
+        if type(result) is PanelGroup:
+            node.panel_group_name = result.name
+        node.face_count, node.edge_count = _get_face_edge_counts(
+            result=result, args=args, kwargs=kwargs)
+
+        return result
+
+    def count_boolean(self, fn: Callable, args: tuple, kwargs: dict) -> Any:
+        if self._boolean_depth == 0:
+            self._stack[-1].boolean_count += 1
+        self._boolean_depth += 1
+        try:
+            return fn(*args, **kwargs)
+        finally:
+            self._boolean_depth -= 1
+
+    def count_transform(self, fn: Callable, args: tuple, kwargs: dict) -> Any:
+        self._stack[-1].transform_count += 1
+        return fn(*args, **kwargs)
+
+    def get_nodes(self) -> list[ProfileNode]:
+        """
+        Gets all recorded nodes (excluding the root) in call order.
+        """
+        nodes = []
+
+        def add_nodes(node: ProfileNode) -> None:
+            for child in node.children:
+                nodes.append(child)
+                add_nodes(child)
+
+        add_nodes(self.root)
+        return nodes
+
+    def to_chrome_trace(self) -> dict:
+        """
+        Gets the profile in the Chrome trace event format, which can be
+        opened with chrome://tracing or https://ui.perfetto.dev
+        """
+        events = []
+        for node in self.get_nodes():
+            events.append({
+                "name": _get_display_name(node=node),
+                "cat": "panel_group" if node.panel_group_name else "helper",
+                "ph": "X",
+                "ts": 1e6 * (node.start - self.start),
+                "dur": 1e6 * node.duration,
+                "pid": 1,
+                "tid": 1,
+                "args": {
+                    "booleans": node.total_boolean_count,
+                    "transforms": node.total_transform_count,
+                    "faces": node.face_count,
+                    "edges": node.edge_count
+                }
+            })
+
+        return {"traceEvents": events, "displayTimeUnit": "ms"}
+
+    def write_chrome_trace(self, filepath: str) -> None:
+        with open(filepath, "w") as f:
+            f.write(json.dumps(self.to_chrome_trace()))
+
+    def get_top_table(self, count: int = 20) -> list[str]:
+        """
+        Gets a flat table of the profiled functions, aggregated over all
+        calls and sorted by self time. Booleans and transforms are the ones
+        performed directly by the function, not by the functions it calls.
+        """
+        rows_by_name: dict[str, dict] = {}
+        for node in self.get_nodes():
+            row = rows_by_name.setdefault(node.name, {
+                "calls": 0, "total": 0, "self": 0, "booleans": 0,
+                "transforms": 0
+            })
+            row["calls"] += 1
+            row["self"] += node.self_duration
+            row["booleans"] += node.boolean_count
+            row["transforms"] += node.transform_count
+
+        # Only count the outermost call of recursive functions in the total
+        def add_totals(node: ProfileNode, active_names: set[str]) -> None:
+            for child in node.children:
+                if child.name not in active_names:
+                    rows_by_name[child.name]["total"] += child.duration
+                add_totals(child, active_names | {child.name})
+
+        add_totals(self.root, set())
+
+        sorted_rows = sorted(
+            rows_by_name.items(),
+            key=lambda item: item[1]["self"],
+            reverse=True)
+
+        lines = [
+            f"{'function':<48} {'calls':>6} {'total s':>9} {'self s':>9} "
+            f"{'booleans':>9} {'transforms':>10}"
+        ]
+        for name, row in sorted_rows[:count]:
+            lines.append(
+                f"{name:<48} {row['calls']:>6} {row['total']:>9.3f} "
+                f"{row['self']:>9.3f} {row['booleans']:>9} "
+                f"{row['transforms']:>10}")
+
+        return lines
+
+
+@contextlib.contextmanager
+def profile() -> Iterator[Profiler]:
+    """
+    Opt-in instrumentation of PanelGroup construction. Builder functions and
+    helpers are wrapped only while the context is active, e.g.
+
+        with profiling_v2.profile() as profiler:
+            pg = signal_box.signal_box(transform=[])
+        profiler.write_chrome_trace("signal-box-trace.json")
+    """
+    profiler = Profiler()
+    originals: list[tuple[Any, str, Any]] = []
+
+    def patch(owner: Any, attr_name: str, wrapper: Callable) -> None:
+        fn = getattr(owner, attr_name)
+        originals.append((owner, attr_name, fn))
+        setattr(owner, attr_name, functools.wraps(fn)(wrapper(fn)))
+
+    def call_wrapper(name: str) -> Callable:
+        def wrapper(fn: Callable) -> Callable:
+            return lambda *args, **kwargs: profiler.call(name, fn, args, kwargs)
+        return wrapper
+
+    def boolean_wrapper(fn: Callable) -> Callable:
+        return lambda *args, **kwargs: profiler.count_boolean(fn, args, kwargs)
+
+    def transform_wrapper(fn: Callable) -> Callable:
+        return lambda *args, **kwargs: profiler.count_transform(fn, args, kwargs)
+
+    for attr_name in PROFILED_HELPERS:
+        patch(panels_v2, attr_name, call_wrapper(attr_name))
+
+    for module in _get_builder_modules():
+        short_name = module.__name__.split(".")[-1]
+        for attr_name, fn in inspect.getmembers(module, inspect.isfunction):
+            if fn.__module__ == module.__name__:
+                patch(module, attr_name, call_wrapper(f"{short_name}.{attr_name}"))
+
+    # Only patch methods defined on each class so that inherited methods
+    # are not wrapped twice
+    for cls in [Shape, Solid, Compound]:
+        for attr_name in BOOLEAN_METHODS:
+            if attr_name in cls.__dict__:
+                patch(cls, attr_name, boolean_wrapper)
+
+    for attr_name in TRANSFORM_METHODS:
+        patch(Workplane, attr_name, transform_wrapper)
+
+    try:
+        yield profiler
+    finally:
+        for owner, attr_name, fn in reversed(originals):
+            setattr(owner, attr_name, fn)
+
+
+def _get_builder_modules() -> list:
+    modules = []
+    for module_info in pkgutil.walk_packages(
+        panels_v2.__path__, prefix=f"{panels_v2.__name__}."
+    ):
+        modules.append(importlib.import_module(module_info.name))
+    return modules
+
+
+def _get_display_name(node: ProfileNode) -> str:
+    if node.panel_group_name:
+        return f"{node.name} [{node.panel_group_name}]"
+    return node.name
+
+
+def _get_face_edge_counts(result: Any, args: tuple, kwargs: dict) -> tuple[int, int]:
+    # apply_cutouts_from_children returns None, so count its panel group
+    if result is None:
+        result = kwargs.get("panel_group") or (args[0] if args else None)
+
+    if type(result) is PanelGroup:
+        # Profile panels that have not been extruded have no faces yet
+        workplanes = [
+            panel.workplane
+            for panel in result.panels
+            if panel.workplane is not None
+        ]
+    elif isinstance(result, Workplane):
+        workplanes = [result]
+    else:
+        return 0, 0
+
+    face_count = 0
+    edge_count = 0
+    for workplane in workplanes:
+        for obj in workplane.vals():
+            if isinstance(obj, Shape):
+                face_count += len(obj.Faces())
+                edge_count += len(obj.Edges())
+
+    return face_count, edge_count
@@ -58,3 +58,36 @@ def apply_reverse_transform(
             raise Exception("Unknown transform operation")
     
     return transformed_workplane
+
+
+# The coordinate that a mirror in each plane through the origin negates
+MIRROR_AXES = {"YZ": 0, "XZ": 1, "XY": 2}
+
+
+def mirror_vector(vector: Vector, plane: str) -> Vector:
+    axis = MIRROR_AXES[plane]
+    return tuple(-v if i == axis else v for i, v in enumerate(vector))
+
+
+def mirror_transform(transform: Transform, plane: str) -> Transform:
+    """
+    Gets the transform that places the mirror image of a workplane where
+    the mirror image of the transformed workplane would be, i.e. applying
+    it to the mirrored workplane is the same as applying transform and then
+    mirroring.
+    """
+    mirrored_transform: Transform = []
+    for tf in transform:
+        if type(tf) is Translate:
+            mirrored_transform.append(Translate(
+                mirror_vector(vector=tf.vector, plane=plane)))
+        elif type(tf) is Rotate:
+            # A mirror reverses the direction of rotation
+            mirrored_transform.append(Rotate(
+                mirror_vector(vector=tf.startVector, plane=plane),
+                mirror_vector(vector=tf.endVector, plane=plane),
+                -tf.angle))
+        else:
+            raise Exception("Unknown transform operation")
+
+    return mirrored_transform
@@ -1,4 +1,6 @@
+import itertools
 import re
+import numpy as np
 from decimal import Decimal
 from cadquery import exporters, Workplane
 
@@ -143,21 +145,15 @@ def get_width_height(
         panel_vertices: VertexLoops
 ) -> tuple[float, float, float, float]:
     # Get width and height
-    xs = []
-    ys = []
-    for vertices in panel_vertices.values():
-        xs.extend([v[0] for v in vertices])
-        ys.extend([v[1] for v in vertices])
+    coords = np.fromiter(
+        itertools.chain.from_iterable(
+            itertools.chain.from_iterable(panel_vertices.values())),
+        dtype=np.float64).reshape(-1, 2)
+    mins = coords.min(axis=0)
+    maxs = coords.max(axis=0)
 
-    # print("XXX")
-    # print(xs)
-    # print(ys)
-
-    center_offset_x = 0.5 * (min(xs) + max(xs))
-    center_offset_y = 0.5 * (min(ys) + max(ys))
-    
-    width = max(xs) - min(xs)
-    height = max(ys) - min(ys)
+    center_offset_x, center_offset_y = (0.5 * (mins + maxs)).tolist()
+    width, height = (maxs - mins).tolist()
 
     return width, height, center_offset_x, center_offset_y
 
@@ -185,3 +181,17 @@ def _format_vertex_str(vertex_str: str) -> str:
 def _vertex_tuple(vertex_str: str) -> Vertex:
     x, y = vertex_str.split(",")
     return (float(x), float(y))
+
+
+def mirror_vertex_loops(vertex_loops: VertexLoops, plane: str) -> VertexLoops:
+    """
+    Gets the vertex loops of the mirror image of a panel, mirrored in a
+    plane through the origin, from the vertex loops of the panel. The top
+    view mirrors x, and a mirror in the XY plane doesn't change the outline.
+    """
+    # Note: the "+ 0" ensures that we never see -0.0, only 0.0
+    sx, sy = {"YZ": (-1, 1), "XZ": (1, -1), "XY": (1, 1)}[plane]
+    return {
+        loop_index: [(sx * x + 0, sy * y + 0) for x, y in vertices]
+        for loop_index, vertices in vertex_loops.items()
+    }
@@ -0,0 +1,83 @@
+import argparse
+import sys
+from buildings import daemon_v2
+
+
+def main():
+    parser = argparse.ArgumentParser(
+        description="Build daemon that keeps cadquery imported between builds")
+    parser.add_argument("--socket", default=daemon_v2.DEFAULT_SOCKET_PATH)
+    subparsers = parser.add_subparsers(dest="command", required=True)
+
+    subparsers.add_parser(
+        "start", help="Run the daemon (with ./cq-python) until stopped")
+    subparsers.add_parser("stop", help="Stop the daemon")
+    subparsers.add_parser("status", help="Show the daemon status")
+
+    build_parser = subparsers.add_parser(
+        "build", help="Build and export models, as render.py does")
+    build_parser.add_argument("models", nargs="+")
+    build_parser.add_argument(
+        "--no-svgs",
+        action="store_true",
+        help="Only export the mesh and edges")
+    build_parser.add_argument(
+        "--cache",
+        action="store_true",
+        help="Load unchanged parts of the models from the build cache")
+    build_parser.add_argument(
+        "--clean",
+        action="store_true",
+        help="Merge the coplanar faces and collinear edges of the panels before exporting")
+
+    test_parser = subparsers.add_parser("test", help="Run the unit tests")
+    test_parser.add_argument(
+        "names",
+        nargs="*",
+        help="Tests to run, e.g. test_buildings.test_edges_v2 (default: all)")
+
+    run_parser = subparsers.add_parser(
+        "run",
+        help="Run a script, exporting objects passed to show_object() as glTF")
+    run_parser.add_argument("path")
+
+    args = parser.parse_args()
+    if args.command == "start":
+        daemon_v2.serve(socket_path=args.socket)
+        return
+
+    request_args = {}
+    if args.command == "build":
+        request_args = {
+            "model_names": args.models,
+            "include_svgs": not args.no_svgs,
+            "use_build_cache": args.cache,
+            "clean_topology": args.clean
+        }
+    elif args.command == "test":
+        request_args = {"names": args.names}
+    elif args.command == "run":
+        request_args = {"path": args.path}
+
+    try:
+        result = daemon_v2.request(
+            command=args.command,
+            args=request_args,
+            socket_path=args.socket)
+    except daemon_v2.DaemonNotRunningError as e:
+        print(f"{e}. Start it with: ./cq-python daemon.py start", file=sys.stderr)
+        sys.exit(2)
+    except Exception as e:
+        print(e, file=sys.stderr)
+        sys.exit(1)
+
+    if args.command == "status":
+        print(
+            f"pid {result['pid']}, up {result['uptimeSeconds']:.0f}s, "
+            f"{result['requestCount']} requests, {result['reloadCount']} reloads")
+    elif args.command == "test" and not result["wasSuccessful"]:
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,122 @@
+import gzip
+import hashlib
+import os
+import tempfile
+import threading
+
+try:
+    import brotli
+except ImportError:
+    # Optional: without it only gzip variants are served
+    brotli = None
+
+
+# Extensions of the files that are also served pre-compressed
+COMPRESSIBLE_EXTENSIONS = [".bin", ".glb", ".gltf", ".json"]
+
+GZIP = "gzip"
+BROTLI = "br"
+
+_SIDECAR_SUFFIXES = {
+    GZIP: ".gz",
+    BROTLI: ".br"
+}
+
+_HASH_CHUNK_SIZE = 1024 * 1024
+
+
+class AssetCache:
+    """
+    Keeps the content hash of each served file, and pre-compressed variants
+    of the files with COMPRESSIBLE_EXTENSIONS in a sidecar cache directory.
+    Hashes are only recomputed when the modification time or size of a file
+    changes. Sidecar files are named after the hash of the file they were
+    compressed from, so a changed file never matches an old sidecar, which
+    is removed when the new one is written.
+    """
+
+    def __init__(self, cache_dirpath):
+        self.cache_dirpath = cache_dirpath
+        self._lock = threading.Lock()
+        # The (mtime, size, hash) of each file by path
+        self._hashes = {}
+
+    def get_hash(self, path):
+        stat = os.stat(path)
+        with self._lock:
+            cached = self._hashes.get(path)
+        if cached is not None and cached[:2] == (stat.st_mtime_ns, stat.st_size):
+            return cached[2]
+
+        content_hash = _hash_file(path=path)
+        with self._lock:
+            self._hashes[path] = (stat.st_mtime_ns, stat.st_size, content_hash)
+        return content_hash
+
+    def get_encodings(self, path):
+        """
+        Gets the encodings in which the file can be served, in order of
+        preference.
+        """
+        if os.path.splitext(path)[1].lower() not in COMPRESSIBLE_EXTENSIONS:
+            return []
+        if brotli is None:
+            return [GZIP]
+        return [BROTLI, GZIP]
+
+    def get_compressed_path(self, path, encoding):
+        """
+        Gets the path of the sidecar file with the file compressed with the
+        encoding, writing it if it does not exist yet.
+        """
+        content_hash = self.get_hash(path=path)
+        filename = os.path.basename(path)
+        sidecar_prefix = f"{filename}."
+        sidecar_path = os.path.join(
+            self.cache_dirpath,
+            f"{sidecar_prefix}{content_hash}{_SIDECAR_SUFFIXES[encoding]}")
+        if os.path.exists(sidecar_path):
+            return sidecar_path
+
+        os.makedirs(self.cache_dirpath, exist_ok=True)
+        with open(path, "rb") as f:
+            content = f.read()
+        if encoding == BROTLI:
+            compressed_content = brotli.compress(content)
+        else:
+            compressed_content = gzip.compress(content, compresslevel=9, mtime=0)
+
+        # Write to a temporary file first, so that a request in another
+        # thread never serves a partly written sidecar
+        fd, temp_path = tempfile.mkstemp(dir=self.cache_dirpath, suffix=".tmp")
+        try:
+            with os.fdopen(fd, "wb") as f:
+                f.write(compressed_content)
+            os.replace(temp_path, sidecar_path)
+        except BaseException:
+            os.remove(temp_path)
+            raise
+
+        # Remove the sidecars of older versions of the file
+        for other_filename in os.listdir(self.cache_dirpath):
+            is_old_sidecar = (
+                other_filename.startswith(sidecar_prefix) and
+                other_filename.endswith(_SIDECAR_SUFFIXES[encoding]) and
+                other_filename != os.path.basename(sidecar_path) and
+                len(other_filename) == len(os.path.basename(sidecar_path))
+            )
+            if is_old_sidecar:
+                try:
+                    os.remove(os.path.join(self.cache_dirpath, other_filename))
+                except FileNotFoundError:
+                    pass
+
+        return sidecar_path
+
+
+def _hash_file(path):
+    sha256 = hashlib.sha256()
+    with open(path, "rb") as f:
+        for chunk in iter(lambda: f.read(_HASH_CHUNK_SIZE), b""):
+            sha256.update(chunk)
+    return sha256.hexdigest()
@@ -0,0 +1,146 @@
+import os
+import tempfile
+import threading
+
+try:
+    from PIL import Image, ImageOps
+except ImportError:
+    # Optional: without Pillow only the full size images can be served
+    Image = None
+    ImageOps = None
+
+
+FULL = "full"
+
+# The maximum width and height of each downscaled size
+SIZES = {
+    "thumbnail": 256,
+    "screen": 2048
+}
+
+IMAGE_EXTENSIONS = [".jpg", ".jpeg", ".png"]
+
+JPEG_QUALITY = 85
+
+
+def is_available():
+    return Image is not None
+
+
+class ImageCache:
+    """
+    Keeps downscaled variants of the photos in a cache directory. Each
+    variant is named after the modification time of the photo it was made
+    from, so a changed photo never matches an old variant, which is removed
+    when the new one is written.
+    """
+
+    def __init__(self, cache_dirpath):
+        self.cache_dirpath = cache_dirpath
+        self._lock = threading.Lock()
+        # The (path, mtime, size) of the images that are already no larger
+        # than the size
+        self._small_images = set()
+
+    def get_variant_path(self, path, size):
+        """
+        Gets the path of the file to serve for the size of the image at the
+        path, writing the downscaled variant if it does not exist yet. The
+        path itself is returned for the full size, for files that are not
+        images, and for images that are already no larger than the size.
+        """
+        if size != FULL and size not in SIZES:
+            raise Exception(f"Unknown image size: {size}")
+        if size == FULL or not is_image(path=path):
+            return path
+        if not is_available():
+            raise Exception("Pillow is not installed")
+
+        mtime = os.stat(path).st_mtime_ns
+        if (path, mtime, size) in self._small_images:
+            return path
+
+        stem, ext = os.path.splitext(os.path.basename(path))
+        variant_prefix = f"{stem}.{size}."
+        variant_filename = f"{variant_prefix}{mtime}{ext}"
+        variant_path = os.path.join(self.cache_dirpath, variant_filename)
+        if os.path.exists(variant_path):
+            return variant_path
+
+        # Downscaling large photos is slow, so only do it once when several
+        # requests for the same size arrive together
+        with self._lock:
+            if os.path.exists(variant_path):
+                return variant_path
+
+            with Image.open(path) as image:
+                # Apply the EXIF orientation, as the EXIF data is not kept
+                image = ImageOps.exif_transpose(image)
+                max_dimension = SIZES[size]
+                if max(image.size) <= max_dimension:
+                    self._small_images.add((path, mtime, size))
+                    return path
+
+                image.thumbnail((max_dimension, max_dimension), Image.LANCZOS)
+                _save_image_atomic(image=image, path=variant_path)
+
+            # Remove the variants of older versions of the photo
+            for filename in os.listdir(self.cache_dirpath):
+                is_old_variant = (
+                    filename.startswith(variant_prefix) and
+                    filename.endswith(ext) and
+                    filename != variant_filename and
+                    filename[len(variant_prefix):-len(ext)].isdigit()
+                )
+                if is_old_variant:
+                    try:
+                        os.remove(os.path.join(self.cache_dirpath, filename))
+                    except FileNotFoundError:
+                        pass
+
+        return variant_path
+
+    def generate_variants(self, dirpath):
+        """
+        Writes any missing variants of all the images in the directory and
+        returns the number of images.
+        """
+        if not is_available():
+            raise Exception("Pillow is not installed")
+
+        image_count = 0
+        for filename in sorted(os.listdir(dirpath)):
+            path = os.path.join(dirpath, filename)
+            if not os.path.isfile(path) or not is_image(path=path):
+                continue
+            for size in SIZES:
+                self.get_variant_path(path=path, size=size)
+            image_count += 1
+
+        return image_count
+
+
+def is_image(path):
+    return os.path.splitext(path)[1].lower() in IMAGE_EXTENSIONS
+
+
+def _save_image_atomic(image, path):
+    dirpath = os.path.dirname(path)
+    os.makedirs(dirpath, exist_ok=True)
+    ext = os.path.splitext(path)[1]
+    fd, temp_path = tempfile.mkstemp(dir=dirpath, suffix=ext)
+    try:
+        with os.fdopen(fd, "wb") as f:
+            if ext.lower() == ".png":
+                image.save(f, format="PNG", optimize=True)
+            else:
+                image.convert("RGB").save(
+                    f,
+                    format="JPEG",
+                    quality=JPEG_QUALITY,
+                    optimize=True,
+                    progressive=True)
+        os.replace(temp_path, path)
+    except BaseException:
+        os.remove(temp_path)
+        raise
@@ -0,0 +1,101 @@
+import hashlib
+import json
+import threading
+
+
+# Fields of each photo included in the scene summaries
+PHOTO_SUMMARY_KEYS = ["id", "filename", "width", "height"]
+
+
+class IndexCache:
+    """
+    Keeps the DataIndex of the latest data. The store never modifies data
+    in place, so the index only has to be rebuilt when the data object
+    changes.
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._index = None
+
+    def get_index(self, data):
+        with self._lock:
+            if self._index is None or self._index.data is not data:
+                self._index = DataIndex(data=data, previous=self._index)
+            return self._index
+
+
+class DataIndex:
+    """
+    Index of the scenes and photos of the data by id, with an ETag for each
+    scene and photo. ETags are hashes of the JSON content, computed when
+    first requested. The ETags of scenes and photos that are the same
+    objects as in the previous index are kept, so a change to one photo
+    only rehashes that photo and its scene.
+    """
+
+    def __init__(self, data, previous=None):
+        self.data = data
+        self.scenes_by_id = {}
+        self.photos_by_scene_id = {}
+        self._scene_summaries = None
+        self._scene_summaries_etag = None
+        # ETags by the id() of the scene or photo. The objects are kept
+        # alive by self.data, so their ids cannot be reused.
+        self._etags = {}
+
+        previous_etags = previous._etags if previous is not None else {}
+        for scene in data["scenes"]:
+            self.scenes_by_id[scene["id"]] = scene
+            self.photos_by_scene_id[scene["id"]] = {
+                photo["id"]: photo
+                for photo in scene["photos"]
+            }
+            for obj in [scene] + scene["photos"]:
+                if id(obj) in previous_etags:
+                    self._etags[id(obj)] = previous_etags[id(obj)]
+
+    def get_scene(self, scene_id):
+        return self.scenes_by_id.get(scene_id)
+
+    def get_photo(self, scene_id, photo_id):
+        return self.photos_by_scene_id.get(scene_id, {}).get(photo_id)
+
+    def get_etag(self, obj):
+        etag = self._etags.get(id(obj))
+        if etag is None:
+            etag = _hash(value=obj)
+            self._etags[id(obj)] = etag
+        return etag
+
+    def get_scene_summaries(self):
+        """
+        Gets each scene without the lines and UI data of its photos.
+        """
+        if self._scene_summaries is None:
+            self._scene_summaries = [
+                {
+                    **{
+                        key: value
+                        for key, value in scene.items()
+                        if key != "photos"
+                    },
+                    "photos": [
+                        {key: photo[key] for key in PHOTO_SUMMARY_KEYS if key in photo}
+                        for photo in scene["photos"]
+                    ]
+                }
+                for scene in self.data["scenes"]
+            ]
+        return self._scene_summaries
+
+    def get_scene_summaries_etag(self):
+        if self._scene_summaries_etag is None:
+            self._scene_summaries_etag = _hash(value=self.get_scene_summaries())
+        return self._scene_summaries_etag
+
+
+def _hash(value):
+    return hashlib.sha1(
+        json.dumps(value, sort_keys=True, separators=(",", ":")).encode("utf-8")
+    ).hexdigest()
@@ -0,0 +1,453 @@
+import contextlib
+import json
+import os
+import tempfile
+import threading
+
+try:
+    import fcntl
+except ImportError:
+    # Not available on Windows, where only a single server process is
+    # supported
+    fcntl = None
+
+
+# Compact the journal into the snapshot after this many writes
+COMPACT_EVERY = 200
+
+# The permissions of a new snapshot
+DEFAULT_FILE_MODE = 0o644
+
+SET = "set"
+DELETE = "delete"
+INSERT = "insert"
+
+
+class JournalStore:
+    """
+    Stores the data as a JSON snapshot plus an append-only journal of the
+    changes made since the snapshot was written. Each write appends one line
+    with the changes between the old and new data, so the cost of a write
+    depends on the size of the change rather than the size of the data.
+    Every COMPACT_EVERY writes the snapshot is rewritten in a background
+    thread and the journal is started again.
+
+    Journal lines are {"version": ..., "ops": [...]}, where the version is
+    the _metadata.version of the data after the change. The snapshot has the
+    same format as before (indent=4, sort_keys=True), so it can still be
+    read and edited by hand when the server is not running.
+
+    The store can be shared by the threads of a process and by several
+    processes. Reads and writes hold a thread lock and an exclusive lock on
+    a lock file next to the snapshot, and first apply any changes that other
+    processes have appended to the journal. The data is never modified in
+    place (changes copy the dicts and lists along their paths), so data
+    returned by get_data stays valid while other threads change the store.
+    """
+
+    def __init__(self, snapshot_path, journal_path, compact_every=COMPACT_EVERY):
+        self.snapshot_path = snapshot_path
+        self.journal_path = journal_path
+        # While a compaction is running, the journal it replaces is kept
+        # here until the new snapshot has been written
+        self.compacting_journal_path = journal_path + ".compacting"
+        self.lock_path = snapshot_path + ".lock"
+        self.compaction_lock_path = snapshot_path + ".compaction.lock"
+        self.compact_every = compact_every
+        self._lock = threading.RLock()
+        self._lock_file = None
+        self._data = None
+        self._journal_file = None
+        # The journal that has been read (or written) up to _journal_offset
+        self._journal_inode = None
+        self._journal_offset = 0
+        self._journal_count = 0
+        self._compaction_thread = None
+
+    def get_data(self):
+        with self._locked():
+            return self._data
+
+    def get_file_paths(self):
+        """
+        Gets the paths of the files of the store. The snapshot on its own
+        lags the journal, so these must only be read through the store.
+        """
+        return [
+            self.snapshot_path,
+            self.journal_path,
+            self.compacting_journal_path,
+            self.lock_path,
+            self.compaction_lock_path
+        ]
+
+    def set_data(self, data):
+        """
+        Replaces the data. The data must not be modified after it has been
+        passed in.
+        """
+        self.update_data(
+            update_fn=lambda old_data: (data, diff(old=old_data, new=data)))
+
+    def update_data(self, update_fn):
+        """
+        Calls update_fn with the current data while holding the locks, so
+        that it can check the current version. update_fn returns the new
+        data and the ops that change the current data into it, and must not
+        modify the current data. Returns the new data.
+        """
+        with self._locked():
+            data, ops = update_fn(self._data)
+            self._append(version=_get_version(data), ops=ops)
+            self._data = data
+
+            if self._journal_count >= self.compact_every:
+                self._start_compaction()
+
+            return data
+
+    def compact(self):
+        """
+        Writes the snapshot and clears the journal, waiting until done.
+        """
+        with self._locked():
+            self._start_compaction()
+            thread = self._compaction_thread
+
+        if thread is not None:
+            thread.join()
+
+    @contextlib.contextmanager
+    def _locked(self):
+        with self._lock:
+            with self._file_lock():
+                if self._data is None:
+                    self._load()
+                else:
+                    self._sync()
+                yield
+
+    @contextlib.contextmanager
+    def _file_lock(self):
+        # The thread lock is reentrant, so the file is only locked by the
+        # outermost call
+        if fcntl is None or self._lock_file is not None:
+            yield
+            return
+
+        self._lock_file = open(self.lock_path, "a")
+        try:
+            fcntl.flock(self._lock_file.fileno(), fcntl.LOCK_EX)
+            yield
+        finally:
+            fcntl.flock(self._lock_file.fileno(), fcntl.LOCK_UN)
+            self._lock_file.close()
+            self._lock_file = None
+
+    def _load(self):
+        entry_count = self._read_snapshot_and_journals()
+
+        # Start again from a new snapshot if there were changes to replay,
+        # unless another process is compacting, in which case its compaction
+        # will replace the snapshot
+        if entry_count == 0 and not os.path.exists(self.compacting_journal_path):
+            self._open_journal()
+            return
+        compaction_lock_file = self._try_lock_compaction()
+        if compaction_lock_file is None:
+            self._open_journal()
+            return
+
+        try:
+            self._compact_now()
+        finally:
+            _unlock_file(f=compaction_lock_file)
+
+    def _read_snapshot_and_journals(self):
+        """
+        Reads the data and returns the number of journal entries read
+        """
+        with open(self.snapshot_path, "r") as f:
+            data = json.loads(f.read())
+
+        # Replay the journal of a compaction that is running in another
+        # process or was interrupted, then the current journal. Changes
+        # already in the snapshot are skipped.
+        entry_count = 0
+        for path in [self.compacting_journal_path, self.journal_path]:
+            entries, _ = _read_journal(path=path)
+            data = _apply_entries(data=data, entries=entries)
+            entry_count += len(entries)
+
+        self._data = data
+        self._journal_count = 0
+        return entry_count
+
+    def _open_journal(self):
+        if self._journal_file is not None:
+            self._journal_file.close()
+
+        self._journal_file = open(self.journal_path, "ab")
+        stat = os.fstat(self._journal_file.fileno())
+        self._journal_inode = stat.st_ino
+        self._journal_offset = stat.st_size
+
+        # Remove a partial last line left by a crash, so that it is not
+        # joined to the next line
+        _, length = _read_journal(path=self.journal_path)
+        if length < stat.st_size:
+            self._journal_file.truncate(length)
+            self._journal_offset = length
+
+    def _sync(self):
+        """
+        Applies the changes that other processes have made since the last
+        read or write.
+        """
+        try:
+            stat = os.stat(self.journal_path)
+        except FileNotFoundError:
+            stat = None
+
+        # The journal has been replaced by a compaction in another process
+        if stat is None or stat.st_ino != self._journal_inode:
+            self._read_snapshot_and_journals()
+            self._open_journal()
+            return
+
+        if stat.st_size > self._journal_offset:
+            entries, length = _read_journal(
+                path=self.journal_path,
+                offset=self._journal_offset)
+            self._data = _apply_entries(data=self._data, entries=entries)
+            self._journal_offset += length
+            self._journal_count += len(entries)
+
+    def _append(self, version, ops):
+        line = json.dumps({"version": version, "ops": ops}, separators=(",", ":"))
+        line_bytes = (line + "\n").encode("utf-8")
+        self._journal_file.write(line_bytes)
+        self._journal_file.flush()
+        self._journal_offset += len(line_bytes)
+        self._journal_count += 1
+
+    def _start_compaction(self):
+        # Only one compaction at a time, including in other processes. The
+        # journal keeps growing until the running compaction has finished.
+        compaction_lock_file = self._try_lock_compaction()
+        if compaction_lock_file is None:
+            return
+
+        # Left by a compaction that was interrupted by a crash
+        if os.path.exists(self.compacting_journal_path):
+            try:
+                self._compact_now()
+            finally:
+                _unlock_file(f=compaction_lock_file)
+            return
+
+        self._journal_file.close()
+        self._journal_file = None
+        os.replace(self.journal_path, self.compacting_journal_path)
+        self._open_journal()
+        self._journal_count = 0
+
+        self._compaction_thread = threading.Thread(
+            target=self._write_snapshot,
+            args=(self._data, compaction_lock_file),
+            daemon=True)
+        self._compaction_thread.start()
+
+    def _write_snapshot(self, data, compaction_lock_file):
+        try:
+            # Write the file without holding the store locks, as this is the
+            # slow part
+            temp_path = _write_json_temp(path=self.snapshot_path, data=data)
+            with self._lock:
+                with self._file_lock():
+                    os.replace(temp_path, self.snapshot_path)
+                    os.remove(self.compacting_journal_path)
+        finally:
+            _unlock_file(f=compaction_lock_file)
+
+    def _compact_now(self):
+        write_json_atomic(path=self.snapshot_path, data=self._data)
+        for path in [self.compacting_journal_path, self.journal_path]:
+            if os.path.exists(path):
+                os.remove(path)
+        self._open_journal()
+        self._journal_count = 0
+
+    def _try_lock_compaction(self):
+        """
+        Gets the locked compaction lock file, or None if a compaction is
+        running in this or another process. The lock is released when a
+        process exits, so a compaction that was interrupted by a crash does
+        not hold it.
+        """
+        if fcntl is None:
+            if self._compaction_thread is not None and self._compaction_thread.is_alive():
+                return None
+            return open(self.compaction_lock_path, "a")
+
+        f = open(self.compaction_lock_path, "a")
+        try:
+            fcntl.flock(f.fileno(), fcntl.LOCK_EX | fcntl.LOCK_NB)
+        except OSError:
+            f.close()
+            return None
+
+        return f
+
+
+def _unlock_file(f):
+    if fcntl is not None:
+        fcntl.flock(f.fileno(), fcntl.LOCK_UN)
+    f.close()
+
+
+def write_json_atomic(path, data):
+    """
+    Writes the data to a temporary file in the same directory and then
+    renames it, so that the file is never left half written.
+    """
+    temp_path = _write_json_temp(path=path, data=data)
+    os.replace(temp_path, path)
+
+
+def diff(old, new, path=None):
+    """
+    Gets the ops that change old into new. Dicts are compared key by key and
+    lists of the same length item by item. Anything else that has changed,
+    including lists that have changed length, is set to its new value.
+    """
+    if path is None:
+        path = []
+
+    if type(old) is dict and type(new) is dict:
+        ops = []
+        for key in old:
+            if key not in new:
+                ops.append([DELETE, path + [key]])
+        for key, value in new.items():
+            if key not in old:
+                ops.append([SET, path + [key], value])
+            else:
+                ops.extend(diff(old=old[key], new=value, path=path + [key]))
+        return ops
+
+    if type(old) is list and type(new) is list and len(old) == len(new):
+        ops = []
+        for index, (old_item, new_item) in enumerate(zip(old, new)):
+            ops.extend(diff(old=old_item, new=new_item, path=path + [index]))
+        return ops
+
+    # Compare types as well, so that e.g. 1 and 1.0 or 1 and True are
+    # treated as different
+    if type(old) is type(new) and old == new:
+        return []
+
+    return [[SET, path, new]]
+
+
+def apply_ops(data, ops):
+    """
+    Applies the ops and returns the changed data. The data itself is not
+    modified: the dicts and lists along the paths of the ops are copied.
+    """
+    copied_ids = set()
+
+    def copy_container(value):
+        if id(value) in copied_ids:
+            return value
+        copied_value = value.copy()
+        copied_ids.add(id(copied_value))
+        return copied_value
+
+    for op in ops:
+        path = op[1]
+        if len(path) == 0:
+            if op[0] == SET:
+                data = op[2]
+                continue
+            raise Exception("Cannot delete the root")
+
+        data = copy_container(data)
+        parent = data
+        for key in path[:-1]:
+            parent[key] = copy_container(parent[key])
+            parent = parent[key]
+
+        if op[0] == SET:
+            parent[path[-1]] = op[2]
+        elif op[0] == INSERT:
+            parent.insert(path[-1], op[2])
+        elif op[0] == DELETE:
+            del parent[path[-1]]
+        else:
+            raise Exception(f"Unknown op: {op[0]}")
+
+    return data
+
+
+def _get_version(data):
+    return data["_metadata"]["version"]
+
+
+def _apply_entries(data, entries):
+    # The entries are in version order, so skip those up to the version of
+    # the data
+    version = _get_version(data)
+    ops = []
+    for entry in entries:
+        if entry["version"] > version:
+            ops.extend(entry["ops"])
+    return apply_ops(data=data, ops=ops)
+
+
+def _read_journal(path, offset=0):
+    """
+    Reads the complete lines of the journal from the offset and returns the
+    entries and the number of bytes read.
+    """
+    if not os.path.exists(path):
+        return [], 0
+
+    with open(path, "rb") as f:
+        f.seek(offset)
+        journal_bytes = f.read()
+
+    # A write that was interrupted by a crash leaves a partial last line,
+    # which is ignored
+    length = journal_bytes.rfind(b"\n") + 1
+    entries = [
+        json.loads(line)
+        for line in journal_bytes[:length].decode("utf-8").splitlines()
+    ]
+
+    return entries, length
+
+
+def _write_json_temp(path, data):
+    dirpath = os.path.dirname(os.path.abspath(path))
+    # mkstemp creates the file readable only by its owner, so the file that
+    # replaces the existing one is given its permissions
+    try:
+        mode = os.stat(path).st_mode & 0o777
+    except FileNotFoundError:
+        mode = DEFAULT_FILE_MODE
+    fd, temp_path = tempfile.mkstemp(dir=dirpath, suffix=".tmp")
+    try:
+        with os.fdopen(fd, "w") as f:
+            f.write(json.dumps(
+                data,
+                indent=4,
+                sort_keys=True))
+            f.flush()
+            os.fsync(f.fileno())
+        os.chmod(temp_path, mode)
+    except BaseException:
+        os.remove(temp_path)
+        raise
+
+    return temp_path
@@ -0,0 +1,411 @@
+import copy
+import re
+import journal
+
+
+# RFC 6901 list indexes are ASCII digits without leading zeros
+_INDEX_PATTERN = re.compile("0|[1-9][0-9]*")
+
+
+class PatchError(Exception):
+    """
+    The patch request is invalid.
+    """
+
+
+class PatchConflict(PatchError):
+    """
+    The patch cannot be applied to the current data, e.g. because it was
+    made against an older version.
+    """
+
+
+def apply_post_request(data, new_data):
+    """
+    Checks a POST /data request body, which replaces all of the data, and
+    returns the new data and the journal ops that change the data into it.
+    The version of the new data must be greater than the current version.
+    """
+    if type(new_data) is not dict or type(new_data.get("_metadata")) is not dict:
+        raise PatchError("Invalid data")
+
+    version = new_data["_metadata"].get("version")
+    if type(version) is not int or version <= data["_metadata"]["version"]:
+        raise PatchError("Invalid version")
+
+    # The scene versions are kept by the server, so ignore those sent by the
+    # client, which may be out of date
+    new_data = {**new_data, "_metadata": {**new_data["_metadata"]}}
+    new_data["_metadata"].pop("sceneVersions", None)
+    if "sceneVersions" in data["_metadata"]:
+        new_data["_metadata"]["sceneVersions"] = data["_metadata"]["sceneVersions"]
+
+    ops = journal.diff(old=data, new=new_data)
+
+    scene_versions_merge = _get_scene_versions_merge(
+        data=new_data,
+        ops=ops,
+        version=version)
+    if scene_versions_merge:
+        scene_versions = {
+            **new_data["_metadata"].get("sceneVersions", {}),
+            **scene_versions_merge
+        }
+        scene_versions = {
+            key: value
+            for key, value in scene_versions.items()
+            if value is not None
+        }
+        new_data["_metadata"]["sceneVersions"] = scene_versions
+        ops.append([journal.SET, ["_metadata", "sceneVersions"], scene_versions])
+
+    return new_data, ops
+
+
+def apply_patch_request(data, body):
+    """
+    Applies a PATCH /data request body to the data and returns the new data
+    and the journal ops that change the data into the new data. The data
+    itself is not modified: only the dicts and lists along the patched paths
+    are copied, so the cost depends on the size of the patch rather than
+    the size of the data.
+
+    The body is either an RFC 6902 JSON Patch:
+
+        {"baseVersion": 12, "version": 13, "patch": [
+            {"op": "replace", "path": "/scenes/0/photos/2/lines/4/v0", "value": [10, 20]}
+        ]}
+
+    or an RFC 7396 JSON Merge Patch applied at a path:
+
+        {"baseVersion": 12, "version": 13, "path": "/scenes/0/_uiData", "merge": {"photoId": 3}}
+
+    baseVersion must be the current version, and version (current + 1 if
+    omitted) must be greater than it, as for POST /data.
+
+    Instead of baseVersion, a patch that only changes one scene can give
+    the sceneId and the baseSceneVersion of the scene (see
+    get_scene_version), so that changes to other scenes since do not
+    conflict with it. The version is then always current + 1.
+    """
+    current_version = data["_metadata"]["version"]
+
+    scene_index = None
+    if "sceneId" in body:
+        scene_index = _get_scene_index(data=data, scene_id=body["sceneId"])
+        scene_version = get_scene_version(data=data, scene_id=body["sceneId"])
+        if body.get("baseSceneVersion") != scene_version:
+            raise PatchConflict(
+                f"Base scene version {body.get('baseSceneVersion')} is not "
+                f"the current scene version {scene_version}")
+        version = current_version + 1
+    else:
+        if "baseVersion" not in body:
+            raise PatchError("baseVersion is required")
+        if body["baseVersion"] != current_version:
+            raise PatchConflict(
+                f"Base version {body['baseVersion']} is not the current "
+                f"version {current_version}")
+        version = body.get("version", current_version + 1)
+        if type(version) is not int or version <= current_version:
+            raise PatchError("Invalid version")
+
+    patcher = _Patcher(data=data)
+    if "patch" in body:
+        if type(body["patch"]) is not list:
+            raise PatchError("patch must be a list of operations")
+        for operation in body["patch"]:
+            patcher.apply_operation(operation=operation)
+    elif "merge" in body:
+        patcher.merge(
+            path=parse_pointer(body.get("path", "")),
+            merge_patch=body["merge"])
+    else:
+        raise PatchError("Either patch or merge is required")
+
+    if scene_index is not None:
+        for op in patcher.ops:
+            path = op[1]
+            if len(path) < 3 or path[0] != "scenes" or path[1] != scene_index:
+                raise PatchError(
+                    f"Change outside scene {body['sceneId']}: "
+                    f"{_format_path(path)}")
+
+    scene_versions_merge = _get_scene_versions_merge(
+        data=patcher.data,
+        ops=patcher.ops,
+        version=version)
+    patcher.set(path=["_metadata", "version"], value=version)
+    if scene_versions_merge:
+        patcher.merge(
+            path=["_metadata", "sceneVersions"],
+            merge_patch=scene_versions_merge)
+
+    return patcher.data, patcher.ops
+
+
+def get_scene_version(data, scene_id):
+    """
+    Gets the version of the data in which the scene was last changed, or 0
+    if it has not been changed since scene versions were added.
+    """
+    return data["_metadata"].get("sceneVersions", {}).get(str(scene_id), 0)
+
+
+def parse_pointer(pointer):
+    """
+    Splits an RFC 6901 JSON Pointer into its unescaped reference tokens.
+    List indexes are left as strings until they are resolved against the
+    data.
+    """
+    if type(pointer) is not str:
+        raise PatchError(f"Invalid path: {pointer!r}")
+    if pointer == "":
+        return []
+    if not pointer.startswith("/"):
+        raise PatchError(f"Invalid path: {pointer!r}")
+
+    return [
+        token.replace("~1", "/").replace("~0", "~")
+        for token in pointer[1:].split("/")
+    ]
+
+
+class _Patcher:
+    """
+    Applies patch operations with copy-on-write and records the equivalent
+    journal ops, with list indexes resolved to ints.
+    """
+
+    def __init__(self, data):
+        self.data = data
+        self.ops = []
+        # ids of the dicts and lists that have already been copied
+        self._copied_ids = set()
+
+    def apply_operation(self, operation):
+        if type(operation) is not dict:
+            raise PatchError(f"Invalid operation: {operation!r}")
+
+        op = operation.get("op")
+        path = parse_pointer(operation.get("path"))
+
+        if op == "add":
+            self.add(path=path, value=_get_value(operation))
+        elif op == "remove":
+            self.remove(path=path)
+        elif op == "replace":
+            self.get(path=path)
+            self.set(path=path, value=_get_value(operation))
+        elif op == "move":
+            from_path = parse_pointer(operation.get("from"))
+            if path[:len(from_path)] == from_path and path != from_path:
+                raise PatchError("Cannot move a value into itself")
+            value = self.get(path=from_path)
+            self.remove(path=from_path)
+            self.add(path=path, value=value)
+        elif op == "copy":
+            value = self.get(path=parse_pointer(operation.get("from")))
+            self.add(path=path, value=copy.deepcopy(value))
+        elif op == "test":
+            if not _is_equal(self.get(path=path), _get_value(operation)):
+                raise PatchConflict(f"Test failed: {operation['path']}")
+        else:
+            raise PatchError(f"Unknown op: {op!r}")
+
+    def merge(self, path, merge_patch):
+        if type(merge_patch) is not dict:
+            if len(path) == 0:
+                raise PatchError("Cannot replace the root")
+            self.set(path=path, value=merge_patch)
+            return
+
+        target = self.get(path=path) if self._exists(path=path) else None
+        if type(target) is not dict:
+            # As in RFC 7396, a merge into a non-object replaces it
+            if len(path) == 0:
+                raise PatchError("Cannot replace the root")
+            self.set(path=path, value=_merge_into(target={}, merge_patch=merge_patch))
+            return
+
+        for key, value in merge_patch.items():
+            if value is None:
+                if key in target:
+                    self.remove(path=path + [key])
+            else:
+                self.merge(path=path + [key], merge_patch=value)
+
+    def get(self, path):
+        value = self.data
+        for token in path:
+            value = _get_child(container=value, token=token)
+        return value
+
+    def set(self, path, value):
+        parent, parent_path, key = self._get_writable_parent(path=path)
+        if type(parent) is list:
+            key = _get_index(container=parent, token=key)
+        parent[key] = value
+        self.ops.append([journal.SET, parent_path + [key], value])
+
+    def add(self, path, value):
+        parent, parent_path, key = self._get_writable_parent(path=path)
+        if type(parent) is list:
+            if key == "-":
+                index = len(parent)
+            else:
+                index = _get_index(container=parent, token=key, allow_end=True)
+            parent.insert(index, value)
+            self.ops.append([journal.INSERT, parent_path + [index], value])
+        else:
+            parent[key] = value
+            self.ops.append([journal.SET, parent_path + [key], value])
+
+    def remove(self, path):
+        parent, parent_path, key = self._get_writable_parent(path=path)
+        if type(parent) is list:
+            key = _get_index(container=parent, token=key)
+        elif key not in parent:
+            raise PatchError(f"Path not found: {_format_path(path)}")
+        del parent[key]
+        self.ops.append([journal.DELETE, parent_path + [key]])
+
+    def _exists(self, path):
+        try:
+            self.get(path=path)
+        except PatchError:
+            return False
+        return True
+
+    def _get_writable_parent(self, path):
+        """
+        Copies the containers from the root down to the parent of the path
+        (each only once per patch) and returns the parent, the path of the
+        parent with list indexes as ints, and the last token of the path.
+        """
+        if len(path) == 0:
+            raise PatchError("Cannot change the root")
+
+        self.data = self._copy(value=self.data)
+        parent = self.data
+        parent_path = []
+        for token in path[:-1]:
+            if type(parent) is list:
+                token = _get_index(container=parent, token=token)
+            elif type(parent) is not dict or token not in parent:
+                raise PatchError(f"Path not found: {_format_path(path)}")
+            child = self._copy(value=parent[token])
+            parent[token] = child
+            parent = child
+            parent_path.append(token)
+
+        if type(parent) not in [dict, list]:
+            raise PatchError(f"Path not found: {_format_path(path)}")
+
+        return parent, parent_path, path[-1]
+
+    def _copy(self, value):
+        if id(value) in self._copied_ids or type(value) not in [dict, list]:
+            return value
+        copied_value = copy.copy(value)
+        self._copied_ids.add(id(copied_value))
+        return copied_value
+
+
+def _get_scene_index(data, scene_id):
+    for index, scene in enumerate(data["scenes"]):
+        if scene["id"] == scene_id:
+            return index
+    raise PatchError(f"Scene not found: {scene_id}")
+
+
+def _get_scene_versions_merge(data, ops, version):
+    """
+    Gets the merge patch for _metadata.sceneVersions that sets the version
+    of the scenes changed by the ops and removes deleted scenes. If the
+    list of scenes itself has changed, all scenes are treated as changed.
+    """
+    scene_ids = [str(scene["id"]) for scene in data.get("scenes", [])]
+
+    # The ops are checked for changes to the list of scenes before any
+    # index is looked up, as the data is the data after all of the ops. When
+    # no op inserts, removes or replaces a scene, each scene is at the same
+    # index before and after the ops.
+    if any([
+        len(op[1]) == 0 or (op[1][0] == "scenes" and len(op[1]) <= 2)
+        for op in ops
+    ]):
+        changed_scene_ids = set(scene_ids)
+    else:
+        changed_scene_ids = {
+            str(data["scenes"][op[1][1]]["id"])
+            for op in ops
+            if op[1][0] == "scenes"
+        }
+
+    merge_patch = {
+        scene_id: version
+        for scene_id in changed_scene_ids
+    }
+    for scene_id in data["_metadata"].get("sceneVersions", {}):
+        if scene_id not in scene_ids:
+            merge_patch[scene_id] = None
+
+    return merge_patch
+
+
+def _format_path(path):
+    return "/" + "/".join([str(token) for token in path])
+
+
+def _get_value(operation):
+    if "value" not in operation:
+        raise PatchError(f"Missing value: {operation!r}")
+    return operation["value"]
+
+
+def _get_child(container, token):
+    if type(container) is dict:
+        if token not in container:
+            raise PatchError(f"Path not found: {token}")
+        return container[token]
+    if type(container) is list:
+        return container[_get_index(container=container, token=token)]
+    raise PatchError(f"Path not found: {token}")
+
+
+def _get_index(container, token, allow_end=False):
+    if type(token) is int:
+        index = token
+    elif type(token) is str and _INDEX_PATTERN.fullmatch(token):
+        index = int(token)
+    else:
+        raise PatchError(f"Invalid list index: {token}")
+
+    max_index = len(container) if allow_end else len(container) - 1
+    if index > max_index:
+        raise PatchError(f"List index out of range: {token}")
+
+    return index
+
+
+def _merge_into(target, merge_patch):
+    for key, value in merge_patch.items():
+        if value is None:
+            target.pop(key, None)
+        elif type(value) is dict:
+            target[key] = _merge_into(target={}, merge_patch=value)
+        else:
+            target[key] = value
+    return target
+
+
+def _is_equal(a, b):
+    # JSON equality, where e.g. 1 and True are different
+    if type(a) is dict and type(b) is dict:
+        return a.keys() == b.keys() and all([_is_equal(a[k], b[k]) for k in a])
+    if type(a) is list and type(b) is list:
+        return len(a) == len(b) and all([_is_equal(x, y) for x, y in zip(a, b)])
+    if type(a) in [int, float] and type(b) in [int, float]:
+        return a == b
+    return type(a) is type(b) and a == b
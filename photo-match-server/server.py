@@ -1,37 +1,63 @@
-import json
+import mimetypes
 import os
-from flask import Flask, jsonify, request, send_from_directory
+from flask import Flask, abort, jsonify, request, send_file
 from flask_cors import cross_origin
+from werkzeug.utils import safe_join
+import assets
+import images
+import index
+import journal
+import patch
+import solver
 
 
 DATA_DIRPATH = "../photo-match-data"
 DATA_JSON_PATH = os.path.join(DATA_DIRPATH, "data.json")
+DATA_JOURNAL_PATH = os.path.join(DATA_DIRPATH, "data.journal.jsonl")
+ASSET_CACHE_DIRPATH = os.path.join(DATA_DIRPATH, ".cache")
+IMAGE_CACHE_DIRPATH = os.path.join(ASSET_CACHE_DIRPATH, "images")
+
+# How long a file requested by version can be cached for
+VERSIONED_FILE_MAX_AGE = 365 * 24 * 60 * 60
 
 
 app = Flask(__name__)
 
 
-_data = None
+_store = journal.JournalStore(
+    snapshot_path=DATA_JSON_PATH,
+    journal_path=DATA_JOURNAL_PATH)
+
+_index_cache = index.IndexCache()
+
+_asset_cache = assets.AssetCache(cache_dirpath=ASSET_CACHE_DIRPATH)
+
+_image_cache = images.ImageCache(cache_dirpath=IMAGE_CACHE_DIRPATH)
 
 
 def _get_data():
-    global _data
-    if _data is None:
-        with open(DATA_JSON_PATH, "r") as f:
-            _data = json.loads(f.read())
-    
-    return _data
+    return _store.get_data()
 
 
 def _set_data(data):
-    global _data
-    _data = data
-    with open(DATA_JSON_PATH, "w") as f:
-        f.write(json.dumps(
-            data,
-            indent=4,
-            sort_keys=True))
-    
+    _store.set_data(data=data)
+
+
+def _get_index():
+    return _index_cache.get_index(data=_get_data())
+
+
+def _conditional_json_response(value, etag):
+    """
+    Gets a JSON response with an ETag, or an empty 304 response if the
+    request has a matching If-None-Match header.
+    """
+    response = jsonify(value)
+    response.set_etag(etag)
+    # Always revalidate, which is cheap as the ETags are cached
+    response.headers["Cache-Control"] = "no-cache"
+    return response.make_conditional(request)
+
 
 @app.route("/data", methods=["GET"])
 @cross_origin()
@@ -39,7 +65,88 @@ def get_data():
     """
     Gets JSON data from the datastore.
     """
-    return jsonify(_get_data())
+    data = _get_data()
+
+    # Every change increases the version, so it identifies the content
+    return _conditional_json_response(
+        value=data,
+        etag=f"data-{data['_metadata']['version']}")
+
+
+@app.route("/scenes", methods=["GET"])
+@cross_origin()
+def get_scenes():
+    """
+    Gets the scenes, with only the id, filename and size of each photo.
+    """
+    data_index = _get_index()
+    return _conditional_json_response(
+        value=data_index.get_scene_summaries(),
+        etag=data_index.get_scene_summaries_etag())
+
+
+@app.route("/scenes/<int:scene_id>", methods=["GET"])
+@cross_origin()
+def get_scene(scene_id):
+    """
+    Gets a scene and all of its photos.
+    """
+    data_index = _get_index()
+    scene = data_index.get_scene(scene_id=scene_id)
+    if scene is None:
+        return jsonify({"error": "Scene not found"}), 404
+
+    return _conditional_json_response(
+        value=scene,
+        etag=data_index.get_etag(obj=scene))
+
+
+@app.route("/scenes/<int:scene_id>/photos/<int:photo_id>", methods=["GET"])
+@cross_origin()
+def get_photo(scene_id, photo_id):
+    """
+    Gets a photo of a scene.
+    """
+    data_index = _get_index()
+    photo = data_index.get_photo(scene_id=scene_id, photo_id=photo_id)
+    if photo is None:
+        return jsonify({"error": "Photo not found"}), 404
+
+    return _conditional_json_response(
+        value=photo,
+        etag=data_index.get_etag(obj=photo))
+
+
+@app.route("/scenes/<int:scene_id>/solve", methods=["POST"])
+@cross_origin()
+def solve_scene(scene_id):
+    """
+    Solves the camera transform of each photo of the scene (see
+    solver.solve_scene). The body is {"edges": [...], "photoIds": [...]},
+    where the edges are the world positions of the shape edges of the
+    scene and photoIds is optional. The data is not changed: the client
+    sets the camera transforms that have converged.
+    """
+    if not solver.is_available():
+        return jsonify({"error": "NumPy is not installed"}), 501
+
+    body = request.get_json()
+    if type(body) is not dict or type(body.get("edges")) is not list:
+        return jsonify({"error": "Invalid request"}), 400
+
+    scene = _get_index().get_scene(scene_id=scene_id)
+    if scene is None:
+        return jsonify({"error": "Scene not found"}), 404
+
+    try:
+        results = solver.solve_scene(
+            scene=scene,
+            edges=body["edges"],
+            photo_ids=body.get("photoIds"))
+    except (KeyError, TypeError, ValueError) as e:
+        return jsonify({"error": f"Invalid request: {e!r}"}), 400
+
+    return jsonify({"photos": results})
 
 
 @app.route("/data", methods=["POST"])
@@ -48,21 +155,119 @@ def post_data():
     """
     Saves JSON data to the datastore.
     """
-    data = _get_data()
     new_data = request.get_json()
 
-    if new_data["_metadata"]["version"] <= data["_metadata"]["version"]:
-        return jsonify({"error": "Invalid version"}), 400
+    # The version is checked while the store is locked, so that concurrent
+    # saves cannot both succeed
+    try:
+        data = _store.update_data(
+            update_fn=lambda data: patch.apply_post_request(
+                data=data,
+                new_data=new_data))
+    except patch.PatchError as e:
+        return jsonify({"error": str(e)}), 400
+
+    return jsonify({"ok": True, "version": data["_metadata"]["version"]})
+
 
-    _set_data(data=new_data)
+@app.route("/data", methods=["PATCH"])
+@cross_origin()
+def patch_data():
+    """
+    Applies a JSON Patch or a merge at a path to the JSON data in the
+    datastore (see patch.apply_patch_request) and returns the new version.
+    """
+    body = request.get_json()
+    if type(body) is not dict:
+        return jsonify({"error": "Invalid request"}), 400
 
-    return jsonify({"ok": True})
+    try:
+        data = _store.update_data(
+            update_fn=lambda data: patch.apply_patch_request(data=data, body=body))
+    except patch.PatchConflict as e:
+        return jsonify({
+            "error": str(e),
+            "version": _get_data()["_metadata"]["version"]
+        }), 409
+    except patch.PatchError as e:
+        return jsonify({"error": str(e)}), 400
+
+    return jsonify({"ok": True, "version": data["_metadata"]["version"]})
 
 
 @app.route("/file/<filename>", methods=["GET"])
 @cross_origin()
 def get_file(filename):
     """
-    Serves a file.
+    Serves a file, with the hash of its content as a strong ETag. Requests
+    for /file/<filename>?v=<hash> with the current hash are for content
+    that never changes, so can be cached indefinitely. Other requests must
+    be revalidated, which returns 304 Not Modified if the file is
+    unchanged.
+
+    Range requests are supported. When the whole file is requested, glTF
+    and JSON files are sent compressed if the client accepts it.
+
+    For photos, ?size=thumbnail or ?size=screen selects a downscaled
+    variant (see images.SIZES), which is made on the first request.
+    """
+    path = safe_join(DATA_DIRPATH, filename)
+    if path is None or not os.path.isfile(path):
+        abort(404)
+    # The snapshot lags the changes in the journal
+    if os.path.abspath(path) in [
+        os.path.abspath(store_path) for store_path in _store.get_file_paths()
+    ]:
+        return jsonify({"error": "Use GET /data"}), 404
+
+    size = request.args.get("size", images.FULL)
+    if size != images.FULL and size not in images.SIZES:
+        return jsonify({"error": f"Unknown size: {size}"}), 400
+    if size != images.FULL and images.is_image(path=path) and not images.is_available():
+        return jsonify({"error": "Pillow is not installed"}), 501
+    path = _image_cache.get_variant_path(path=path, size=size)
+
+    content_hash = _asset_cache.get_hash(path=path)
+    mimetype = mimetypes.guess_type(filename)[0] or "application/octet-stream"
+
+    # Ranges are of the uncompressed file
+    encodings = _asset_cache.get_encodings(path=path)
+    encoding = None
+    if encodings and request.range is None:
+        encoding = request.accept_encodings.best_match(encodings)
+
+    if encoding is None:
+        send_path = path
+        etag = content_hash
+    else:
+        send_path = _asset_cache.get_compressed_path(path=path, encoding=encoding)
+        # Each encoding of the file is a different representation, so needs
+        # a different strong ETag
+        etag = f"{content_hash}-{encoding}"
+
+    is_versioned = request.args.get("v") == content_hash
+    response = send_file(
+        send_path,
+        mimetype=mimetype,
+        etag=etag,
+        conditional=True,
+        max_age=VERSIONED_FILE_MAX_AGE if is_versioned else None)
+
+    if is_versioned:
+        response.cache_control.immutable = True
+    if encoding is not None:
+        response.headers["Content-Encoding"] = encoding
+    if encodings:
+        response.vary.add("Accept-Encoding")
+
+    return response
+
+
+@app.cli.command("generate-images")
+def generate_images():
+    """
+    Makes the downscaled variants of all the photos, so that they do not
+    have to be made when first requested.
     """
-    return send_from_directory(DATA_DIRPATH, filename)
+    image_count = _image_cache.generate_variants(dirpath=DATA_DIRPATH)
+    print(f"Generated variants of {image_count} images")
@@ -0,0 +1,353 @@
+import math
+import multiprocessing
+import os
+from concurrent.futures import ProcessPoolExecutor
+
+try:
+    import numpy as np
+except ImportError:
+    # NumPy is in the Pipfile, so this only happens with a broken install,
+    # in which case camera solving is not available (see is_available)
+    np = None
+
+
+# The camera parameters are [fov, position x, y, z, rotation x, y, z], as
+# for a three.js PerspectiveCamera with the default XYZ Euler order
+PARAMETER_COUNT = 7
+
+# Outside these ranges the error increases, to keep the values constrained
+FOV_RANGE = (10, 60)
+LENGTH_RANGE = (-2000, 2000)
+ANGLE_RANGE = (-2.1 * math.pi, 2.1 * math.pi)
+
+# A photo whose camera has a larger error than this has not converged
+MAX_ERROR = 0.01
+
+# The number of random starting points whose errors are compared, and the
+# number of the best of them from which the optimisation is run
+CANDIDATE_COUNT = 256
+START_COUNT = 8
+
+# Standard deviations of the random changes to the camera parameters of the
+# photo that give the starting points
+FOV_STDDEV = 5
+POSITION_STDDEV_SCALE = 0.1
+ROTATION_STDDEV = 0.1
+
+MAX_ITERATIONS = PARAMETER_COUNT * 200 * 10
+MIN_ERROR_DELTA = 1e-9
+MIN_PARAMETER_DELTA = 1e-7
+
+
+def is_available():
+    return np is not None
+
+
+def solve_scene(scene, edges, photo_ids=None, max_workers=None, seed=0):
+    """
+    Finds the camera transform of each photo of the scene that minimises
+    the distance between the lines of the photo and the projections of the
+    shape edges they are matched to. The edges are dicts with the shapeId,
+    edgeId, and the world positions v0 and v1 of the ends of the edge. The
+    photos are solved in parallel processes. Returns a list of dicts with
+    the photoId, cameraTransform, residual and converged of each photo.
+    Photos without any matched lines are skipped.
+    """
+    edges_by_id = {
+        (edge["shapeId"], edge["edgeId"]): edge
+        for edge in edges
+    }
+
+    problems = []
+    for photo in scene["photos"]:
+        if photo_ids is not None and photo["id"] not in photo_ids:
+            continue
+        problem = _get_problem(photo=photo, edges_by_id=edges_by_id, seed=seed)
+        if problem is not None:
+            problems.append(problem)
+
+    if len(problems) == 0:
+        return []
+
+    if max_workers is None:
+        max_workers = os.cpu_count()
+    max_workers = min(max_workers, len(problems))
+    if max_workers == 1:
+        return [solve_problem(problem=problem) for problem in problems]
+
+    # Start the processes with spawn rather than fork, as forking a
+    # multi-threaded server can copy locks held by other threads
+    with ProcessPoolExecutor(
+            max_workers=max_workers,
+            mp_context=multiprocessing.get_context("spawn")) as executor:
+        return list(executor.map(solve_problem, problems))
+
+
+def solve_problem(problem):
+    """
+    Solves the camera transform of one photo (see _get_problem). Many
+    random starting points near the current camera transform are compared
+    at once, and the optimisation is run from the best few of them.
+    """
+    rng = np.random.default_rng(problem["seed"])
+    x0 = problem["x0"]
+
+    candidates = np.tile(x0, (CANDIDATE_COUNT, 1))
+    position_stddev = POSITION_STDDEV_SCALE * np.linalg.norm(x0[1:4]) + 1
+    candidates[1:, 0] += rng.normal(0, FOV_STDDEV, CANDIDATE_COUNT - 1)
+    candidates[1:, 1:4] += rng.normal(0, position_stddev, (CANDIDATE_COUNT - 1, 3))
+    candidates[1:, 4:7] += rng.normal(0, ROTATION_STDDEV, (CANDIDATE_COUNT - 1, 3))
+
+    def error_fn(x):
+        return get_errors(x=x, problem=problem)
+
+    # Always start from the current camera transform (the first candidate)
+    # as well as the best of the others
+    candidate_errors = error_fn(candidates)
+    start_indexes = [0] + [
+        index
+        for index in np.argsort(candidate_errors[1:])[:START_COUNT - 1] + 1
+    ]
+
+    best_x = x0
+    best_error = candidate_errors[0]
+    for index in start_indexes:
+        x, error = nelder_mead(error_fn=error_fn, x0=candidates[index])
+        if error < best_error:
+            best_x = x
+            best_error = error
+
+    return {
+        "photoId": problem["photoId"],
+        "cameraTransform": _array_to_camera_transform(x=best_x),
+        "residual": float(best_error),
+        "converged": bool(best_error <= MAX_ERROR)
+    }
+
+
+def get_errors(x, problem):
+    """
+    Gets the error of each row of x, which are sets of camera parameters.
+    The error is the sum over the lines of the squared distances of both
+    ends of the line from the projection of its edge, plus the errors that
+    keep the parameters within their ranges. The edges of all the lines are
+    projected for all the rows at once.
+    """
+    fov = x[:, 0]
+    position = x[:, 1:4]
+    rotation = _get_rotation_matrices(x=x[:, 4], y=x[:, 5], z=x[:, 6])
+
+    # Projection scales of a three.js PerspectiveCamera, where fov is the
+    # vertical field of view in degrees
+    scale_y = 1 / np.tan(np.radians(fov) / 2)
+    scale_x = scale_y / problem["aspect"]
+
+    def project(points):
+        # Camera space positions of the points for each row, (rows, lines,
+        # 3), i.e. the rotation transposed applied to each offset
+        camera_points = np.matmul(
+            points[np.newaxis, :, :] - position[:, np.newaxis, :],
+            rotation)
+        depth = -camera_points[:, :, 2]
+        return (
+            scale_x[:, np.newaxis] * camera_points[:, :, 0] / depth,
+            scale_y[:, np.newaxis] * camera_points[:, :, 1] / depth
+        )
+
+    x0, y0 = project(points=problem["edge_v0"])
+    x1, y1 = project(points=problem["edge_v1"])
+    dx = x1 - x0
+    dy = y1 - y0
+    length_squared = dx * dx + dy * dy
+
+    errors = np.zeros(len(x))
+    for line_points in [problem["line_v0"], problem["line_v1"]]:
+        px = line_points[np.newaxis, :, 0]
+        py = line_points[np.newaxis, :, 1]
+        cross = dx * (y0 - py) - (x0 - px) * dy
+        errors += np.sum(cross * cross / length_squared, axis=1)
+
+    errors += np.sum(
+        np.square(np.minimum(x - _get_parameter_mins(), 0)) +
+        np.square(np.maximum(x - _get_parameter_maxes(), 0)),
+        axis=1)
+
+    return errors
+
+
+def nelder_mead(
+        error_fn,
+        x0,
+        max_iterations=MAX_ITERATIONS,
+        min_error_delta=MIN_ERROR_DELTA,
+        min_parameter_delta=MIN_PARAMETER_DELTA,
+        non_zero_delta=1.05,
+        zero_delta=0.001,
+        rho=1,
+        chi=2,
+        psi=-0.5,
+        sigma=0.5):
+    """
+    Minimises the error with the Nelder-Mead method, as in
+    photo-match-web/src/NelderMead.ts. error_fn gets the errors of the rows
+    of an array, so the points of the initial simplex and of each reduction
+    are evaluated at once. Returns the best point and its error.
+    """
+    n = len(x0)
+    simplex = np.tile(np.asarray(x0, dtype=float), (n + 1, 1))
+    for i in range(n):
+        if simplex[i + 1, i] != 0:
+            simplex[i + 1, i] *= non_zero_delta
+        else:
+            simplex[i + 1, i] = zero_delta
+    errors = error_fn(simplex)
+
+    def get_error(point):
+        return error_fn(point[np.newaxis, :])[0]
+
+    for _ in range(max_iterations):
+        order = np.argsort(errors, kind="stable")
+        simplex = simplex[order]
+        errors = errors[order]
+
+        max_parameter_delta = np.max(np.abs(simplex[0] - simplex[1]))
+        if abs(errors[0] - errors[n]) < min_error_delta and max_parameter_delta < min_parameter_delta:
+            break
+
+        # Reflect the worst point through the centroid of the others
+        centroid = np.mean(simplex[:n], axis=0)
+        worst = simplex[n]
+        reflected = (1 + rho) * centroid - rho * worst
+        reflected_error = get_error(reflected)
+
+        if reflected_error < errors[0]:
+            expanded = (1 + chi) * centroid - chi * worst
+            expanded_error = get_error(expanded)
+            if expanded_error < reflected_error:
+                simplex[n], errors[n] = expanded, expanded_error
+            else:
+                simplex[n], errors[n] = reflected, reflected_error
+
+        elif reflected_error >= errors[n - 1]:
+            if reflected_error > errors[n]:
+                # Inside contraction
+                contracted = (1 + psi) * centroid - psi * worst
+                contracted_error = get_error(contracted)
+                should_reduce = contracted_error >= errors[n]
+            else:
+                # Outside contraction
+                contracted = (1 - psi * rho) * centroid + psi * rho * worst
+                contracted_error = get_error(contracted)
+                should_reduce = contracted_error >= reflected_error
+
+            if not should_reduce:
+                simplex[n], errors[n] = contracted, contracted_error
+            else:
+                if sigma >= 1:
+                    break
+                # Shrink the simplex towards the best point
+                simplex[1:] = (1 - sigma) * simplex[0] + sigma * simplex[1:]
+                errors[1:] = error_fn(simplex[1:])
+
+        else:
+            simplex[n], errors[n] = reflected, reflected_error
+
+    best_index = np.argmin(errors)
+    return simplex[best_index], errors[best_index]
+
+
+def _get_problem(photo, edges_by_id, seed):
+    """
+    Gets the arrays needed to solve the camera transform of a photo, or
+    None if none of its lines are matched to an edge. The problem is a dict
+    so that it can be passed to another process.
+    """
+    lines = [
+        line
+        for line in photo["lines"]
+        if (line["matchingShapeId"], line["matchingEdgeId"]) in edges_by_id
+    ]
+    if len(lines) == 0:
+        return None
+
+    edges = [
+        edges_by_id[(line["matchingShapeId"], line["matchingEdgeId"])]
+        for line in lines
+    ]
+
+    return {
+        "photoId": photo["id"],
+        "aspect": photo["width"] / photo["height"],
+        "x0": _camera_transform_to_array(
+            camera_transform=photo["_uiData"]["cameraTransform"]),
+        "edge_v0": _get_points_array(points=[edge["v0"] for edge in edges]),
+        "edge_v1": _get_points_array(points=[edge["v1"] for edge in edges]),
+        "line_v0": _get_points_array(points=[line["v0"] for line in lines]),
+        "line_v1": _get_points_array(points=[line["v1"] for line in lines]),
+        "seed": [seed, photo["id"]]
+    }
+
+
+def _get_rotation_matrices(x, y, z):
+    """
+    Gets the rotation matrix of each XYZ Euler rotation, as three.js
+    Matrix4.makeRotationFromEuler, i.e. Rx Ry Rz.
+    """
+    a, b = np.cos(x), np.sin(x)
+    c, d = np.cos(y), np.sin(y)
+    e, f = np.cos(z), np.sin(z)
+
+    matrices = np.empty((len(x), 3, 3))
+    matrices[:, 0, 0] = c * e
+    matrices[:, 0, 1] = -c * f
+    matrices[:, 0, 2] = d
+    matrices[:, 1, 0] = a * f + b * e * d
+    matrices[:, 1, 1] = a * e - b * f * d
+    matrices[:, 1, 2] = -b * c
+    matrices[:, 2, 0] = b * f - a * e * d
+    matrices[:, 2, 1] = b * e + a * f * d
+    matrices[:, 2, 2] = a * c
+    return matrices
+
+
+def _get_parameter_mins():
+    return np.array([FOV_RANGE[0]] + [LENGTH_RANGE[0]] * 3 + [ANGLE_RANGE[0]] * 3)
+
+
+def _get_parameter_maxes():
+    return np.array([FOV_RANGE[1]] + [LENGTH_RANGE[1]] * 3 + [ANGLE_RANGE[1]] * 3)
+
+
+def _get_points_array(points):
+    keys = ["x", "y", "z"] if "z" in points[0] else ["x", "y"]
+    return np.array([[point[key] for key in keys] for point in points], dtype=float)
+
+
+def _camera_transform_to_array(camera_transform):
+    position = camera_transform["position"]
+    rotation = camera_transform["rotation"]
+    return np.array([
+        camera_transform["fov"],
+        position["x"],
+        position["y"],
+        position["z"],
+        rotation["x"],
+        rotation["y"],
+        rotation["z"]
+    ], dtype=float)
+
+
+def _array_to_camera_transform(x):
+    return {
+        "fov": float(x[0]),
+        "position": {
+            "x": float(x[1]),
+            "y": float(x[2]),
+            "z": float(x[3])
+        },
+        "rotation": {
+            "x": float(x[4]),
+            "y": float(x[5]),
+            "z": float(x[6])
+        }
+    }
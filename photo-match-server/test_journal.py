@@ -0,0 +1,65 @@
+import json
+import os
+import tempfile
+import unittest
+import journal
+
+
+class JournalStoreTestCase(unittest.TestCase):
+
+    def setUp(self):
+        self._temp_dir = tempfile.TemporaryDirectory()
+        self.snapshot_path = os.path.join(self._temp_dir.name, "data.json")
+        self.journal_path = os.path.join(self._temp_dir.name, "data.journal.jsonl")
+        # Written by hand, not as the store writes it
+        self.snapshot_str = '{"_metadata": {"version": 1}, "scenes": []}'
+        with open(self.snapshot_path, "w") as f:
+            f.write(self.snapshot_str)
+
+    def tearDown(self):
+        self._temp_dir.cleanup()
+
+    def _get_store(self):
+        return journal.JournalStore(
+            snapshot_path=self.snapshot_path,
+            journal_path=self.journal_path)
+
+    def _read_snapshot(self):
+        with open(self.snapshot_path, "r") as f:
+            return f.read()
+
+    def test_load_without_changes_keeps_snapshot(self):
+        store = self._get_store()
+
+        self.assertEqual(store.get_data()["_metadata"]["version"], 1)
+        self.assertEqual(self._read_snapshot(), self.snapshot_str)
+
+    def test_load_replays_and_compacts_journal(self):
+        store = self._get_store()
+        store.set_data(data={"_metadata": {"version": 2}, "scenes": [{"id": 1}]})
+
+        store = self._get_store()
+
+        self.assertEqual(store.get_data()["_metadata"]["version"], 2)
+        self.assertEqual(
+            json.loads(self._read_snapshot()),
+            {"_metadata": {"version": 2}, "scenes": [{"id": 1}]})
+
+    def test_compaction_keeps_snapshot_mode(self):
+        os.chmod(self.snapshot_path, 0o664)
+        store = self._get_store()
+        store.set_data(data={"_metadata": {"version": 2}, "scenes": []})
+
+        store.compact()
+
+        self.assertEqual(os.stat(self.snapshot_path).st_mode & 0o777, 0o664)
+        self.assertEqual(
+            json.loads(self._read_snapshot())["_metadata"]["version"], 2)
+
+    def test_new_file_mode(self):
+        path = os.path.join(self._temp_dir.name, "new.json")
+
+        journal.write_json_atomic(path=path, data={})
+
+        self.assertEqual(
+            os.stat(path).st_mode & 0o777, journal.DEFAULT_FILE_MODE)
@@ -0,0 +1,84 @@
+import unittest
+import patch
+
+
+def _get_data():
+    return {
+        "_metadata": {
+            "version": 5,
+            "sceneVersions": {"10": 3, "11": 4, "12": 2}
+        },
+        "scenes": [
+            {"id": 10, "name": "a"},
+            {"id": 11, "name": "b"},
+            {"id": 12, "name": "c"}
+        ]
+    }
+
+
+class PatchTestCase(unittest.TestCase):
+
+    def test_replace_tags_scene(self):
+        data, ops = patch.apply_patch_request(data=_get_data(), body={
+            "baseVersion": 5,
+            "patch": [
+                {"op": "replace", "path": "/scenes/1/name", "value": "x"}
+            ]
+        })
+
+        self.assertEqual(data["_metadata"]["version"], 6)
+        self.assertEqual(
+            data["_metadata"]["sceneVersions"], {"10": 3, "11": 6, "12": 2})
+
+    def test_change_then_remove_scene(self):
+        data, ops = patch.apply_patch_request(data=_get_data(), body={
+            "baseVersion": 5,
+            "patch": [
+                {"op": "replace", "path": "/scenes/2/name", "value": "x"},
+                {"op": "remove", "path": "/scenes/2"}
+            ]
+        })
+
+        self.assertEqual([scene["id"] for scene in data["scenes"]], [10, 11])
+        self.assertEqual(
+            data["_metadata"]["sceneVersions"], {"10": 6, "11": 6})
+
+    def test_remove_then_change_scene(self):
+        data, ops = patch.apply_patch_request(data=_get_data(), body={
+            "baseVersion": 5,
+            "patch": [
+                {"op": "remove", "path": "/scenes/0"},
+                {"op": "replace", "path": "/scenes/1/name", "value": "x"}
+            ]
+        })
+
+        # The scene that was at index 2 was changed, not the one at index 1
+        self.assertEqual(
+            [scene["name"] for scene in data["scenes"]], ["b", "x"])
+        self.assertEqual(
+            data["_metadata"]["sceneVersions"], {"11": 6, "12": 6})
+
+    def test_insert_scene(self):
+        data, ops = patch.apply_patch_request(data=_get_data(), body={
+            "baseVersion": 5,
+            "patch": [
+                {"op": "add", "path": "/scenes/1", "value": {"id": 13}},
+                {"op": "replace", "path": "/scenes/3/name", "value": "x"}
+            ]
+        })
+
+        self.assertEqual(
+            [scene["id"] for scene in data["scenes"]], [10, 13, 11, 12])
+        self.assertEqual(
+            data["_metadata"]["sceneVersions"],
+            {"10": 6, "11": 6, "12": 6, "13": 6})
+
+    def test_post_removes_scene_version(self):
+        new_data = _get_data()
+        new_data["_metadata"]["version"] = 6
+        del new_data["scenes"][1]
+
+        data, ops = patch.apply_post_request(data=_get_data(), new_data=new_data)
+
+        self.assertEqual(
+            data["_metadata"]["sceneVersions"], {"10": 6, "12": 6})
@@ -25,6 +25,7 @@ type ControlsProps = {
     linkEdge: () => void
     unlinkEdge: () => void
     optimizeCameraTransform: () => void
+    optimizeAllCameraTransforms: () => void
 };
 
 export const Controls: FunctionComponent<ControlsProps> = (props): ReactElement => {
@@ -199,6 +200,16 @@ export const Controls: FunctionComponent<ControlsProps> = (props): ReactElement
                         </Button>
                     </PmTooltip>
 
+                    <PmTooltip text="Optimize 3D Camera Transforms of all Photos of the Scene">
+                        <Button
+                            variant="outlined"
+                            startIcon={<VideocamIcon />}
+                            onClick={props.optimizeAllCameraTransforms}
+                        >
+                            Optimize All
+                        </Button>
+                    </PmTooltip>
+
                 </Stack>
 
                 {/* <div></div> */}
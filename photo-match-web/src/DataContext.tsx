@@ -1,6 +1,7 @@
 import { FunctionComponent, PropsWithChildren, ReactElement, useCallback, useEffect, useRef } from 'react';
 import { createContext, Dispatch, useContext, useReducer } from 'react';
 import { throttle } from 'throttle-debounce';
+import { JsonPatch } from './JsonPatch';
 import { CameraOrbitTransform, CameraTransform, Data, LineEndpoint, Vector2D, ViewTransform } from './types';
 import { Utils } from './Utils';
 
@@ -24,6 +25,12 @@ type SetCameraTransformAction = {
     cameraTransform: CameraTransform
 };
 
+type SetCameraTransformsAction = {
+    action: 'setCameraTransforms'
+    // Camera transforms of photos of the current scene, by photo ID
+    cameraTransforms: { [photoId: number]: CameraTransform }
+};
+
 type SetControlModeAction = {
     action: 'setControlMode'
     controlMode: string
@@ -100,6 +107,7 @@ type DataAction =
     SetPhotoIdAction |
     SetViewTransformAction |
     SetCameraTransformAction |
+    SetCameraTransformsAction |
     SetControlModeAction |
     SetPhotoOpacityAction |
     SetLinesOpacityAction |
@@ -177,17 +185,48 @@ export const DataProvider: FunctionComponent<DataProviderProps> = (props): React
     []);
 
     // When data changes, and the data is ready, and this isn't the
-    // initial data (first time being ready), then save the data
+    // initial data (first time being ready), then save the data. Only the
+    // changes since the last save are sent, unless the server has a
+    // different version (e.g. the data was saved from another tab), in
+    // which case all of the data is sent.
+    const savedData = useRef<Data | null>(null);
     const saveData = useCallback(
         throttle(2000, async (data: Data) => {
-            const bodyStr = JSON.stringify(data);
-            await fetch('http://localhost:5007/data', {
+            // The reducers change nested objects in place, so keep a copy
+            const dataCopy: Data = JSON.parse(JSON.stringify(data));
+            // Only update the saved data once the server has it, so that a
+            // failed save is sent again with the next change
+            const lastSavedData = savedData.current;
+
+            if (lastSavedData !== null) {
+                const resp = await fetch('http://localhost:5007/data', {
+                    method: 'PATCH',
+                    headers: {
+                        'Content-Type': 'application/json'
+                    },
+                    body: JSON.stringify({
+                        baseVersion: lastSavedData._metadata.version,
+                        version: dataCopy._metadata.version,
+                        patch: JsonPatch.createPatch(lastSavedData, dataCopy)
+                    })
+                });
+                if (resp.ok) {
+                    savedData.current = dataCopy;
+                    return;
+                }
+            }
+
+            const bodyStr = JSON.stringify(dataCopy);
+            const resp = await fetch('http://localhost:5007/data', {
                 method: 'POST',
                 headers: {
                     'Content-Type': 'application/json'
                 },
                 body: bodyStr
             });
+            if (resp.ok) {
+                savedData.current = dataCopy;
+            }
         }),
         []
     );
@@ -198,6 +237,7 @@ export const DataProvider: FunctionComponent<DataProviderProps> = (props): React
         }
         if (isFirstReady.current) {
             isFirstReady.current = false;
+            savedData.current = JSON.parse(JSON.stringify(data));
             return;
         }
         saveData(data);
@@ -259,6 +299,19 @@ const setCameraTransform = (data: Data, action: SetCameraTransformAction): Data
     return newData;
 };
 
+const setCameraTransforms = (data: Data, action: SetCameraTransformsAction): Data => {
+    const newData = _getNewData(data);
+    const scene = Utils.getScene(newData);
+    for (const photo of scene.photos) {
+        const cameraTransform = action.cameraTransforms[photo.id];
+        if (cameraTransform) {
+            photo._uiData.cameraTransform = cameraTransform;
+            photo._uiData.cameraOrbitTransform = null;
+        }
+    }
+    return newData;
+};
+
 const setControlMode = (data: Data, action: SetControlModeAction): Data => {
     const newData = _getNewData(data);
     const photo = _getPhoto(newData);
@@ -398,6 +451,9 @@ const dataReducer = (data: Data, action: DataAction): Data => {
         
         case 'setCameraTransform':
             return setCameraTransform(data, action);
+
+        case 'setCameraTransforms':
+            return setCameraTransforms(data, action);
         
         case 'setControlMode':
             return setControlMode(data, action);
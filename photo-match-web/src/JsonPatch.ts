@@ -0,0 +1,78 @@
+// RFC 6902 JSON Patch operations, as accepted by PATCH /data
+export type JsonPatchOperation =
+    { op: 'add', path: string, value: any } |
+    { op: 'remove', path: string } |
+    { op: 'replace', path: string, value: any };
+
+const isObject = (value: any): boolean => {
+    return value !== null && typeof value === 'object' && !Array.isArray(value);
+};
+
+const escapePathToken = (token: string | number): string => {
+    return String(token).replace(/~/g, '~0').replace(/\//g, '~1');
+};
+
+const isEqual = (a: any, b: any): boolean => {
+    return JSON.stringify(a) === JSON.stringify(b);
+};
+
+const addOperations = (
+    operations: JsonPatchOperation[],
+    path: string,
+    oldValue: any,
+    newValue: any
+) => {
+    if (isObject(oldValue) && isObject(newValue)) {
+        for (const key of Object.keys(oldValue)) {
+            if (!(key in newValue)) {
+                operations.push({ op: 'remove', path: `${path}/${escapePathToken(key)}` });
+            }
+        }
+        for (const key of Object.keys(newValue)) {
+            const keyPath = `${path}/${escapePathToken(key)}`;
+            if (!(key in oldValue)) {
+                operations.push({ op: 'add', path: keyPath, value: newValue[key] });
+            } else {
+                addOperations(operations, keyPath, oldValue[key], newValue[key]);
+            }
+        }
+        return;
+    }
+
+    if (Array.isArray(oldValue) && Array.isArray(newValue)) {
+        // Items added to the end (e.g. a new line) are appended, otherwise
+        // arrays are compared item by item if they are the same length
+        const isAppend = (
+            newValue.length > oldValue.length &&
+            oldValue.every((item, i) => isEqual(item, newValue[i]))
+        );
+        if (isAppend) {
+            for (const item of newValue.slice(oldValue.length)) {
+                operations.push({ op: 'add', path: `${path}/-`, value: item });
+            }
+            return;
+        }
+        if (newValue.length === oldValue.length) {
+            for (let i = 0; i < newValue.length; i++) {
+                addOperations(operations, `${path}/${i}`, oldValue[i], newValue[i]);
+            }
+            return;
+        }
+    }
+
+    if (!isEqual(oldValue, newValue)) {
+        operations.push({ op: 'replace', path: path, value: newValue });
+    }
+};
+
+// Gets the operations that change oldData into newData. Changes inside
+// arrays of different lengths (e.g. a deleted line) replace the array.
+const createPatch = (oldData: any, newData: any): JsonPatchOperation[] => {
+    const operations: JsonPatchOperation[] = [];
+    addOperations(operations, '', oldData, newData);
+    return operations;
+};
+
+export const JsonPatch = {
+    createPatch
+};
@@ -1,6 +1,6 @@
 import { FunctionComponent, ReactElement, useCallback, useEffect, useRef, useState } from 'react';
 import useResizeObserver from '@react-hook/resize-observer';
-import { ControlMode, Dimensions, DrawNewLineInfo, LineEndpoint, Rect, ShapeMode, Vector2D } from './types';
+import { CameraTransform, ControlMode, Dimensions, DrawNewLineInfo, LineEndpoint, Rect, ShapeMode, Vector2D } from './types';
 import { Controls } from './Controls';
 import { useData } from './DataContext';
 import { LinesView } from './LinesView';
@@ -90,6 +90,24 @@ export const PanZoomContainer: FunctionComponent = (): ReactElement => {
         [ onDocumentKeyDown ]
     );
 
+    // Reload the model when the watch service (watch.py) has rebuilt it.
+    // Nothing happens if the watch service is not running.
+    useEffect(
+        () => {
+            const eventSource = new EventSource('http://localhost:5008/events');
+            eventSource.addEventListener('model', (event) => {
+                const modelEvent = JSON.parse((event as MessageEvent).data);
+                if (modelEvent.meshFilename === scene.meshFilename) {
+                    setRefreshCounter((counter) => counter + 1);
+                }
+            });
+            return () => {
+                eventSource.close();
+            };
+        },
+        [ scene.meshFilename ]
+    );
+
     // Gets a rect for the photo image, scaled to fit exactly inside
     // the container (how it would be sized if zoom level is 1)
     const getPhotoRect = (): Rect => {
@@ -514,6 +532,22 @@ export const PanZoomContainer: FunctionComponent = (): ReactElement => {
         });
     };
 
+    const optimizeAllCameraTransforms = async () => {
+        const results = await PhotoMatch.solveSceneCameraTransforms(sceneId);
+        const cameraTransforms: { [photoId: number]: CameraTransform } = {};
+        for (const result of results) {
+            if (result.converged) {
+                cameraTransforms[result.photoId] = result.cameraTransform;
+            } else {
+                console.log(`Error: Camera transform of photo ${result.photoId} did not converge`);
+            }
+        }
+        dispatch({
+            action: 'setCameraTransforms',
+            cameraTransforms: cameraTransforms
+        });
+    };
+
     const linkSelectedPhotoMatchLineAndShapeEdge = () => {
         const lineId = photo._uiData.lineId;
         const shapeId = photo._uiData.selectedShapeId;
@@ -573,7 +607,10 @@ export const PanZoomContainer: FunctionComponent = (): ReactElement => {
                         containerDimensions={containerDimensions}
                         boundary={getViewPhotoRect()}
                         opacity={photoOpacity}
-                        imageUrl={Utils.getFileUrl(photo.filename)}
+                        imageUrl={Utils.getFileUrl(
+                            photo.filename,
+                            Utils.getPhotoSize(getViewPhotoRect())
+                        )}
                     />
                     <LinesView
                         containerDimensions={containerDimensions}
@@ -593,7 +630,7 @@ export const PanZoomContainer: FunctionComponent = (): ReactElement => {
                         dimensions={getOverviewDimensions()}
                         photoRect={getOverviewPhotoRect()}
                         viewRect={getOverviewViewRect()}
-                        photoImageUrl={Utils.getFileUrl(photo.filename)}
+                        photoImageUrl={Utils.getFileUrl(photo.filename, 'thumbnail')}
                     />
                 </div>
             </div>
@@ -603,6 +640,7 @@ export const PanZoomContainer: FunctionComponent = (): ReactElement => {
                     linkEdge={linkSelectedPhotoMatchLineAndShapeEdge}
                     unlinkEdge={unlinkSelectedPhotoMatchLine}
                     optimizeCameraTransform={optimizeCameraTransform}
+                    optimizeAllCameraTransforms={optimizeAllCameraTransforms}
                 />
             </div>
         </div>
@@ -26,7 +26,7 @@ export const PhotoList: FunctionComponent = (): ReactElement => {
                     >
                         <img
                             className={className}
-                            src={Utils.getFileUrl(photo.filename)}
+                            src={Utils.getFileUrl(photo.filename, 'thumbnail')}
                             alt=""
                         />
                     </div>
@@ -1,5 +1,5 @@
 import { Mesh, MeshStandardMaterial, PerspectiveCamera, Scene } from 'three';
-import { CameraTransform, Line, PhotoMatchShape, PhotoMatchShapesDict, ShapeEdge, ShapeEdgeLine, ShapeMesh, ShapeMeshesDict } from './types';
+import { CameraTransform, Line, PhotoMatchShape, PhotoMatchShapesDict, PhotoSolveResult, ShapeEdge, ShapeEdge3D, ShapeEdgeLine, ShapeMesh, ShapeMeshesDict } from './types';
 import { BoxGeometry } from './geometry/BoxGeometry';
 import { HouseGeometry } from './geometry/HouseGeometry';
 import { RoofGeometry } from './geometry/RoofGeometry';
@@ -87,6 +87,47 @@ const getShapeEdgeLines = (
     return shapeEdgeLines;
 };
 
+// Gets the world positions of the edges of the shapes, as used by the
+// server to solve the camera transforms
+const getShapeEdges3D = (shapeMeshes: ShapeMesh[]): ShapeEdge3D[] => {
+    const shapeEdges: ShapeEdge3D[] = [];
+    for (const shapeMesh of shapeMeshes) {
+        for (let i = 0; i < shapeMesh.geometry.pmEdges.length; i++) {
+            const pmEdge: ShapeEdge = shapeMesh.geometry.pmEdges[i];
+            const v0 = pmEdge.v0.clone().applyMatrix4(shapeMesh.mesh.matrixWorld);
+            const v1 = pmEdge.v1.clone().applyMatrix4(shapeMesh.mesh.matrixWorld);
+            shapeEdges.push({
+                shapeId: shapeMesh.id,
+                edgeId: i,
+                v0: { x: v0.x, y: v0.y, z: v0.z },
+                v1: { x: v1.x, y: v1.y, z: v1.z }
+            });
+        }
+    }
+    return shapeEdges;
+};
+
+// Solves the camera transforms of all the photos of the scene on the
+// server, which solves the photos in parallel
+const solveSceneCameraTransforms = async (sceneId: number): Promise<PhotoSolveResult[]> => {
+    const shapes = getPhotoMatchShapesBySceneId()[sceneId.toString()];
+    const shapeMeshes = getShapeMeshes(shapes);
+    const resp = await fetch(`http://localhost:5007/scenes/${sceneId}/solve`, {
+        method: 'POST',
+        headers: {
+            'Content-Type': 'application/json'
+        },
+        body: JSON.stringify({
+            edges: getShapeEdges3D(shapeMeshes)
+        })
+    });
+    if (!resp.ok) {
+        throw new Error(`Solving camera transforms failed: ${resp.status}`);
+    }
+    const result = await resp.json();
+    return result.photos;
+};
+
 const getShapeMeshesBySceneId = (shapesBySceneId: PhotoMatchShapesDict): ShapeMeshesDict => {
     const shapeMeshesBySceneId: ShapeMeshesDict = {};
     for (const sceneId of Object.keys(shapesBySceneId)) {
@@ -277,6 +318,8 @@ export const PhotoMatch = {
     getPerspectiveCamera,
     // getPhotoMatchShapes,
     getPhotoMatchShapesBySceneId,
+    getShapeEdges3D,
     getShapeMeshes,
-    getShapeMeshesBySceneId
+    getShapeMeshesBySceneId,
+    solveSceneCameraTransforms
 };
@@ -5,6 +5,9 @@ export type Data = {
     _metadata: {
         version: number
         isReady: boolean
+        // Version of the data in which each scene was last changed, by
+        // scene ID (maintained by the server)
+        sceneVersions?: { [sceneId: string]: number }
     },
     _uiData: {
         sceneId: number
@@ -103,6 +106,9 @@ export type PhotoImage = {
     url: string
 };
 
+// The variants of a photo served by the server (see ?size= on /file)
+export type PhotoSize = 'thumbnail' | 'screen' | 'full';
+
 export type Rect = {
     x: number,
     y: number,
@@ -149,6 +155,22 @@ export type ShapeEdge = {
     v1: Vector3
 };
 
+// A shape edge in world space
+export type ShapeEdge3D = {
+    shapeId: number
+    edgeId: number
+    v0: Vector3D
+    v1: Vector3D
+};
+
+// A camera transform solved by the server (see POST /scenes/<id>/solve)
+export type PhotoSolveResult = {
+    photoId: number
+    cameraTransform: CameraTransform
+    residual: number
+    converged: boolean
+};
+
 export type ShapeEdgeLine = {
     shapeId: number
     edgeId: number
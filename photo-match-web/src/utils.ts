@@ -10,6 +10,7 @@ import {
     LineEndpoint,
     LinePointPerpDistInfo,
     Photo,
+    PhotoSize,
     Rect,
     RectStyle,
     Scene,
@@ -31,10 +32,21 @@ const getDistanceSquared = (a: Vector2D, b: Vector2D): number => {
     return dx * dx + dy * dy;
 };
 
-const getFileUrl = (filename: string): string => {
-    return `http://localhost:5007/file/${filename}`;
+const getFileUrl = (filename: string, size?: PhotoSize): string => {
+    const url = `http://localhost:5007/file/${filename}`;
+    return size ? `${url}?size=${size}` : url;
 }
 
+// The maximum width and height of the screen size variant of a photo
+const SCREEN_PHOTO_SIZE = 2048;
+
+// Gets the smallest photo size that has enough pixels to show the photo
+// at the given size in CSS pixels
+const getPhotoSize = (dimensions: Dimensions): PhotoSize => {
+    const maxPixels = Math.max(dimensions.width, dimensions.height) * window.devicePixelRatio;
+    return maxPixels <= SCREEN_PHOTO_SIZE ? 'screen' : 'full';
+};
+
 const getClickedLineEndpoint = (mousePosition: Vector2D, lines: Line[]): LineEndpoint | null  => {
     const endpointRadiusSq = 0.00006;  // TO DO: Convert to pixels?
     for (const line of lines) {
@@ -241,6 +253,7 @@ export const Utils = {
     getLinePointPerpDistInfo,
     getPhoto,
     getPhotoId,
+    getPhotoSize,
     getRectStyle,
     getScaledRect,
     getScene,
@@ -1,8 +1,58 @@
+import argparse
+import sys
 from buildings import buildings_v2
 
 
 def main():
-    buildings_v2.main()
+    parser = argparse.ArgumentParser(
+        description="Build models and export their meshes, edges and SVGs")
+    parser.add_argument(
+        "models",
+        nargs="*",
+        help=f"Models to build (default: all of {', '.join(buildings_v2.MODEL_BUILDERS)})")
+    parser.add_argument(
+        "--jobs",
+        type=int,
+        default=1,
+        help="Number of models to build at once, each in its own process")
+    parser.add_argument(
+        "--outline-jobs",
+        type=int,
+        default=1,
+        help="Number of processes that extract the outlines of a model's panels")
+    parser.add_argument(
+        "--no-svgs",
+        action="store_true",
+        help="Only export the mesh and edges")
+    parser.add_argument(
+        "--cache",
+        action="store_true",
+        help="Load unchanged parts of the models from the build cache")
+    parser.add_argument(
+        "--clean",
+        action="store_true",
+        help="Merge the coplanar faces and collinear edges of the panels before exporting")
+
+    args = parser.parse_args()
+    for model_name in args.models:
+        if model_name not in buildings_v2.MODEL_BUILDERS:
+            parser.error(f"Unknown model: {model_name}")
+
+    model_exports = buildings_v2.export_models(
+        model_names=args.models or list(buildings_v2.MODEL_BUILDERS.keys()),
+        jobs=args.jobs,
+        include_svgs=not args.no_svgs,
+        use_build_cache=args.cache,
+        clean_topology=args.clean,
+        outline_jobs=args.outline_jobs)
+
+    for me in model_exports:
+        if me.error is not None:
+            print(f"{me.model_name} failed:\n{me.error}", file=sys.stderr)
+
+    print(buildings_v2.format_model_exports(model_exports=model_exports))
+    if any([me.error is not None for me in model_exports]):
+        sys.exit(1)
 
 
 if __name__ == "__main__":
@@ -0,0 +1,47 @@
+import tempfile
+import unittest
+from buildings import build_cache_v2
+from buildings import fingerprints_v2
+from buildings.panels_v2.stokesley_station import platform_shelter
+from test_buildings import utils
+
+
+class BuildCacheTestCase(unittest.TestCase):
+
+    def test_cached_platform_shelter(self):
+        with tempfile.TemporaryDirectory() as cache_dirpath:
+            with build_cache_v2.build_cache(cache_dirpath=cache_dirpath) as cache:
+                platform_shelter.platform_shelter(transform=[])
+            self.assertEqual(cache.hit_count, 0)
+            self.assertGreater(cache.miss_count, 0)
+
+            with build_cache_v2.build_cache(cache_dirpath=cache_dirpath) as cache:
+                pg = platform_shelter.platform_shelter(transform=[])
+            # The whole building is loaded from the cache
+            self.assertEqual(cache.hit_count, 1)
+            self.assertEqual(cache.miss_count, 0)
+
+        fingerprints = fingerprints_v2.get_fingerprints(panel_group=pg)
+        expected_fingerprints = utils.read_fingerprints(
+            filename="platform_shelter_1.json")
+        utils.assert_equal_fingerprints(
+            fingerprints=fingerprints,
+            expected_fingerprints=expected_fingerprints)
+
+    def test_pickle_cache_evicts_least_recently_used(self):
+        pickle_cache = build_cache_v2._PickleCache(max_bytes=10)
+        pickle_cache.put(key="a", data=b"aaaa")
+        pickle_cache.put(key="b", data=b"bbbb")
+        self.assertEqual(pickle_cache.get(key="a"), b"aaaa")
+
+        pickle_cache.put(key="c", data=b"cccc")
+
+        self.assertIsNone(pickle_cache.get(key="b"))
+        self.assertEqual(pickle_cache.get(key="a"), b"aaaa")
+        self.assertEqual(pickle_cache.get(key="c"), b"cccc")
+        self.assertEqual(pickle_cache.byte_count, 8)
+
+        # Too large to keep in memory at all
+        pickle_cache.put(key="d", data=b"d" * 11)
+        self.assertIsNone(pickle_cache.get(key="d"))
+        self.assertEqual(pickle_cache.byte_count, 8)
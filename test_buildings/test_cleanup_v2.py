@@ -0,0 +1,93 @@
+import unittest
+from buildings import cleanup_v2
+from buildings import panels_v2
+from buildings.transforms_v2 import Translate
+
+
+class CleanupTestCase(unittest.TestCase):
+
+    def test_clean_shared_and_mirrored_panels(self):
+        # A roof with an overhang joined without cleaning, so its top and
+        # bottom faces are split where they were joined. Both layers share
+        # its solid, and the front roof is its mirrored twin.
+        roof_wp = panels_v2.basic_rect(width=40, height=30, thickness=2).union(
+            panels_v2.basic_rect(width=3, height=30, thickness=2)
+            .translate((-21.5, 0, 0)),
+            clean=False)
+        back_roof = panels_v2.PanelGroup(name="back_roof", panels=[
+            panels_v2.Panel(
+                name="p0",
+                media=None,
+                workplane=roof_wp,
+                transform=[Translate((0, 3, 0))]),
+            panels_v2.Panel(
+                name="p1",
+                media=None,
+                workplane=roof_wp,
+                transform=[Translate((0, 3, 2))])
+        ])
+        front_roof = panels_v2.twin(
+            panel_group=back_roof,
+            name="front_roof",
+            transform=[],
+            mirror_plane="XZ")
+        roof = panels_v2.PanelGroup(
+            name="roof",
+            children=[back_roof, front_roof])
+        mirrored_wp = front_roof.panels[0].workplane
+
+        stats = cleanup_v2.clean_panel_group(panel_group=roof)
+
+        self.assertEqual(stats.panel_count, 4)
+        self.assertLess(stats.face_count_after, stats.face_count_before)
+        self.assertLess(stats.edge_count_after, stats.edge_count_before)
+
+        cleaned_wp = back_roof.panels[0].workplane
+        self.assertIsNot(cleaned_wp, roof_wp)
+        self.assertIs(back_roof.panels[1].workplane, cleaned_wp)
+        self._assert_same_shape(workplane=cleaned_wp, expected_workplane=roof_wp)
+
+        cleaned_mirrored_wp = front_roof.panels[0].workplane
+        self.assertIs(front_roof.panels[1].workplane, cleaned_mirrored_wp)
+        self.assertEqual(
+            panels_v2.get_mirror_source(workplane=cleaned_mirrored_wp),
+            (cleaned_wp, "XZ"))
+        self._assert_same_shape(
+            workplane=cleaned_mirrored_wp,
+            expected_workplane=mirrored_wp)
+
+    def test_joined_panel_is_already_clean(self):
+        # + and - clean their result, so there is nothing left to merge
+        roof_wp = panels_v2.roof_rect(
+            width=40,
+            height=30,
+            thickness=2,
+            overhang_left=3,
+            overhang_right=3,
+            overhang_bottom=2)
+        roof = panels_v2.PanelGroup(name="roof", panels=[
+            panels_v2.Panel(name="p0", media=None, workplane=roof_wp)
+        ])
+
+        stats = cleanup_v2.clean_panel_group(panel_group=roof)
+
+        self.assertEqual(stats.face_count_after, stats.face_count_before)
+        self.assertEqual(stats.edge_count_after, stats.edge_count_before)
+        self._assert_same_shape(
+            workplane=roof.panels[0].workplane,
+            expected_workplane=roof_wp)
+
+    def _assert_same_shape(self, workplane, expected_workplane):
+        shape = workplane.val()
+        expected_shape = expected_workplane.val()
+        self.assertAlmostEqual(shape.Volume(), expected_shape.Volume())
+        bb = shape.BoundingBox()
+        expected_bb = expected_shape.BoundingBox()
+        for value, expected_value in zip(
+            [bb.xmin, bb.ymin, bb.zmin, bb.xmax, bb.ymax, bb.zmax],
+            [
+                expected_bb.xmin, expected_bb.ymin, expected_bb.zmin,
+                expected_bb.xmax, expected_bb.ymax, expected_bb.zmax
+            ]
+        ):
+            self.assertAlmostEqual(value, expected_value)
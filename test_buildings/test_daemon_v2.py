@@ -0,0 +1,87 @@
+import io
+import os
+import subprocess
+import sys
+import tempfile
+import time
+import unittest
+from buildings import daemon_v2
+
+
+# Starting the daemon imports cadquery
+START_TIMEOUT = 60
+
+SCRIPT_STR = """import cadquery as cq
+print("Running box.py")
+show_object(cq.Workplane("XY").box(1, 2, 3), name="box")
+"""
+
+
+class DaemonTestCase(unittest.TestCase):
+
+    def test_status_and_run(self):
+        with tempfile.TemporaryDirectory() as dirpath:
+            client_dirpath = os.path.join(dirpath, "client")
+            os.makedirs(client_dirpath)
+            with open(os.path.join(client_dirpath, "box.py"), "w") as f:
+                f.write(SCRIPT_STR)
+            socket_path = os.path.join(dirpath, "daemon.sock")
+
+            # The socket path is relative to the directory of the daemon,
+            # which is not the directory of the client
+            daemon = subprocess.Popen(
+                [
+                    sys.executable,
+                    os.path.join(daemon_v2.ROOT_DIRPATH, "daemon.py"),
+                    "--socket", "./daemon.sock",
+                    "start"
+                ],
+                cwd=dirpath,
+                stdout=subprocess.DEVNULL)
+            cwd = os.getcwd()
+            try:
+                status = self._wait_for_status(socket_path=socket_path)
+                self.assertEqual(status["pid"], daemon.pid)
+
+                os.chdir(client_dirpath)
+                output = io.StringIO()
+                preview_paths = daemon_v2.request(
+                    command="run",
+                    args={"path": "box.py"},
+                    socket_path=socket_path,
+                    output=output)
+                self.assertEqual(preview_paths, ["./output/preview/box-box.gltf"])
+                self.assertTrue(os.path.exists(preview_paths[0]))
+                self.assertIn("Running box.py", output.getvalue())
+
+                status = daemon_v2.request(
+                    command="status",
+                    socket_path=socket_path,
+                    output=io.StringIO())
+                self.assertEqual(status["requestCount"], 3)
+
+                daemon_v2.request(
+                    command="stop",
+                    socket_path=socket_path,
+                    output=io.StringIO())
+                self.assertEqual(daemon.wait(timeout=START_TIMEOUT), 0)
+            finally:
+                os.chdir(cwd)
+                if daemon.poll() is None:
+                    daemon.kill()
+                    daemon.wait()
+
+            self.assertFalse(os.path.exists(socket_path))
+
+    def _wait_for_status(self, socket_path: str) -> dict:
+        end_time = time.monotonic() + START_TIMEOUT
+        while True:
+            try:
+                return daemon_v2.request(
+                    command="status",
+                    socket_path=socket_path,
+                    output=io.StringIO())
+            except daemon_v2.DaemonNotRunningError:
+                if time.monotonic() > end_time:
+                    raise
+                time.sleep(0.1)
@@ -0,0 +1,88 @@
+import os
+import tempfile
+import unittest
+from buildings import buildings_v2
+from buildings import dependencies_v2
+from buildings.panels_v2 import town
+from buildings.panels_v2.stokesley_station import side_house
+from buildings.panels_v2.stokesley_station import signal_box
+from buildings.panels_v2.stokesley_station import waiting_room
+
+
+class DependenciesTestCase(unittest.TestCase):
+
+    def test_get_imports(self):
+        with tempfile.TemporaryDirectory() as dirpath:
+            path = os.path.join(dirpath, "house.py")
+            with open(path, "w") as f:
+                f.write(
+                    "import os\n"
+                    "import buildings.transforms_v2\n"
+                    "from cadquery import Workplane\n"
+                    "from buildings import media_v2 as media\n"
+                    "from buildings.panels_v2 import PanelGroup, window_panels\n")
+
+            imports = dependencies_v2.get_imports(path=path)
+
+        self.assertEqual(imports, {
+            "buildings": "buildings.transforms_v2",
+            "media": "buildings.media_v2",
+            # A name defined in a package is bound to the package, and a
+            # submodule to the submodule
+            "PanelGroup": "buildings.panels_v2",
+            "window_panels": "buildings.panels_v2.window_panels"
+        })
+
+    def test_get_function_dependencies(self):
+        dependencies = dependencies_v2.get_function_dependencies(
+            fn=side_house.side_house)
+
+        self.assertIn(os.path.abspath(side_house.__file__), dependencies)
+        self.assertIn(_get_module_path("panels_v2/window_panels.py"), dependencies)
+        self.assertIn(_get_module_path("panels_v2/__init__.py"), dependencies)
+        self.assertIn(_get_module_path("__init__.py"), dependencies)
+        # Imported by the module, but not used by the function
+        self.assertNotIn(os.path.abspath(waiting_room.__file__), dependencies)
+        self.assertNotIn(os.path.abspath(signal_box.__file__), dependencies)
+
+    def test_module_constants_are_dependencies(self):
+        # town() only uses media_v2 through the constants of its module
+        dependencies = dependencies_v2.get_function_dependencies(fn=town.town)
+
+        self.assertIn(_get_module_path("media_v2.py"), dependencies)
+
+    def test_get_affected_names(self):
+        dependencies_by_name = {
+            name: dependencies_v2.get_function_dependencies(fn=fn)
+            for name, fn in buildings_v2.MODEL_BUILDERS.items()
+        }
+
+        self.assertEqual(
+            dependencies_v2.get_affected_names(
+                dependencies_by_name=dependencies_by_name,
+                changed_paths=[waiting_room.__file__]),
+            ["stokesley-station"])
+        self.assertEqual(
+            dependencies_v2.get_affected_names(
+                dependencies_by_name=dependencies_by_name,
+                changed_paths=[side_house.__file__]),
+            ["stokesley-station"])
+        self.assertEqual(
+            dependencies_v2.get_affected_names(
+                dependencies_by_name=dependencies_by_name,
+                changed_paths=[signal_box.__file__]),
+            ["signal-box"])
+        self.assertEqual(
+            dependencies_v2.get_affected_names(
+                dependencies_by_name=dependencies_by_name,
+                changed_paths=[_get_module_path("panels_v2/houses.py")]),
+            ["signal-box", "platform-shelter", "stokesley-station"])
+        self.assertEqual(
+            dependencies_v2.get_affected_names(
+                dependencies_by_name=dependencies_by_name,
+                changed_paths=[_get_module_path("live_v2.py")]),
+            [])
+
+
+def _get_module_path(relative_path: str) -> str:
+    return os.path.join(dependencies_v2.get_package_dirpath(), relative_path)
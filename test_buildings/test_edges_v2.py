@@ -0,0 +1,156 @@
+import itertools
+import json
+import os
+import tempfile
+import unittest
+from buildings import buildings_v2
+from buildings import edges_v2
+from buildings import export_v2
+from buildings import panels_v2
+from buildings.transforms_v2 import Translate
+
+
+class SimplifyEdgesTestCase(unittest.TestCase):
+
+    def test_panel_outline(self):
+        # The edges of a 40 x 30 x 0.56 mm panel
+        front = [(0, 0, 0), (40, 0, 0), (40, 30, 0), (0, 30, 0)]
+        back = [(x, y, 0.56) for x, y, _ in front]
+        edges = []
+        for loop in [front, back]:
+            for i in range(4):
+                edges.append((loop[i], loop[(i + 1) % 4]))
+        for i in range(4):
+            edges.append((front[i], back[i]))
+
+        simplified_edges = edges_v2.simplify_edges(edges=edges)
+
+        # One edge per side of the panel
+        self.assertEqual(len(simplified_edges), 4)
+        lengths = sorted([edges_v2._length(edge=edge) for edge in simplified_edges])
+        self.assertEqual(lengths, [30, 30, 40, 40])
+
+    def test_join_edges(self):
+        # The top edge of a wall made of three panels, and a short edge
+        # along it from a window
+        edges = [
+            ((0, 0, 50), (20, 0, 50)),
+            ((40, 0, 50), (20, 0, 50)),
+            ((40, 0, 50), (60, 0, 50)),
+            ((25, 0, 49.5), (35, 0, 49.5))
+        ]
+
+        simplified_edges = edges_v2.simplify_edges(edges=edges)
+
+        self.assertEqual(simplified_edges, [((0, 0, 50), (60, 0, 50))])
+
+
+class ShapeEdgesTestCase(unittest.TestCase):
+
+    def test_signal_box(self):
+        pg = buildings_v2.build_signal_box()
+
+        shape_edges = edges_v2.get_shape_edges(panel_group=pg)
+
+        # One shape per top level child
+        self.assertEqual(
+            [(se.id, se.name) for se in shape_edges], [(0, "signal_box")])
+        edges = [
+            (tuple(edge[:3]), tuple(edge[3:]))
+            for edge in shape_edges[0].edges
+        ]
+        self.assertGreater(len(edges), 0)
+
+        # In the coordinates of the mesh: millimeters, with Z up and the
+        # building standing on Z = 0
+        bbs = [
+            workplane.val().BoundingBox()
+            for workplane in panels_v2.get_all_transformed_workplanes(
+                panel_group=pg)
+        ]
+        points = [point for edge in edges for point in edge]
+        for k, (min_value, max_value) in enumerate([
+            (min([bb.xmin for bb in bbs]), max([bb.xmax for bb in bbs])),
+            (min([bb.ymin for bb in bbs]), max([bb.ymax for bb in bbs])),
+            (min([bb.zmin for bb in bbs]), max([bb.zmax for bb in bbs]))
+        ]):
+            self.assertAlmostEqual(min([p[k] for p in points]), min_value, places=1)
+            self.assertLessEqual(max([p[k] for p in points]), max_value + 0.01)
+        self.assertAlmostEqual(min([p[2] for p in points]), 0)
+        self.assertGreater(max([p[2] for p in points]), 50)
+
+        # No short or duplicate edges
+        for edge in edges:
+            self.assertGreaterEqual(
+                edges_v2._length(edge=edge), edges_v2.MIN_EDGE_LENGTH - 0.01)
+        self.assertEqual(len(set(edges)), len(edges))
+        for edge, other in itertools.permutations(edges, 2):
+            self.assertFalse(edges_v2._is_along(
+                edge=edge,
+                other=other,
+                merge_distance=edges_v2.MERGE_DISTANCE))
+
+    def test_shape_per_child(self):
+        pg = panels_v2.PanelGroup(
+            name="yard",
+            panels=[
+                panels_v2.Panel(
+                    name="base",
+                    media=None,
+                    workplane=panels_v2.basic_rect(width=100, height=60, thickness=2))
+            ],
+            children=[
+                _box_group(name="shed", transform=[Translate((-20, 0, 2))]),
+                _box_group(name="hut", transform=[Translate((20, 0, 2))])
+            ])
+
+        shape_edges = edges_v2.get_shape_edges(panel_group=pg)
+
+        self.assertEqual(
+            [(se.id, se.name) for se in shape_edges],
+            [(0, "yard"), (1, "shed"), (2, "hut")])
+        # The children's transforms are applied
+        self.assertEqual(
+            min([edge[0] for edge in shape_edges[1].edges]), -25)
+        self.assertEqual(
+            min([edge[0] for edge in shape_edges[2].edges]), 15)
+
+    def test_export_edges(self):
+        pg = buildings_v2.build_signal_box()
+
+        with tempfile.TemporaryDirectory() as output_dirpath:
+            edges_path = export_v2.export_edges(
+                output_dirpath=output_dirpath,
+                model_name="signal-box",
+                panel_group=pg)
+            self.assertEqual(os.path.basename(edges_path), "signal-box.edges.json")
+            with open(edges_path, "r") as f:
+                edges_json = json.load(f)
+            mtime = os.stat(edges_path).st_mtime_ns
+
+            # An unchanged file is left alone
+            export_v2.export_edges(
+                output_dirpath=output_dirpath,
+                model_name="signal-box",
+                panel_group=pg)
+            self.assertEqual(os.stat(edges_path).st_mtime_ns, mtime)
+
+        self.assertEqual(edges_json["units"], "mm")
+        self.assertEqual(edges_json["upAxis"], "Z")
+        self.assertEqual(
+            edges_json["shapes"],
+            json.loads(edges_v2.shape_edges_to_json(
+                shape_edges=edges_v2.get_shape_edges(panel_group=pg)))["shapes"])
+
+
+def _box_group(name, transform):
+    # A 10 mm cube of card
+    return panels_v2.PanelGroup(
+        name=name,
+        transform=transform,
+        panels=[
+            panels_v2.Panel(
+                name="p0",
+                media=None,
+                workplane=panels_v2.basic_rect(width=10, height=10, thickness=10))
+        ])
@@ -0,0 +1,74 @@
+import json
+import os
+import struct
+import tempfile
+import unittest
+from buildings import export_v2
+from buildings import gltf_v2
+from buildings.panels_v2.stokesley_station import signal_box
+
+
+class ExportTestCase(unittest.TestCase):
+
+    def test_export_mesh(self):
+        pg = signal_box.signal_box(transform=[])
+        with tempfile.TemporaryDirectory() as output_dirpath:
+            mesh_paths = export_v2.export_mesh(
+                output_dirpath=output_dirpath,
+                model_name="signal-box",
+                panel_group=pg)
+
+            self.assertEqual(
+                [os.path.basename(path) for path in mesh_paths],
+                ["signal-box.gltf", "signal-box.bin"])
+            self.assertEqual(
+                sorted(os.listdir(output_dirpath)),
+                ["signal-box.bin", "signal-box.gltf"])
+            with open(mesh_paths[0], "r") as f:
+                gltf = json.load(f)
+            self.assertEqual(
+                [buffer["uri"] for buffer in gltf["buffers"]],
+                ["signal-box.bin"])
+
+            manifest = export_v2.update_manifest(
+                output_dirpath=output_dirpath,
+                paths=mesh_paths)
+            self.assertEqual(
+                manifest["added"], ["signal-box.bin", "signal-box.gltf"])
+
+            # Exporting the same mesh again leaves the files alone
+            mtimes = [os.stat(path).st_mtime_ns for path in mesh_paths]
+            mesh_paths = export_v2.export_mesh(
+                output_dirpath=output_dirpath,
+                model_name="signal-box",
+                panel_group=pg)
+            manifest = export_v2.update_manifest(
+                output_dirpath=output_dirpath,
+                paths=mesh_paths)
+
+            self.assertEqual(
+                [os.stat(path).st_mtime_ns for path in mesh_paths], mtimes)
+            self.assertEqual(manifest["added"], [])
+            self.assertEqual(manifest["changed"], [])
+            self.assertEqual(manifest["removed"], [])
+            self.assertEqual(
+                sorted(os.listdir(output_dirpath)),
+                [export_v2.MANIFEST_FILENAME, "signal-box.bin", "signal-box.gltf"])
+
+    def test_export_streaming(self):
+        with tempfile.TemporaryDirectory() as output_dirpath:
+            panel_count = export_v2.export_streaming(
+                output_dirpath=output_dirpath,
+                model_name="signal-box",
+                name="signal_box",
+                builders=[lambda: signal_box.signal_box(transform=[])])
+
+            self.assertGreater(panel_count, 0)
+            mesh_path = os.path.join(output_dirpath, "signal-box.glb")
+            with open(mesh_path, "rb") as f:
+                magic, version, length = struct.unpack("<III", f.read(12))
+            self.assertEqual(magic, gltf_v2.GLB_MAGIC)
+            self.assertEqual(version, gltf_v2.GLB_VERSION)
+            self.assertEqual(length, os.path.getsize(mesh_path))
+            self.assertFalse(os.path.exists(
+                os.path.join(output_dirpath, "signal-box.gltf")))
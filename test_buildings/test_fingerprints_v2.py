@@ -0,0 +1,79 @@
+import unittest
+from buildings import fingerprints_v2
+from buildings.fingerprints_v2 import PanelFingerprint
+
+
+def _fingerprint(name: str, **kwargs) -> PanelFingerprint:
+    fp_dict = {
+        "name": name,
+        "media": "0.56mm white card",
+        "volume": 100.0,
+        "area": 400.0,
+        "bounding_box": [-5.0, -10.0, 0.0, 5.0, 10.0, 0.56],
+        "vertex_loops_hash": "a",
+        "tessellation_hash": "b"
+    }
+    fp_dict.update(kwargs)
+    return PanelFingerprint(**fp_dict)
+
+
+class CompareFingerprintsTestCase(unittest.TestCase):
+
+    maxDiff = None
+
+    def test_equal_within_tolerance(self):
+        expected = [_fingerprint("wall_p0_base_wall")]
+        fingerprints = [
+            _fingerprint(
+                "wall_p0_base_wall",
+                volume=100.00001,
+                bounding_box=[-5.0, -10.0, 0.0, 5.0, 10.0000001, 0.56])
+        ]
+        differences = fingerprints_v2.compare_fingerprints(
+            fingerprints=fingerprints,
+            expected_fingerprints=expected)
+        self.assertEqual(differences, [])
+
+    def test_changed_panels_are_named(self):
+        expected = [
+            _fingerprint("wall_p0_base_wall"),
+            _fingerprint("wall_p1_outside_wall"),
+            _fingerprint("wall_p2_inside_wall")
+        ]
+        fingerprints = [
+            _fingerprint("wall_p0_base_wall", area=410.0),
+            _fingerprint("wall_p1_outside_wall", vertex_loops_hash="c"),
+            _fingerprint("wall_p3_pin0")
+        ]
+        differences = fingerprints_v2.compare_fingerprints(
+            fingerprints=fingerprints,
+            expected_fingerprints=expected)
+        self.assertEqual(differences, [
+            "wall_p2_inside_wall: panel removed",
+            "wall_p3_pin0: panel added",
+            "wall_p0_base_wall: area 410.000000 != 400.000000",
+            "wall_p1_outside_wall: vertex loops changed"
+        ])
+
+    def test_json_round_trip(self):
+        fingerprints = [
+            _fingerprint("wall_p0_base_wall"),
+            _fingerprint("wall_p1_outside_wall", tessellation_hash="d")
+        ]
+        json_str = fingerprints_v2.fingerprints_to_json(
+            fingerprints=fingerprints)
+        self.assertEqual(
+            fingerprints_v2.fingerprints_from_json(json_str=json_str),
+            fingerprints)
+
+
+class VertexLoopsHashTestCase(unittest.TestCase):
+
+    def test_start_vertex_and_direction_are_ignored(self):
+        loops_a = {0: [(0, 0), (10, 0), (10, 5), (0, 5)]}
+        loops_b = {0: [(10, 5.0000001), (10, 0), (0, 0), (0, 5)]}
+        self.assertEqual(
+            fingerprints_v2._vertex_loops_hash(
+                vertex_loops=loops_a, tolerance=1e-3),
+            fingerprints_v2._vertex_loops_hash(
+                vertex_loops=loops_b, tolerance=1e-3))
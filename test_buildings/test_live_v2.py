@@ -0,0 +1,43 @@
+import json
+import os
+import tempfile
+import unittest
+from buildings import live_v2
+
+
+class LiveTestCase(unittest.TestCase):
+
+    def test_rebuild_sends_model_event(self):
+        broadcaster = live_v2.EventBroadcaster()
+        client_queue = broadcaster.add_client()
+        with tempfile.TemporaryDirectory() as data_dirpath:
+            live_v2._rebuild(
+                model_name="signal-box",
+                data_dirpath=data_dirpath,
+                broadcaster=broadcaster)
+
+            event, data = _parse_message(message=client_queue.get_nowait())
+            self.assertEqual(event, "model")
+            self.assertEqual(data["model"], "signal-box")
+            self.assertEqual(data["meshFilename"], "signal-box.gltf")
+            self.assertEqual(
+                data["meshFilenames"], ["signal-box.gltf", "signal-box.bin"])
+            # Every file that the viewer loads has been written
+            self.assertEqual(
+                sorted(data["filenames"]), sorted(os.listdir(data_dirpath)))
+            self.assertTrue(set(data["meshFilenames"]) <= set(data["filenames"]))
+
+    def test_model_dependencies(self):
+        dependencies_by_name = live_v2.get_model_dependencies(
+            model_names=["signal-box", "platform-shelter"])
+
+        export_path = os.path.abspath(live_v2.export_v2.__file__)
+        self.assertIn(export_path, dependencies_by_name["signal-box"])
+        self.assertIn(export_path, dependencies_by_name["platform-shelter"])
+
+
+def _parse_message(message: str) -> tuple[str, dict]:
+    event_line, data_line = message.strip().split("\n")
+    return (
+        event_line.removeprefix("event: "),
+        json.loads(data_line.removeprefix("data: ")))
@@ -0,0 +1,49 @@
+import unittest
+from buildings import nets_v2
+
+
+class OutlineStoreTestCase(unittest.TestCase):
+
+    def test_round_trip(self):
+        wall_loops = {
+            0: [(0.0, 0.0), (40.0, 0.0), (40.0, 30.0), (0.0, 30.0)],
+            1: [(10.0, 10.0), (20.0, 10.0), (20.0, 20.0), (10.0, 20.0)]
+        }
+        roof_loops = {
+            0: [(-5.5, -2.25), (5.5, -2.25), (0.0, 8.125)]
+        }
+        store = nets_v2.OutlineStore()
+        store.add(name="wall", media_name="card", vertex_loops=wall_loops)
+        store.add(name="roof", media_name="corrugated", vertex_loops=roof_loops)
+
+        self.assertEqual(store.get_vertex_loops(name="wall"), wall_loops)
+        self.assertEqual(store.get_vertex_loops(name="roof"), roof_loops)
+        self.assertEqual(store.get_media_names(), ["card", "corrugated"])
+
+        layout_panels = store.get_layout_panels(media_name="corrugated")
+        self.assertEqual(len(layout_panels), 1)
+        self.assertEqual(layout_panels[0].name, "roof")
+        self.assertEqual(layout_panels[0].vertex_loops, {})
+        self.assertEqual(layout_panels[0].width, 11)
+        self.assertEqual(layout_panels[0].height, 10.375)
+        self.assertEqual(layout_panels[0].center_offset_x, 0)
+        self.assertEqual(layout_panels[0].center_offset_y, 2.9375)
+        # Many layout panels are kept at once, without a dict each
+        self.assertFalse(hasattr(layout_panels[0], "__dict__"))
+
+    def test_points_strs(self):
+        store = nets_v2.OutlineStore()
+        store.add(name="wall", media_name="card", vertex_loops={
+            0: [(0.0, 0.0), (40.0, 0.0), (40.0, 30.0)],
+            1: [(10.0, 10.5), (20.0, 10.5)]
+        })
+
+        self.assertEqual(
+            store.get_points_strs(name="wall"),
+            ["0.0,0.0 40.0,0.0 40.0,30.0", "10.0,10.5 20.0,10.5"])
+
+    def test_duplicate_name(self):
+        store = nets_v2.OutlineStore()
+        store.add(name="wall", media_name="card", vertex_loops={0: [(0, 0)]})
+        with self.assertRaises(Exception):
+            store.add(name="wall", media_name="card", vertex_loops={0: [(0, 0)]})
@@ -0,0 +1,168 @@
+import unittest
+from buildings import panels_v2
+from buildings import profiles_v2
+from buildings import vertices_v2
+from buildings.transforms_v2 import Translate
+
+
+class PanelsTestCase(unittest.TestCase):
+
+    def test_stack_shares_identical_layers(self):
+        widths = []
+
+        def build_layer(width):
+            widths.append(width)
+            return profiles_v2.rect(width=width, height=30, thickness=2)
+
+        panels = panels_v2.stack_panels(
+            media=None,
+            layers=[
+                (38, [Translate((0, 0, 0))]),
+                (40, [Translate((0, 0, 2))]),
+                (40, [Translate((0, 0, 4))])
+            ],
+            build_layer=build_layer)
+
+        self.assertEqual(widths, [38, 40])
+        self.assertEqual([p.name for p in panels], ["p0", "p1", "p2"])
+        self.assertIs(panels[1].profile, panels[2].profile)
+        self.assertIs(
+            panels_v2.get_vertex_loops(panel=panels[1]),
+            panels_v2.get_vertex_loops(panel=panels[2]))
+
+    def test_array_panels_share_solid(self):
+        pin = panels_v2.Panel(
+            name="pin",
+            media=None,
+            workplane=panels_v2.basic_rect(width=2, height=10, thickness=2),
+            transform=[Translate((0, 0, 5))])
+
+        panels = panels_v2.array_panels(
+            panel=pin,
+            offsets=panels_v2.linear_offsets(count=3, spacing=(8, 0, 0)))
+
+        self.assertEqual([p.name for p in panels], ["pin0", "pin1", "pin2"])
+        self.assertTrue(all([p.workplane is pin.workplane for p in panels]))
+        self.assertEqual(
+            [p.transform for p in panels],
+            [
+                [Translate((0, 0, 5)), Translate((-8, 0, 0))],
+                [Translate((0, 0, 5)), Translate((0, 0, 0))],
+                [Translate((0, 0, 5)), Translate((8, 0, 0))]
+            ])
+
+    def test_array_cutout_is_one_profile(self):
+        # A 2 x 2 grid of slots, as one cutout
+        cutout = panels_v2.array_cutout(
+            cutout=panels_v2.Cutout(
+                workplane=None,
+                subtract_from=["wall"],
+                transform=[Translate((0, 0, -4))],
+                profile=profiles_v2.rect(width=2, height=4, thickness=10)),
+            offsets=panels_v2.grid_offsets(
+                column_count=2,
+                row_count=2,
+                column_spacing=10,
+                row_spacing=6))
+
+        self.assertEqual(len(cutout.profile.polygon.geoms), 4)
+        self.assertEqual(cutout.profile.polygon.bounds, (-6, -5, 6, 5))
+        self.assertEqual(cutout.profile.z, -4)
+        self.assertEqual(cutout.transform, [])
+
+    def test_array_cutout_is_one_solid(self):
+        cutout = panels_v2.array_cutout(
+            cutout=panels_v2.Cutout(
+                workplane=panels_v2.basic_rect(width=2, height=4, thickness=10),
+                subtract_from=["wall"],
+                transform=[Translate((0, 0, -4))]),
+            offsets=panels_v2.linear_offsets(count=3, spacing=(8, 0, 0)))
+
+        shapes = cutout.workplane.vals()
+        self.assertEqual(len(shapes), 1)
+        self.assertEqual(len(shapes[0].Solids()), 3)
+        bb = shapes[0].BoundingBox()
+        self.assertAlmostEqual(bb.xmin, -9)
+        self.assertAlmostEqual(bb.xmax, 9)
+        self.assertAlmostEqual(bb.zmin, -4)
+        self.assertEqual(cutout.transform, [])
+
+    def test_mirrored_workplane_twin(self):
+        # A wall with a hole off center, so that its mirror image differs
+        workplane = (
+            panels_v2.basic_rect(width=40, height=30, thickness=2)
+            - panels_v2.basic_rect(width=10, height=8, thickness=10)
+            .translate((6, 7, -4))
+        )
+        # Both layers share one solid
+        wall = panels_v2.PanelGroup(name="back_wall", panels=[
+            panels_v2.Panel(
+                name="base_wall",
+                media=None,
+                workplane=workplane,
+                transform=[Translate((0, 3, 2))]),
+            panels_v2.Panel(
+                name="outside_wall",
+                media=None,
+                workplane=workplane,
+                transform=[Translate((0, 3, 4))])
+        ])
+        twin = panels_v2.twin(
+            panel_group=wall,
+            name="front_wall",
+            transform=[],
+            mirror_plane="XZ")
+
+        panel = twin.panels[0]
+        self.assertEqual(panel.transform, [Translate((0, -3, 2))])
+        self.assertEqual(
+            panels_v2.get_mirror_source(workplane=panel.workplane),
+            (workplane, "XZ"))
+        self.assertIs(twin.panels[1].workplane, panel.workplane)
+
+        loops = panels_v2.get_vertex_loops(panel=panel)
+        expected_loops = vertices_v2.get_panel_vertex_loops(
+            workplane=workplane.mirror("XZ", (0, 0, 0)))
+        self.assertEqual(
+            sorted([sorted(loop) for loop in loops.values()]),
+            sorted([sorted(loop) for loop in expected_loops.values()]))
+
+    def test_vertex_loops_in_processes(self):
+        # The panels are built again for each run, as outlines are kept by
+        # the solid or profile that they were read from
+        def get_panels():
+            roof_wp = panels_v2.arch(width=20, height=30, thickness=2)
+            wall_wp = (
+                panels_v2.basic_rect(width=40, height=30, thickness=2)
+                - panels_v2.basic_rect(width=10, height=8, thickness=10)
+                .translate((6, 7, -4))
+            )
+            # Two layers that share the roof's solid, a profile panel and
+            # the mirrored twin of all of them
+            back = panels_v2.PanelGroup(name="back", panels=[
+                panels_v2.Panel(name="roof0", media=None, workplane=roof_wp),
+                panels_v2.Panel(
+                    name="roof1",
+                    media=None,
+                    workplane=roof_wp,
+                    transform=[Translate((0, 0, 2))]),
+                panels_v2.Panel(name="wall", media=None, workplane=wall_wp),
+                panels_v2.Panel(
+                    name="floor",
+                    media=None,
+                    workplane=None,
+                    profile=profiles_v2.rect(width=40, height=20, thickness=2))
+            ])
+            front = panels_v2.twin(
+                panel_group=back,
+                name="front",
+                transform=[],
+                mirror_plane="XZ")
+            return back.panels + front.panels
+
+        expected_loops = panels_v2.get_all_vertex_loops(
+            panels=get_panels(), jobs=1)
+        loops = panels_v2.get_all_vertex_loops(panels=get_panels(), jobs=2)
+
+        self.assertEqual(len(loops), 8)
+        self.assertEqual(loops, expected_loops)
@@ -0,0 +1,130 @@
+import unittest
+from buildings import media_v2
+from buildings import panels_v2
+from buildings import profiles_v2
+from buildings import vertices_v2
+from buildings.panels_v2 import wall_panels, window_panels
+from buildings.tabs import Tab, TabDirection
+from buildings.transforms_v2 import Rotate, Translate
+
+
+class ProfilesTestCase(unittest.TestCase):
+
+    def test_rect_with_tabs(self):
+        profile = profiles_v2.rect(
+            width=40,
+            height=30,
+            thickness=2,
+            tab_left=Tab(
+                direction=TabDirection.OUT, width=10, height=3, thickness=2,
+                offset=5),
+            tab_bottom=Tab(
+                direction=TabDirection.IN, width=8, height=2, thickness=2))
+
+        self.assertEqual(profile.polygon.area, 40 * 30 + 10 * 3 - 8 * 2)
+        self.assertEqual(profile.polygon.bounds, (-23, -15, 20, 15))
+
+    def test_cutout_through_wall(self):
+        # A wall stood up and moved, with a window hole made in the same
+        # coordinates as the wall
+        wall = profiles_v2.rect(width=40, height=30, thickness=2)
+        hole = profiles_v2.translate(
+            profile=profiles_v2.rect(width=10, height=8, thickness=10),
+            vector=(5, 3, -5))
+        wall_transform = [
+            Rotate((0, 0, 0), (1, 0, 0), 90),
+            Translate((100, 20, 0))
+        ]
+
+        hole = profiles_v2.apply_transforms(
+            profile=hole,
+            transforms=[[], wall_transform],
+            reverse_transform=wall_transform)
+        wall = profiles_v2.difference(profile=wall, cutter=hole)
+
+        self.assertEqual(len(wall.polygon.interiors), 1)
+        self.assertAlmostEqual(wall.polygon.area, 40 * 30 - 10 * 8)
+
+    def test_mirrored_twin(self):
+        roof = panels_v2.PanelGroup(name="back_roof", panels=[
+            panels_v2.Panel(
+                name="roof_layer_0",
+                media=None,
+                workplane=None,
+                transform=[Translate((0, 3, 2))],
+                profile=profiles_v2.polygon(
+                    points=[(0, 0), (10, 0), (10, 5), (0, 8)],
+                    thickness=2))
+        ])
+        twin = panels_v2.twin(
+            panel_group=roof,
+            name="front_roof",
+            transform=[],
+            mirror_plane="XZ")
+
+        panel = twin.panels[0]
+        self.assertEqual(panel.transform, [Translate((0, -3, 2))])
+        self.assertEqual(
+            sorted(panels_v2.get_vertex_loops(panel=panel)[0]),
+            sorted(vertices_v2.mirror_vertex_loops(
+                vertex_loops=panels_v2.get_vertex_loops(panel=roof.panels[0]),
+                plane="XZ")[0]))
+
+    def test_vertex_loops_match_solid(self):
+        tab_left = Tab(
+            direction=TabDirection.OUT, width=10, height=3, thickness=2,
+            offset=5)
+        profile = profiles_v2.rect(
+            width=40, height=30, thickness=2, tab_left=tab_left)
+        workplane = panels_v2.rect(
+            width=40, height=30, thickness=2, tab_left=tab_left,
+            tab_right=None, tab_bottom=None, tab_top=None)
+
+        loops = profiles_v2.get_vertex_loops(profile=profile)
+        expected_loops = vertices_v2.get_panel_vertex_loops(workplane=workplane)
+
+        self.assertEqual(
+            sorted([sorted(loop) for loop in loops.values()]),
+            sorted([sorted(loop) for loop in expected_loops.values()]))
+
+    def test_profile_wall_matches_solid(self):
+        # A gable wall with a window, built from profiles and from solids
+        def build_wall(use_profiles):
+            wall_pg = wall_panels.gable_wall(
+                wall_base_media=media_v2.CARD_2x169mm,
+                wall_front_media=media_v2.CARD_2x056mm,
+                wall_back_media=media_v2.CARD_056mm,
+                roof_media=media_v2.CARD_056mm,
+                roof_layer_count=5,
+                width=50,
+                height=60,
+                gable_height=20,
+                transform=[],
+                use_profiles=use_profiles)
+            panels_v2.add_child_panel_group(
+                parent=wall_pg,
+                child=window_panels.window(
+                    base_media=media_v2.CARD_2x169mm,
+                    media=media_v2.CARD_056mm,
+                    window_width=11.5,
+                    window_height=20,
+                    sill_width=14.5,
+                    sill_height=2,
+                    transform=[Translate((5, 10, 0))],
+                    use_profiles=use_profiles))
+            return panels_v2.get_all_panels(panel_group=wall_pg)
+
+        panels = build_wall(use_profiles=True)
+        expected_panels = build_wall(use_profiles=False)
+
+        self.assertTrue(all([panel.profile is not None for panel in panels]))
+        for panel, expected_panel in zip(panels, expected_panels):
+            loops = panels_v2.get_vertex_loops(panel=panel)
+            expected_loops = panels_v2.get_vertex_loops(panel=expected_panel)
+            self.assertEqual(
+                sorted([sorted(loop) for loop in loops.values()]),
+                sorted([sorted(loop) for loop in expected_loops.values()]),
+                panel.name)
+            self.assertAlmostEqual(
+                panels_v2.get_panel_workplane(panel=panel).val().Volume(),
+                panels_v2.get_panel_workplane(panel=expected_panel).val().Volume())
@@ -1,11 +1,14 @@
 import unittest
 from buildings import export_v2
+from buildings import fingerprints_v2
 from buildings import media_v2
+from buildings.panels_v2 import PanelGroup
 from buildings.panels_v2.stokesley_station import back_house
 from buildings.panels_v2.stokesley_station import main_house
 from buildings.panels_v2.stokesley_station import platform_shelter
 from buildings.panels_v2.stokesley_station import porch_house
 from buildings.panels_v2.stokesley_station import side_house
+from buildings.panels_v2.stokesley_station import signal_box
 from buildings.panels_v2.stokesley_station import waiting_room
 from test_buildings import utils
 
@@ -83,3 +86,53 @@ class StokesleyStationTestCase(unittest.TestCase):
     #     pg = platform_shelter.platform_shelter(transform=[])
     #     mesh_xml_str = export_v2.export_mesh_to_xml_string(panel_group=pg)
     #     utils.write_mesh_xml(filename="platform_shelter_1.xml", xml_str=mesh_xml_str)
+
+
+class StokesleyStationFingerprintsTestCase(unittest.TestCase):
+    """
+    Verify that the panel fingerprints of each building are equal to the
+    expected fingerprints, which names the panels that changed rather than
+    diffing the whole mesh.
+    """
+
+    def test_waiting_room(self):
+        pg = waiting_room.waiting_room(
+            wall_base_media=wall_base_media,
+            wall_front_media=wall_front_media,
+            wall_back_media=wall_back_media,
+            roof_media=roof_media,
+            window_media=window_media,
+            transform=[]
+        )
+        self._assert_fingerprints(pg=pg, filename="waiting_room_1.json")
+
+    def test_main_house(self):
+        pg = main_house.main_house(transform=[])
+        self._assert_fingerprints(pg=pg, filename="main_house_1.json")
+
+    def test_side_house(self):
+        pg = side_house.side_house(transform=[])
+        self._assert_fingerprints(pg=pg, filename="side_house_1.json")
+
+    def test_back_house(self):
+        pg = back_house.back_house(transform=[])
+        self._assert_fingerprints(pg=pg, filename="back_house_1.json")
+
+    def test_porch_house(self):
+        pg = porch_house.porch_house(transform=[])
+        self._assert_fingerprints(pg=pg, filename="porch_house_1.json")
+
+    def test_platform_shelter(self):
+        pg = platform_shelter.platform_shelter(transform=[])
+        self._assert_fingerprints(pg=pg, filename="platform_shelter_1.json")
+
+    def test_signal_box(self):
+        pg = signal_box.signal_box(transform=[])
+        self._assert_fingerprints(pg=pg, filename="signal_box_1.json")
+
+    def _assert_fingerprints(self, pg: PanelGroup, filename: str):
+        fingerprints = fingerprints_v2.get_fingerprints(panel_group=pg)
+        expected_fingerprints = utils.read_fingerprints(filename=filename)
+        utils.assert_equal_fingerprints(
+            fingerprints=fingerprints,
+            expected_fingerprints=expected_fingerprints)
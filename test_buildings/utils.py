@@ -1,6 +1,8 @@
 import difflib
 import os
 import re
+from buildings import fingerprints_v2
+from buildings.fingerprints_v2 import PanelFingerprint
 
 
 def write_file(filepath: str, data_str: str):
@@ -26,6 +28,24 @@ def write_mesh_xml(filename: str, xml_str: str):
     return write_file(filepath=filepath, data_str=xml_str)
 
 
+def read_fingerprints(filename: str) -> list[PanelFingerprint]:
+    filepath = os.path.join("test_buildings", "fingerprints", filename)
+    return fingerprints_v2.fingerprints_from_json(json_str=read_file(filepath))
+
+
+def write_fingerprints(filename: str, fingerprints: list[PanelFingerprint]):
+    """
+    Writes fingerprints JSON file to disk. Used to create unit test
+    fingerprint files.
+    """
+    filepath = os.path.join("test_buildings", "fingerprints", filename)
+    os.makedirs(os.path.dirname(filepath), exist_ok=True)
+    return write_file(
+        filepath=filepath,
+        data_str=fingerprints_v2.fingerprints_to_json(
+            fingerprints=fingerprints))
+
+
 def get_diff(value_str: str, expected_str: str):
     diff_results = difflib.unified_diff(
         value_str.splitlines(keepends=True),
@@ -97,3 +117,21 @@ def assert_equal_mesh_xml(mesh_xml_str, expected_mesh_xml_str):
     
     # There is no diff - the mesh XML is equal
     return
+
+
+def assert_equal_fingerprints(
+    fingerprints: list[PanelFingerprint],
+    expected_fingerprints: list[PanelFingerprint]
+):
+    """
+    Compares panel fingerprints and fails with one line for each changed
+    property of each changed panel, instead of a diff of the whole mesh.
+    """
+    differences = fingerprints_v2.compare_fingerprints(
+        fingerprints=fingerprints,
+        expected_fingerprints=expected_fingerprints)
+
+    if len(differences) != 0:
+        raise AssertionError(
+            f"{len(differences)} panel fingerprint differences:\n" +
+            "\n".join(differences))
@@ -0,0 +1,32 @@
+import argparse
+from buildings import buildings_v2
+from buildings import live_v2
+
+
+def main():
+    parser = argparse.ArgumentParser(
+        description="Rebuild photo match models when their source files change")
+    parser.add_argument(
+        "models",
+        nargs="*",
+        help=f"Models to rebuild (default: all of {', '.join(buildings_v2.MODEL_BUILDERS)})")
+    parser.add_argument("--port", type=int, default=live_v2.DEFAULT_PORT)
+    parser.add_argument("--interval", type=float, default=live_v2.DEFAULT_INTERVAL)
+    parser.add_argument(
+        "--data-dirpath",
+        default=buildings_v2.PHOTO_MATCH_DATA_DIRPATH)
+
+    args = parser.parse_args()
+    for model_name in args.models:
+        if model_name not in buildings_v2.MODEL_BUILDERS:
+            parser.error(f"Unknown model: {model_name}")
+
+    live_v2.watch(
+        model_names=args.models or None,
+        data_dirpath=args.data_dirpath,
+        port=args.port,
+        interval=args.interval)
+
+
+if __name__ == "__main__":
+    main()